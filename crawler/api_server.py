@@ -0,0 +1,198 @@
+"""
+Read-only HTTP API over the generated catalog (animes.json), served from an
+indexed in-memory store (lib/catalog_store.py).
+
+Routes (JSON):
+    /api/animes?genre=奇幻,冒險&year=2010-2019&minVotes=100&q=...&sort=imdb&page=1&pageSize=50
+                          one page of matching records; sort is bahamut, imdb,
+                          douban, myanimelist or composite (with &weights=)
+    /api/ranking?weights=bahamut:40,imdb:20,douban:0,myanimelist:40&...
+                          composite ranking, same filters and paging
+    /api/animes/<id>      one record
+    /api/facets           record count, genre / year histograms, year range
+
+Every response carries an ETag (data version + normalized query, with a
+-gz suffix on gzip bodies) and the data file's Last-Modified, and answers
+If-None-Match / If-Modified-Since with 304. Bodies of 1 KB or more are
+gzip-encoded for clients that accept it. Encoded responses are cached per
+normalized query.
+
+Usage:
+    python api_server.py [--input ../data/animes.json] [--host 127.0.0.1] [--port 8080]
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from lib.catalog_store import DEFAULT_PAGE_SIZE, CatalogStore, parse_weights, parse_year_option
+from lib.data_bundle import dumps_compact
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+INPUT_FILE = '../data/animes.json'
+GZIP_MIN_BYTES = 1024
+# Encoded responses kept (per normalized path + query)
+RESPONSE_CACHE_SIZE = 512
+
+Response = Tuple[int, Dict[str, str], bytes]
+
+class CatalogApi:
+    """
+    `handle(method, path, query, headers) -> (status, headers, body bytes)`;
+    `modified` is the data's mtime (Last-Modified).
+    """
+
+    def __init__(self, store: CatalogStore, modified: float):
+        self.store = store
+        self.modified = int(modified)
+        self.last_modified = formatdate(self.modified, usegmt=True)
+        self._cache: 'OrderedDict[Tuple, Tuple[int, bytes, Optional[bytes]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str) -> 'CatalogApi':
+        with open(path, 'r', encoding='utf-8') as f:
+            animes = json.load(f)
+        return cls(CatalogStore(animes), os.path.getmtime(path))
+
+    def _route(self, path: str, query: Dict[str, str]) -> Tuple[int, object]:
+        if path == '/api/facets':
+            return 200, dict(self.store.facets, count=len(self.store.animes))
+        if path.startswith('/api/animes/'):
+            anime = self.store.get(unquote(path[len('/api/animes/'):]))
+            return (200, anime) if anime is not None else (404, {'error': 'Not found'})
+        if path in ('/api/animes', '/api/ranking'):
+            sort = 'composite' if path == '/api/ranking' else query.get('sort', 'bahamut')
+            try:
+                result = self.store.query(
+                    genres=[g for g in query.get('genre', '').split(',') if g],
+                    year=parse_year_option(query.get('year')),
+                    min_votes=int(query.get('minVotes') or 0),
+                    q=query.get('q'),
+                    sort=sort,
+                    weights=parse_weights(query.get('weights')),
+                    page=int(query.get('page') or 1),
+                    page_size=int(query.get('pageSize') or DEFAULT_PAGE_SIZE),
+                )
+            except ValueError as e:
+                return 400, {'error': str(e)}
+            return 200, result
+        return 404, {'error': 'Not found'}
+
+    def _not_modified(self, etag: str, headers: Dict[str, str]) -> bool:
+        if_none_match = headers.get('if-none-match')
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+        since = headers.get('if-modified-since')
+        if since:
+            try:
+                return self.modified <= parsedate_to_datetime(since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def handle(self, method: str, path: str, query: Dict[str, str],
+               headers: Optional[Dict[str, str]] = None) -> Response:
+        headers = {name.lower(): value for name, value in (headers or {}).items()}
+        key = (path.rstrip('/') or '/', tuple(sorted(query.items())))
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:12]
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached:
+                self._cache.move_to_end(key)
+        if cached is None:
+            status, payload = self._route(key[0], query)
+            body = dumps_compact(payload)
+            compressed = gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_BYTES else None
+            cached = (status, body, compressed)
+            with self._lock:
+                self._cache[key] = cached
+                if len(self._cache) > RESPONSE_CACHE_SIZE:
+                    self._cache.popitem(last=False)
+
+        status, body, compressed = cached
+        gzipped = compressed is not None and 'gzip' in headers.get('accept-encoding', '')
+        # Strong validators: the gzip body is a different representation, so it gets its own tag
+        suffix = '-gz' if gzipped else ''
+        etag = f'"{self.store.version}-{digest}{suffix}"'
+        common = {'ETag': etag, 'Last-Modified': self.last_modified, 'Cache-Control': 'no-cache',
+                  'Vary': 'Accept-Encoding'}
+        # Errors are not cacheable, so they get no validators
+        if status != 200:
+            return status, {'Content-Type': 'application/json; charset=utf-8'}, body
+        if method in ('GET', 'HEAD') and self._not_modified(etag, headers):
+            return 304, common, b''
+        response_headers = dict(common, **{'Content-Type': 'application/json; charset=utf-8'})
+        if gzipped:
+            response_headers['Content-Encoding'] = 'gzip'
+            body = compressed
+        return status, response_headers, body
+
+def _make_handler(app: CatalogApi):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body go out in separate writes; without TCP_NODELAY,
+        # keep-alive clients wait on delayed ACKs (~40 ms) for every response
+        disable_nagle_algorithm = True
+
+        def _respond(self, method: str):
+            parts = urlsplit(self.path)
+            query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+            status, headers, body = app.handle(method, parts.path, query, dict(self.headers.items()))
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if method == 'GET':
+                self.wfile.write(body)
+
+        def do_GET(self):
+            self._respond('GET')
+
+        def do_HEAD(self):
+            self._respond('HEAD')
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return Handler
+
+def make_server(app: CatalogApi, host: str = '127.0.0.1', port: int = 0) -> ThreadingHTTPServer:
+    """HTTP server for `app` (not started); port=0 picks a free port."""
+    server = ThreadingHTTPServer((host, port), _make_handler(app))
+    server.daemon_threads = True
+    return server
+
+def main(input_file: str = INPUT_FILE, host: str = '127.0.0.1', port: int = 8080):
+    app = CatalogApi.from_file(input_file)
+    server = make_server(app, host, port)
+    logger.info(f"Serving {len(app.store.animes)} records from {input_file} on "
+                f"http://{host}:{server.server_address[1]}/api/animes (version {app.store.version})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Serve the generated catalog over a read-only HTTP API.")
+    parser.add_argument('--input', default=INPUT_FILE)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    args = parser.parse_args()
+    main(args.input, args.host, args.port)
@@ -10,9 +10,13 @@ import random
 import json
 import re
 from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional
 from pathlib import Path
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from lib.run_budget import Checkpoint, RunBudget, parse_duration, priority_key
 
 # User-Agent rotation pool
 USER_AGENTS = [
@@ -20,10 +24,12 @@ USER_AGENTS = [
     'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
 ]
 
-# Bahamut Anime Crazy base URLs
-BASE_URL = 'https://ani.gamer.com.tw'
+# Bahamut Anime Crazy base URLs (overridable for the local stand-in: mock_servers/bahamut.py)
+BASE_URL = os.environ.get('BAHAMUT_BASE_URL', 'https://ani.gamer.com.tw')
 ANIME_LIST_URL = f'{BASE_URL}/animeList.php'
 OUTPUT_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'bahamut_raw.json')
+# Where a --budget run stopped (lib/run_budget.Checkpoint)
+CHECKPOINT_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'scrape_checkpoint.json')
 
 # Rate limiting configuration
 MIN_DELAY = 2.0
@@ -75,6 +81,29 @@ def extract_anime_id(url: str) -> str:
     match = re.search(r'sn=(\d+)', url)
     return match.group(1) if match else url
 
+def prioritize_urls(urls: List[str], known: Dict[str, Dict]) -> List[str]:
+    """
+    Detail URLs in processing order: titles never scraped before first (new
+    releases), then known ones by popularity, Bahamut votes and year from the
+    last scrape (lib.run_budget.priority_key).
+    """
+    def key(url: str):
+        item = known.get(extract_anime_id(url))
+        return (item is None, priority_key(item or {}))
+    return sorted(urls, key=key, reverse=True)
+
+def load_existing() -> List[Dict]:
+    if not os.path.exists(OUTPUT_FILE):
+        return []
+    try:
+        with open(OUTPUT_FILE, 'r', encoding='utf-8') as f:
+            existing_data = json.load(f)
+        print(f"\n📂 Loaded {len(existing_data)} existing items for merging.")
+        return existing_data
+    except Exception as e:
+        print(f"⚠️ Failed to load existing file: {e}")
+        return []
+
 def scrape_anime_detail(url: str) -> Optional[Dict]:
     """Scrape individual anime detail page"""
     try:
@@ -165,6 +194,8 @@ def scrape_anime_detail(url: str) -> Optional[Dict]:
             elif not acg_link.startswith('http'):
                  # Could be relative, but usually starts with //
                  pass
+            # Seasons of one work often share an ACG page (franchise clustering)
+            anime['acgUrl'] = acg_link
 
             # Rate limit before secondary request
             rate_limit()
@@ -202,16 +233,17 @@ def scrape_anime_detail(url: str) -> Optional[Dict]:
         print(f"❌ Failed to scrape {url}: {e}")
         return None
 
-def main(limit: Optional[int] = None):
-    """Orchestrate full scraping process"""
-    print("🚀 Starting Bahamut Anime Crazy Scraper (HTML Version)")
-    
-    all_anime_urls = []
+def iter_anime_urls(run_budget: Optional[RunBudget] = None, max_pages: int = 200) -> Iterator[str]:
+    """
+    Unique anime detail URLs, yielded page by page as the list pages are
+    fetched (so callers can start on details before the listing is done).
+    """
+    seen = set()
     page_num = 1
-    max_pages = 200 # Safety limit
-    
-    print("📋 Step 1: Collecting anime URLs from list pages...")
-    while page_num <= max_pages:
+    while page_num <= max_pages: # Safety limit
+        if run_budget and run_budget.exhausted():
+            print("   ⏱️ Time budget reached while collecting URLs.")
+            break
         print(f"   Fetching page {page_num}...")
         html = get_anime_list_page(page_num)
         rate_limit()
@@ -223,44 +255,69 @@ def main(limit: Optional[int] = None):
         if not links:
             print("   No more anime links found. Stopping pagination.")
             break
-        
+
         new_links_found = 0
         for link in links:
-            if link not in all_anime_urls:
-                all_anime_urls.append(link)
+            if link not in seen:
+                seen.add(link)
                 new_links_found += 1
+                yield link
 
-        print(f"   Found {new_links_found} new animes. Total unique: {len(all_anime_urls)}")
+        print(f"   Found {new_links_found} new animes. Total unique: {len(seen)}")
         if new_links_found == 0 and page_num > 5: # If no new animes for a few pages, stop
             print("   No new animes found for several pages, assuming end of list.")
             break
-        
+
         page_num += 1
 
+def main(limit: Optional[int] = None, budget: Optional[float] = None):
+    """
+    Orchestrate full scraping process.
+
+    With a `budget` (seconds) the most popular titles are scraped first and the
+    run stops when the time is up; the results so far are saved and
+    CHECKPOINT_FILE records which titles the next run should continue with.
+    """
+    print("🚀 Starting Bahamut Anime Crazy Scraper (HTML Version)")
+    run_budget = RunBudget(budget)
+    
+    print("📋 Step 1: Collecting anime URLs from list pages...")
+    all_anime_urls = list(iter_anime_urls(run_budget))
+
     print(f"\n✓ Collected {len(all_anime_urls)} unique anime URLs.")
     if not all_anime_urls:
         return
 
+    # Load existing data to merge (and, in budget mode, to rank known titles)
+    existing_data = load_existing()
+
+    checkpoint = None
+    ordered_urls = all_anime_urls
+    if budget is not None:
+        checkpoint = Checkpoint(CHECKPOINT_FILE, 'scrape')
+        done = checkpoint.load()
+        if done:
+            print(f"   Continuing the last pass: {len(done)} animes already scraped.")
+        known = {str(item['id']): item for item in existing_data}
+        ordered_urls = [url for url in prioritize_urls(all_anime_urls, known) if extract_anime_id(url) not in done]
+
     scraped_animes = []
-    urls_to_scrape = all_anime_urls[:limit] if limit else all_anime_urls
+    urls_to_scrape = ordered_urls[:limit] if limit else ordered_urls
     
     print(f"\n📺 Step 2: Scraping {len(urls_to_scrape)} anime details...")
     for i, url in enumerate(urls_to_scrape):
+        if run_budget.exhausted():
+            print(f"   ⏱️ Time budget reached after {i} animes; {len(urls_to_scrape) - i} left for the next run.")
+            break
+        run_budget.start_item()
         print(f"   [{i+1}/{len(urls_to_scrape)}] Scraping: {url}")
         anime_data = scrape_anime_detail(url)
         if anime_data:
             scraped_animes.append(anime_data)
         rate_limit()
-
-    # Load existing data to merge
-    existing_data = []
-    if os.path.exists(OUTPUT_FILE):
-        try:
-            with open(OUTPUT_FILE, 'r', encoding='utf-8') as f:
-                existing_data = json.load(f)
-            print(f"\n📂 Loaded {len(existing_data)} existing items for merging.")
-        except Exception as e:
-            print(f"⚠️ Failed to load existing file: {e}")
+        run_budget.finish_item()
+        if checkpoint:
+            checkpoint.mark(extract_anime_id(url))
 
     # Merge: Create a dict of existing items by ID
     merged_map = {item['id']: item for item in existing_data}
@@ -275,19 +332,26 @@ def main(limit: Optional[int] = None):
     Path(OUTPUT_FILE).parent.mkdir(parents=True, exist_ok=True)
     with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
         json.dump(final_data, f, ensure_ascii=False, indent=4)
+
+    if checkpoint:
+        pending = [extract_anime_id(url) for url in ordered_urls if extract_anime_id(url) not in checkpoint.processed]
+        checkpoint.save(pending)
+        print(f"📌 Checkpoint: {len(pending)} animes left in this pass ({CHECKPOINT_FILE})")
         
     print("\n✅ Scraping complete!")
 
 if __name__ == '__main__':
-    import sys
+    import argparse
+    parser = argparse.ArgumentParser(description="Scrape Bahamut Anime Crazy (動畫瘋).")
+    parser.add_argument('limit', nargs='?', help="Number of animes to scrape, or 'test' for 10")
+    parser.add_argument('--budget', type=parse_duration,
+                        help="Time box, e.g. 30m: most popular first, stop and checkpoint when time is up")
+    args = parser.parse_args()
+
     limit = None
-    if 'test' in sys.argv:
+    if args.limit == 'test':
         limit = 10
-    else:
-        # Check for numeric argument
-        for arg in sys.argv:
-            if arg.isdigit():
-                limit = int(arg)
-                break
+    elif args.limit and args.limit.isdigit():
+        limit = int(args.limit)
     
-    main(limit=limit)
+    main(limit=limit, budget=args.budget)
@@ -0,0 +1,68 @@
+"""
+Benchmark: full AOD index rebuild, serial vs process pool.
+
+Checks that every parallel build produces exactly the serial index, and
+reports wall time and speedup per worker count.
+
+Usage:
+    python benchmarks/bench_aod_build.py [--aod PATH] [--synthetic 40000] [--workers 1 2 4 8]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+CRAWLER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(CRAWLER_DIR)
+
+from services.aod_service import AnimeOfflineDatabase
+from lib.text_cleaner import clear_caches
+from synthetic_aod import write_synthetic_aod
+
+DEFAULT_AOD_FILE = os.path.join(CRAWLER_DIR, '..', 'data', 'anime-offline-database.jsonl')
+
+def build(path: str, workers: int):
+    clear_caches()  # don't let the serial run warm the cache for the next one
+    start = time.perf_counter()
+    aod = AnimeOfflineDatabase(path, workers=workers)
+    aod.load()
+    return time.perf_counter() - start, aod
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--aod', default=DEFAULT_AOD_FILE)
+    parser.add_argument('--synthetic', type=int, default=40000,
+                        help='Entries to generate when --aod does not exist')
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    path = args.aod
+    tmp = None
+    if not os.path.exists(path):
+        tmp = tempfile.NamedTemporaryFile(suffix='.jsonl', delete=False)
+        tmp.close()
+        path = write_synthetic_aod(tmp.name, args.synthetic)
+        print(f"AOD file not found, using {args.synthetic} synthetic entries.")
+    print(f"CPUs available: {os.cpu_count()}\n")
+
+    try:
+        baseline_time, baseline = build(path, 1)
+        print(f"{'workers':>8}{'seconds':>10}{'speedup':>10}  identical")
+        print(f"{1:>8}{baseline_time:>10.3f}{1.0:>10.2f}  -")
+        for workers in args.workers:
+            if workers == 1:
+                continue
+            elapsed, aod = build(path, workers)
+            identical = (dict(aod.title_index) == dict(baseline.title_index)
+                         and list(aod.records) == list(baseline.records))
+            print(f"{workers:>8}{elapsed:>10.3f}{baseline_time / elapsed:>10.2f}  {identical}")
+            if not identical:
+                sys.exit(1)
+    finally:
+        if tmp:
+            os.remove(tmp.name)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: AOD load time and peak RSS per decoder.
+
+Each mode runs in a fresh interpreter so peak RSS is not polluted by earlier runs.
+'legacy' reproduces the original path (full json.loads of every line + _index_entry).
+
+Usage:
+    python benchmarks/bench_aod_load.py                      # ../data AOD file, or synthetic fallback
+    python benchmarks/bench_aod_load.py --synthetic 40000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+CRAWLER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(CRAWLER_DIR)
+
+from services.aod_service import AnimeOfflineDatabase, available_decoders
+
+DEFAULT_AOD_FILE = os.path.join(CRAWLER_DIR, '..', 'data', 'anime-offline-database.jsonl')
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def run_worker(mode: str, path: str) -> dict:
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+
+    if mode == 'legacy':
+        aod = AnimeOfflineDatabase(path, decoder='json')
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    aod._index_entry(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        aod.is_loaded = True
+    else:
+        aod = AnimeOfflineDatabase(path, decoder=mode)
+        aod.load()
+
+    elapsed = time.perf_counter() - start
+    return {
+        'mode': mode,
+        'seconds': elapsed,
+        'baseline_rss_mb': baseline,
+        'peak_rss_mb': _peak_rss_mb(),
+        'keys': len(aod.title_index),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--aod', default=DEFAULT_AOD_FILE, help='AOD JSONL release to load')
+    parser.add_argument('--synthetic', type=int, default=30000,
+                        help='Entries to generate when --aod does not exist')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.aod)))
+        return
+
+    path = args.aod
+    tmp = None
+    if not os.path.exists(path):
+        from synthetic_aod import write_synthetic_aod
+        tmp = tempfile.NamedTemporaryFile(suffix='.jsonl', delete=False)
+        tmp.close()
+        path = write_synthetic_aod(tmp.name, args.synthetic)
+        print(f"AOD file not found, using {args.synthetic} synthetic entries.")
+
+    try:
+        print(f"{'mode':<10}{'seconds':>10}{'peak RSS MB':>14}{'delta MB':>11}{'keys':>10}")
+        for mode in ['legacy'] + available_decoders():
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--worker', mode, '--aod', path],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            print(f"{r['mode']:<10}{r['seconds']:>10.3f}{r['peak_rss_mb']:>14.1f}"
+                  f"{r['peak_rss_mb'] - r['baseline_rss_mb']:>11.1f}{r['keys']:>10}")
+    finally:
+        if tmp:
+            os.remove(tmp.name)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark: requests/sec of api_server.py over keep-alive connections.
+
+Starts the API on a free port over animes.json (optionally repeated --scale
+times) and runs client threads through a mix of dashboard-like queries
+(genre / year / minVotes filters, platform sorts, composite weights, later
+pages). Three passes:
+    cold         every request a distinct query (store work + encoding)
+    warm         a set of queries that fits the response cache, repeated
+    revalidate   the warm queries with If-None-Match (304s)
+
+Usage:
+    python benchmarks/bench_api.py [--input ../data/animes.json] [--scale 1] [--clients 8] [--requests 2000]
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from urllib.parse import urlencode
+
+CRAWLER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(CRAWLER_DIR)
+
+from api_server import RESPONSE_CACHE_SIZE, CatalogApi, make_server
+from benchmarks.bench_columnar import scaled
+from lib.catalog_store import CatalogStore
+
+SORTS = ('bahamut', 'imdb', 'douban', 'myanimelist', 'composite')
+
+def make_queries(store, count, seed=0):
+    rng = random.Random(seed)
+    genres = [genre for genre, _ in store.facets['genres']]
+    queries = []
+    for i in range(count):
+        query = {'sort': rng.choice(SORTS), 'page': rng.choice((1, 1, 1, 2, 3)), 'n': i}
+        if rng.random() < 0.5:
+            query['genre'] = ','.join(rng.sample(genres, rng.randint(1, 2)))
+        if rng.random() < 0.4:
+            start = rng.randint(1995, 2023)
+            query['year'] = f"{start}-{start + rng.randint(0, 9)}"
+        if rng.random() < 0.3:
+            query['minVotes'] = rng.choice((10, 100, 1000))
+        if query['sort'] == 'composite':
+            query['weights'] = ','.join(f"{p}:{rng.choice((0, 25, 50))}" for p in SORTS[:4])
+        # 'n' only makes each URL distinct (it is ignored by the API) for the cold pass
+        queries.append('/api/animes?' + urlencode(query))
+    return queries
+
+def run_pass(port, paths, clients, headers_for):
+    latencies, sizes, statuses = [], [], {}
+    lock = threading.Lock()
+    chunks = [paths[i::clients] for i in range(clients)]
+
+    def client(chunk):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local = []
+        for path in chunk:
+            start = time.perf_counter()
+            conn.request('GET', path, headers=headers_for(path))
+            response = conn.getresponse()
+            body = response.read()
+            local.append((time.perf_counter() - start, len(body), response.status, response.getheader('ETag')))
+        conn.close()
+        with lock:
+            for latency, size, status, etag in local:
+                latencies.append(latency)
+                sizes.append(size)
+                statuses[status] = statuses.get(status, 0) + 1
+            etags.update({path: etag for path, (_, _, _, etag) in zip(chunk, local)})
+
+    etags = {}
+    threads = [threading.Thread(target=client, args=(chunk,)) for chunk in chunks]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        'avg_kb': sum(sizes) / len(sizes) / 1024,
+        'statuses': statuses,
+        'etags': etags,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--input', default=os.path.join(CRAWLER_DIR, '..', 'data', 'animes.json'))
+    parser.add_argument('--scale', type=int, default=1, help="Repeat the dataset N times")
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    logging.getLogger('api_server').setLevel(logging.WARNING)
+    with open(args.input, 'r', encoding='utf-8') as f:
+        animes = scaled(json.load(f), args.scale)
+    start = time.perf_counter()
+    store = CatalogStore(animes)
+    print(f"{len(animes)} records, store built in {(time.perf_counter() - start) * 1000:.0f} ms\n")
+
+    server = make_server(CatalogApi(store, os.path.getmtime(args.input)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    cold_paths = make_queries(store, args.requests)
+    warm_set = make_queries(store, min(args.requests, RESPONSE_CACHE_SIZE // 2), seed=1)
+    warm_paths = (warm_set * (args.requests // len(warm_set) + 1))[:args.requests]
+    gzip_only = lambda path: {'Accept-Encoding': 'gzip'}
+    try:
+        run_pass(port, warm_set, args.clients, gzip_only)  # fill the cache
+        print(f"{'pass':<12}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'avg KB':>9}  statuses")
+        etags = {}
+        for name, paths, headers_for in (
+            ('cold', cold_paths, gzip_only),
+            ('warm', warm_paths, gzip_only),
+            ('revalidate', warm_paths, lambda path: {'Accept-Encoding': 'gzip', 'If-None-Match': etags[path]}),
+        ):
+            result = run_pass(port, paths, args.clients, headers_for)
+            etags = result['etags']
+            print(f"{name:<12}{result['rps']:>9.0f}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}"
+                  f"{result['avg_kb']:>9.1f}  {result['statuses']}")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: bytes shipped and decode time of the frontend dataset formats.
+
+Compares today's animes.json (records, indent=2), the same records as compact
+JSON, and the columnar format (lib/columnar.py), each raw, gzip -9 and
+brotli -11 (when brotli is installed). Decode time is json.loads of the raw
+file, plus decode_columnar back to records for the columnar format.
+
+Usage:
+    python benchmarks/bench_columnar.py [--input ../data/animes.json] [--scale 10] [--rounds 5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+CRAWLER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(CRAWLER_DIR)
+
+from lib.columnar import compress_variants, decode_columnar, dumps_compact, encode_columnar
+
+def scaled(animes, scale):
+    """The dataset repeated `scale` times with unique ids."""
+    if scale <= 1:
+        return animes
+    return [dict(anime, id=f"{anime['id']}-{n}") for n in range(scale) for anime in animes]
+
+def best_of(fn, rounds):
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--input', default=os.path.join(CRAWLER_DIR, '..', 'data', 'animes.json'))
+    parser.add_argument('--scale', type=int, default=1, help="Repeat the dataset N times")
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        animes = scaled(json.load(f), args.scale)
+
+    formats = [
+        ('records, indent=2', json.dumps(animes, ensure_ascii=False, indent=2).encode('utf-8'), False),
+        ('records, compact', dumps_compact(animes), False),
+        ('columnar', dumps_compact(encode_columnar(animes)), True),
+    ]
+    encoded = [dict(compress_variants(raw), raw=raw) for _, raw, _ in formats]
+    print(f"{len(animes)} records\n")
+    print(f"{'format':<20}{'raw KB':>9}{'gzip KB':>9}{'br KB':>8}{'raw x':>8}{'gzip x':>8}{'br x':>7}"
+          f"{'loads ms':>10}{'to records ms':>15}")
+    for (name, raw, is_columnar), variants in zip(formats, encoded):
+        # Same encoding on both sides, so compression is not credited to the format
+        ratios = [f"{len(encoded[0][key]) / len(variants[key]):.1f}x" if key in variants else '-'
+                  for key in ('raw', '.gz', '.br')]
+        loads = best_of(lambda: json.loads(raw), args.rounds)
+        payload = json.loads(raw)
+        br = f"{len(variants['.br']) / 1024:>8.0f}" if '.br' in variants else f"{'-':>8}"
+        if is_columnar:
+            to_records = f"{best_of(lambda: decode_columnar(payload), args.rounds) * 1000:>15.1f}"
+        else:
+            to_records = f"{'-':>15}"
+        print(f"{name:<20}{len(raw) / 1024:>9.0f}{len(variants['.gz']) / 1024:>9.0f}{br}"
+              f"{ratios[0]:>8}{ratios[1]:>8}{ratios[2]:>7}{loads * 1000:>10.1f}{to_records}")
+    print("\n'<encoding> x' = today's animes.json / the format, both in that encoding (gzip vs gzip, br vs br).")
+
+if __name__ == '__main__':
+    main()
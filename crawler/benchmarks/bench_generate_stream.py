@@ -0,0 +1,72 @@
+"""
+Benchmark: peak memory and time of generate_json in full vs --stream mode.
+
+Writes the enriched dataset repeated --scale times to a temporary file, then
+runs the load / map / clean / validate / write steps both ways, measuring
+time and the Python heap peak (tracemalloc, in a second run) (the bundle,
+which needs every record, is left out of both).
+
+Usage:
+    python benchmarks/bench_generate_stream.py [--input ../data/animes_enriched.json] [--scale 10]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+CRAWLER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(CRAWLER_DIR)
+
+import generate_json
+from benchmarks.bench_columnar import scaled
+from lib.validation import StreamValidator, validate_records
+
+def full_run(input_file, output_file, mappings):
+    animes = generate_json.load_json(input_file)
+    animes = generate_json.apply_manual_mappings(animes, mappings)
+    final_data = generate_json.validate_and_clean(animes)
+    validate_records(final_data)
+    generate_json.save_json_if_changed(final_data, output_file)
+
+def stream_run(input_file, output_file, mappings):
+    validator = StreamValidator()
+    generate_json.generate_streaming(input_file, output_file, mappings, validator)
+    validator.report()
+
+def measure(fn, *args):
+    """(seconds, peak bytes); timed without tracemalloc, which slows allocation down."""
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--input', default=os.path.join(CRAWLER_DIR, '..', 'data', 'animes_enriched.json'))
+    parser.add_argument('--scale', type=int, default=1, help="Repeat the dataset N times")
+    args = parser.parse_args()
+
+    generate_json.logger.disabled = True
+    with open(args.input, 'r', encoding='utf-8') as f:
+        animes = scaled(json.load(f), args.scale)
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'enriched.json')
+        generate_json.save_json(animes, input_file)
+        size = os.path.getsize(input_file)
+        del animes
+
+        print(f"input: {size / 1024 / 1024:.1f} MB\n")
+        print(f"{'mode':<10}{'seconds':>9}{'peak MB':>10}{'peak / input':>14}")
+        for name, fn in (('full', full_run), ('stream', stream_run)):
+            elapsed, peak = measure(fn, input_file, os.path.join(tmp, f'{name}.json'), {})
+            print(f"{name:<10}{elapsed:>9.2f}{peak / 1024 / 1024:>10.1f}{peak / size:>13.2f}x")
+
+if __name__ == '__main__':
+    main()
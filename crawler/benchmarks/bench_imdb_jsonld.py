@@ -0,0 +1,110 @@
+"""
+Benchmark: CPU time and peak memory to read the rating from an IMDb title page.
+
+Compares the previous path (BeautifulSoup html.parser over the full page +
+soup.find + regex over the full text) with lib.html_extract (first
+application/ld+json block only, found by a regex scan of the raw text).
+
+Recorded pages: pass a directory of saved title pages (*.html). Without one,
+a synthetic ~1 MB page shaped like an IMDb title page is used.
+
+Usage:
+    python benchmarks/bench_imdb_jsonld.py [--pages DIR] [--rounds 5]
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+CRAWLER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(CRAWLER_DIR)
+
+from lib.html_extract import extract_json_ld, select_rated_entity, read_until_json_ld
+
+def synthetic_page(body_kb: int = 1000) -> str:
+    ld = {
+        '@context': 'https://schema.org', '@type': 'TVSeries', 'name': 'Shingeki no Kyojin',
+        'aggregateRating': {'@type': 'AggregateRating', 'ratingCount': 480000, 'ratingValue': 9.1},
+        'actor': [{'@type': 'Person', 'name': f'Actor {i}'} for i in range(20)],
+    }
+    head = (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Attack on Titan (TV Series 2013–2023) - IMDb</title>'
+        + ''.join(f'<link rel="preload" href="/static/{i}.js" as="script">' for i in range(40))
+        + f'<script type="application/ld+json">{json.dumps(ld)}</script></head>'
+    )
+    row = ('<div class="ipc-metadata-list__item"><a href="/name/nm{0}/" class="ipc-link">Person {0}</a>'
+           '<span class="character">Role {0}</span></div>')
+    body = ''.join(row.format(i) for i in range(body_kb * 1024 // len(row.format(0))))
+    next_data = json.dumps({'props': {'pageProps': {'aboveTheFold': {'ratingsSummary': {'aggregateRating': 9.1}}}}})
+    return f'{head}<body>{body}<script id="__NEXT_DATA__" type="application/json">{next_data}</script></body></html>'
+
+def old_path(html: str):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    script = soup.find('script', type='application/ld+json')
+    data = json.loads(script.get_text()) if script else {}
+    rating = select_rated_entity(data) or {}
+    score = rating.get('aggregateRating', {}).get('ratingValue')
+    if not score:
+        match = re.search(r'"ratingValue":\s*"?(\d+\.?\d*)"?', html)
+        score = match.group(1) if match else None
+    return score
+
+def new_path(html: str):
+    raw = html.encode('utf-8')
+    chunks = (raw[i:i + 16384] for i in range(0, len(raw), 16384))
+    head, _ = read_until_json_ld(chunks)
+    data = extract_json_ld(head.decode('utf-8'))
+    return (select_rated_entity(data) or {}).get('aggregateRating', {}).get('ratingValue')
+
+def measure(fn, pages, rounds):
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.process_time()
+        for html in pages:
+            fn(html)
+        best = min(best, time.process_time() - start)
+
+    tracemalloc.start()
+    for html in pages:
+        fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best / len(pages), peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', help='Directory of recorded IMDb title pages (*.html)')
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    pages = []
+    if args.pages:
+        for path in sorted(glob.glob(os.path.join(args.pages, '*.html'))):
+            with open(path, 'r', encoding='utf-8') as f:
+                pages.append(f.read())
+    if not pages:
+        pages = [synthetic_page()]
+        print("No recorded pages given, using one synthetic ~1 MB page.")
+    print(f"{len(pages)} page(s), average {sum(map(len, pages)) / len(pages) / 1024:.0f} KB\n")
+
+    rows = [('new: JSON-LD scan', new_path)]
+    try:
+        import bs4  # noqa: F401
+        rows.insert(0, ('old: html.parser soup', old_path))
+        for html in pages:
+            assert str(old_path(html)) == str(new_path(html)), "extractors disagree"
+    except ImportError:
+        print("bs4 not installed: only the new path is measured.")
+
+    print(f"{'path':<24}{'CPU ms/page':>12}{'peak MB':>10}")
+    for name, fn in rows:
+        cpu, peak = measure(fn, pages, args.rounds)
+        print(f"{name:<24}{cpu * 1000:>12.2f}{peak / 1024 / 1024:>10.2f}")
+
+if __name__ == '__main__':
+    main()
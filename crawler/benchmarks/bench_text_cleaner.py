@@ -0,0 +1,124 @@
+"""
+Micro-benchmark: title normalization throughput (titles/sec).
+
+Compares the original per-call implementations (reproduced verbatim below)
+with lib.text_cleaner, and fails loudly if any output differs byte-for-byte.
+
+Corpus: every title/titleOriginal/titleEnglish in data/bahamut_raw.json plus
+titles and synonyms from a synthetic AOD release.
+
+Usage:
+    python benchmarks/bench_text_cleaner.py [--synthetic 20000] [--rounds 3]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+
+CRAWLER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(CRAWLER_DIR)
+
+from lib import text_cleaner
+from synthetic_aod import iter_entries
+
+RAW_FILE = os.path.join(CRAWLER_DIR, '..', 'data', 'bahamut_raw.json')
+
+EDGE_CASES = [
+    '', ' ', '第 2 期', '異世界かるてっと 第3期', '炎炎ノ消防隊 參之章', '鬼人幻燈抄 弐ノ章',
+    'Ｒｅ：ゼロから始める異世界生活', 'K-On!!', 'Sword Art Online – Progressive', '「ぼっち・ざ・ろっく！」',
+    'SPY×FAMILY 間諜家家酒 (電影版)', '進擊的巨人 The Final Season [無修]', '一拳超人(第三季) [24.5]',
+    "Let's Go", 'A　B\tC\nD', 'Ⅲ ①', '(OVA) prefix', 'Title (TV版)', 'Title [年齡限制版] [1]',
+]
+
+def legacy_normalize_for_match(text: str) -> str:
+    if not text:
+        return ""
+    normalized = unicodedata.normalize('NFKC', text)
+    normalized = normalized.lower()
+    normalized = re.sub(r'第\s*(\d+)\s*期', r' \1 ', normalized)
+    normalized = normalized.replace('參之章', ' 3 ')
+    normalized = normalized.replace('弐ノ章', ' 2 ')
+    normalized = re.sub(r'[:\-–—!?,.~/""''「」『』]', ' ', normalized)
+    normalized = re.sub(r'\s+', ' ', normalized).strip()
+    return normalized
+
+def legacy_clean_bahamut_title(title: str) -> str:
+    if not title:
+        return ""
+    cleaned = title
+    cleaned = re.sub(r'\s*\[[^\]]*\]', '', cleaned)
+    keywords = ['電影版', '劇場版', 'OVA', 'OAD', 'TV', '特別篇', '總集篇', '無修', '重製版']
+    pattern = r'\s*\((?:' + '|'.join(keywords) + r')[^)]*\)'
+    cleaned = re.sub(pattern, '', cleaned)
+    return cleaned.strip()
+
+def build_corpus(synthetic: int):
+    bahamut = list(EDGE_CASES)
+    if os.path.exists(RAW_FILE):
+        with open(RAW_FILE, 'r', encoding='utf-8') as f:
+            for anime in json.load(f):
+                bahamut += [anime.get(k) or '' for k in ('title', 'titleOriginal', 'titleEnglish')]
+    aod = list(EDGE_CASES)
+    for entry in iter_entries(synthetic):
+        aod.append(entry['title'])
+        aod.extend(entry['synonyms'])
+    return bahamut, aod
+
+def timed(fn, titles, rounds):
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(titles)
+        best = min(best, time.perf_counter() - start)
+    return len(titles) / best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--synthetic', type=int, default=20000, help='Synthetic AOD entries to add')
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    bahamut, aod = build_corpus(args.synthetic)
+
+    # 1. Byte-identical check
+    cleaned = [legacy_clean_bahamut_title(t) for t in bahamut]
+    mismatches = [t for t, c in zip(bahamut, cleaned) if text_cleaner.clean_bahamut_title(t) != c]
+    for t in bahamut + cleaned + aod:
+        if text_cleaner.normalize_for_match(t) != legacy_normalize_for_match(t):
+            mismatches.append(t)
+    if mismatches:
+        print(f"FAIL: {len(mismatches)} outputs differ, e.g. {mismatches[:5]!r}")
+        sys.exit(1)
+    print(f"OK: outputs byte-identical on {len(bahamut)} Bahamut + {len(aod)} AOD titles.\n")
+
+    # 2. Throughput
+    def uncached(fn):
+        def run(titles):
+            text_cleaner.clear_caches()
+            for t in titles:
+                fn(t)
+        return run
+
+    def per_call(fn):
+        def run(titles):
+            for t in titles:
+                fn(t)
+        return run
+
+    rows = [
+        ('normalize legacy', per_call(legacy_normalize_for_match), aod),
+        ('normalize cold cache', uncached(text_cleaner.normalize_for_match), aod),
+        ('normalize warm cache', per_call(text_cleaner.normalize_for_match), aod),
+        ('normalize_many warm', text_cleaner.normalize_many, aod),
+        ('clean legacy', per_call(legacy_clean_bahamut_title), bahamut),
+        ('clean cold cache', uncached(text_cleaner.clean_bahamut_title), bahamut),
+    ]
+    print(f"{'path':<24}{'titles/sec':>14}")
+    for name, fn, titles in rows:
+        print(f"{name:<24}{timed(fn, titles, args.rounds):>14,.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Benchmark: lib/validation.py on a large synthetic dataset.
+
+Repeats animes.json (with unique ids) up to --records records, corrupts a few
+fields so every rule has offending rows, and times validate_records.
+
+Usage:
+    python benchmarks/bench_validation.py [--input ../data/animes.json] [--records 100000] [--rounds 3]
+"""
+import argparse
+import json
+import os
+import sys
+
+CRAWLER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(CRAWLER_DIR)
+
+from benchmarks.bench_columnar import best_of, scaled
+from lib.validation import validate_records
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--input', default=os.path.join(CRAWLER_DIR, '..', 'data', 'animes.json'))
+    parser.add_argument('--records', type=int, default=100_000)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        animes = json.load(f)
+    animes = scaled(animes, -(-args.records // len(animes)))[:args.records]
+    for i in range(0, len(animes), 97):
+        animes[i] = dict(animes[i], title='', year='2020', ratings={'bahamut': {'score': 'n/a', 'votes': -1}})
+
+    seconds = best_of(lambda: validate_records(animes), args.rounds)
+    report = validate_records(animes)
+    failed = sum(check['failed'] for check in report['checks'])
+    print(f"{len(animes)} records validated in {seconds * 1000:.0f} ms "
+          f"({len(report['checks'])} checks, {failed} failures, passed={report['passed']})")
+
+if __name__ == '__main__':
+    main()
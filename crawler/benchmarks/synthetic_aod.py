@@ -0,0 +1,74 @@
+"""
+Synthetic anime-offline-database (AOD) release generator for benchmarks.
+
+Entries carry the full AOD field set (pictures, tags, relations...) so decode
+costs are realistic, even though the index only reads a handful of fields.
+"""
+import json
+import random
+from typing import Dict, Iterator
+
+TYPES = ['TV', 'MOVIE', 'OVA', 'ONA', 'SPECIAL', 'MUSIC', 'UNKNOWN']
+SEASONS = ['WINTER', 'SPRING', 'SUMMER', 'FALL', 'UNDEFINED']
+KANA = 'あいうえおかきくけこさしすせそたちつてとなにぬねのまみむめもやゆよらりるれろわをん'
+LATIN_WORDS = ['sword', 'magic', 'academy', 'girl', 'hero', 'dragon', 'love', 'online',
+               'quest', 'world', 'night', 'star', 'blue', 'spring', 'summer', 'ghost',
+               'demon', 'slayer', 'titan', 'attack', 'café', 'idol', 'princess', 'knight',
+               'school', 'diary', 'legend', 'saga', 'chronicle', 'moon', 'sun', 'river',
+               'garden', 'robot', 'space', 'battle', 'angel', 'devil', 'cat', 'fox',
+               'wolf', 'ninja', 'samurai', 'pirate', 'island', 'tower', 'dungeon', 'kingdom']
+TAGS = ['action', 'comedy', 'drama', 'fantasy', 'romance', 'school', 'sci-fi',
+        'slice of life', 'sports', 'supernatural', 'mecha', 'isekai', 'music']
+
+def _latin_title(rng: random.Random) -> str:
+    return ' '.join(rng.choice(LATIN_WORDS).capitalize() for _ in range(rng.randint(2, 5)))
+
+def _kana_title(rng: random.Random) -> str:
+    return ''.join(rng.choice(KANA) for _ in range(rng.randint(4, 12)))
+
+def make_entry(rng: random.Random, n: int, mal_ratio: float = 0.9) -> Dict:
+    """Build one AOD-shaped entry. `n` keeps ids unique across the release."""
+    base = _latin_title(rng)
+    sources = [
+        f"https://anidb.net/anime/{n + 1}",
+        f"https://anilist.co/anime/{n + 1}",
+        f"https://kitsu.app/anime/{n + 1}",
+    ]
+    if rng.random() < mal_ratio:
+        sources.append(f"https://myanimelist.net/anime/{n + 1}")
+    sources += [f"https://notify.moe/anime/x{n}{i}" for i in range(rng.randint(0, 3))]
+
+    synonyms = [_kana_title(rng), base.upper(), f"{base}: {_latin_title(rng)}"]
+    synonyms += [_latin_title(rng) for _ in range(rng.randint(0, 6))]
+
+    return {
+        'sources': sources,
+        'title': base,
+        'type': rng.choice(TYPES),
+        'episodes': rng.randint(1, 26),
+        'status': 'FINISHED',
+        'animeSeason': {'season': rng.choice(SEASONS), 'year': rng.randint(1970, 2025)},
+        'picture': f"https://cdn.myanimelist.net/images/anime/{n}/{n}.jpg",
+        'thumbnail': f"https://cdn.myanimelist.net/images/anime/{n}/{n}t.jpg",
+        'duration': {'value': 1440, 'unit': 'SECONDS'},
+        'score': {'arithmeticGeometricMean': 7.1, 'arithmeticMean': 7.1, 'median': 7.0},
+        'synonyms': synonyms,
+        'studios': [_latin_title(rng)],
+        'producers': [_latin_title(rng) for _ in range(rng.randint(1, 4))],
+        'relatedAnime': [f"https://myanimelist.net/anime/{rng.randint(1, n + 1)}"
+                         for _ in range(rng.randint(0, 5))],
+        'tags': rng.sample(TAGS, rng.randint(2, 8)),
+    }
+
+def iter_entries(count: int, seed: int = 42, mal_ratio: float = 0.9) -> Iterator[Dict]:
+    rng = random.Random(seed)
+    for n in range(count):
+        yield make_entry(rng, n, mal_ratio)
+
+def write_synthetic_aod(path: str, count: int, seed: int = 42) -> str:
+    """Write a synthetic AOD JSONL release (metadata line first, like upstream)."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'$schema': 'synthetic', 'license': {'name': 'ODbL-1.0'}}) + '\n')
+        for entry in iter_entries(count, seed):
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    return path
@@ -1,42 +1,91 @@
+import argparse
+import asyncio
 import json
 import logging
 import time
 import os
 import sys
+import threading
+from collections import Counter
 from typing import Dict, List, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add local directory to path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from mal_api import search_mal_by_japanese_title, get_mal_details
-from imdb_api import get_imdb_rating, search_imdb
-from douban_api import search_douban
+from mal_api import get_mal_details, harvest_season_scores, MalProvider
+from imdb_api import ImdbProvider
+from douban_api import get_client as get_douban_client, DoubanProvider
+from imdb_dataset import ImdbRatingsStore, STORE_FILE as IMDB_STORE_FILE
 from services.aod_service import AnimeOfflineDatabase
-from lib.text_cleaner import clean_bahamut_title
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("cross_platform.log"),
-        logging.StreamHandler()
-    ]
-)
+from services.franchise import RatingDonors, cluster_franchises, has_all_ratings, share_ratings
+from lib.text_cleaner import clean_bahamut_title, extract_bahamut_type
+from lib.query_variants import query_memo
+from lib.run_budget import Checkpoint, RunBudget, parse_duration, prioritize
+
 logger = logging.getLogger(__name__)
 
+def setup_logging():
+    """Console + cross_platform.log, for the command-line run only (importers keep their own setup)."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler("cross_platform.log"),
+            logging.StreamHandler()
+        ],
+        # Imported modules (mal_api) may already have configured the root logger
+        force=True,
+    )
+
 INPUT_FILE = '../data/bahamut_raw.json'
 OUTPUT_FILE = '../data/animes_enriched.json'
 AOD_FILE = '../data/anime-offline-database.jsonl'
+AOD_INDEX_FILE = '../data/aod_index.json'
 MANUAL_MAPPING_FILE = 'manual_mapping.json'
+# Where a --budget run stopped (lib/run_budget.Checkpoint)
+CHECKPOINT_FILE = '../data/enrich_checkpoint.json'
+# Share of a --budget the concurrent Douban prefetch may use
+PREFETCH_BUDGET_SHARE = 0.5
 
 # Global Services
 aod_service = None
 manual_mapping = {}
+# Set in --imdb-source dataset mode: ratings come from the local IMDb dataset store
+imdb_store: Optional[ImdbRatingsStore] = None
+# MAL id -> IMDb id learned from /anime/{id}/full during a bulk MAL refresh
+mal_imdb_links: Dict[int, str] = {}
+# Async provider interfaces (services/provider_base.py) used by enrich_anime_async,
+# created by load_services(). Their blocking calls share one thread pool per run
+PROVIDER_THREADS = 8
+provider_executor: Optional[ThreadPoolExecutor] = None
+mal_provider: Optional[MalProvider] = None
+imdb_provider: Optional[ImdbProvider] = None
+douban_provider: Optional[DoubanProvider] = None
+# enrich_anime's event loop, one per calling thread (pipeline.py may run several)
+_loops = threading.local()
+
+def start_providers():
+    """Create the provider thread pool and interfaces, unless this run already has them."""
+    global provider_executor, mal_provider, imdb_provider, douban_provider
+    if provider_executor is not None:
+        return
+    provider_executor = ThreadPoolExecutor(max_workers=PROVIDER_THREADS, thread_name_prefix='provider')
+    mal_provider = MalProvider(provider_executor)
+    imdb_provider = ImdbProvider(provider_executor)
+    douban_provider = DoubanProvider(executor=provider_executor)
+
+def close_providers():
+    """Shut the provider thread pool down at the end of a run."""
+    global provider_executor, mal_provider, imdb_provider, douban_provider
+    if provider_executor is not None:
+        provider_executor.shutdown(wait=True)
+    provider_executor = mal_provider = imdb_provider = douban_provider = None
 
 def load_services():
     global aod_service, manual_mapping
+
+    start_providers()
     
     # Load Manual Mapping
     if os.path.exists(MANUAL_MAPPING_FILE):
@@ -49,7 +98,9 @@ def load_services():
             manual_mapping = {}
 
     # Initialize AOD
-    aod_service = AnimeOfflineDatabase(AOD_FILE)
+    # The persisted index is reused across runs; new releases are applied as deltas
+    # Full rebuilds (no index yet) are spread over all cores
+    aod_service = AnimeOfflineDatabase(AOD_FILE, index_path=AOD_INDEX_FILE, workers=os.cpu_count() or 1)
     # Lazy load will happen on first lookup, or we can force it here
     # aod_service.load() 
 
@@ -61,9 +112,16 @@ def save_data(data: List[Dict], filepath: str):
     with open(filepath, 'w', encoding='utf-8') as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
-def enrich_anime(anime: Dict) -> Dict:
+async def enrich_anime_async(anime: Dict) -> Dict:
     """
     Enrich a single anime record with cross-platform ratings.
+
+    The three platforms form a small dependency graph, awaited concurrently:
+        MAL    : manual / existing / AOD / search -> details
+        IMDb   : manual / existing id -> rating        (independent)
+                 otherwise waits for MAL's external link, then search -> rating
+        Douban : search -> rating                      (independent)
+    Per-title latency is the longest chain instead of the sum.
     """
     anime_id = str(anime.get('id'))
     title_chinese = anime.get('title')
@@ -79,120 +137,229 @@ def enrich_anime(anime: Dict) -> Dict:
     clean_cn = clean_bahamut_title(title_chinese)
     clean_jp = clean_bahamut_title(title_original)
     clean_en = clean_bahamut_title(title_english)
+    # Release type from Bahamut's labels ([電影], [特別篇]...), AOD vocabulary
+    anime_type = extract_bahamut_type(title_chinese)
 
     # --- 1. MyAnimeList (MAL) ---
-    mal_id = None
-    mal_data = None
-    
-    # 1.1 Check Manual Mapping
-    if anime_id in manual_mapping and 'mal_id' in manual_mapping[anime_id]:
-        mal_id = manual_mapping[anime_id]['mal_id']
-        logger.info(f"[{clean_cn}] Found in Manual Mapping: MAL ID {mal_id}")
-    
-    # 1.2 Check Existing Data
-    elif 'myanimelist' in anime['ratings'] and anime['ratings']['myanimelist'].get('id'):
-        mal_id = anime['ratings']['myanimelist']['id']
-    
-    # 1.3 AOD Lookup (Local)
-    if not mal_id and clean_jp:
-        mal_id = aod_service.lookup(clean_jp, year)
-        if mal_id:
-             logger.info(f"[{clean_cn}] AOD Match (JP): {clean_jp} -> {mal_id}")
-    
-    if not mal_id and clean_en:
-        mal_id = aod_service.lookup(clean_en, year)
-        if mal_id:
-             logger.info(f"[{clean_cn}] AOD Match (EN): {clean_en} -> {mal_id}")
-
-    # 1.4 Legacy Fallback (API)
-    if not mal_id and clean_jp:
-        # Only fallback if AOD failed. This is the "5%" case.
-        logger.info(f"[{clean_cn}] AOD Failed. Fallback to API Search: {clean_jp}")
-        search_result = search_mal_by_japanese_title(clean_jp, year)
-        if search_result:
-            mal_id = search_result['mal_id']
-            mal_data = search_result # Contains score/members
-    
-    # Fetch MAL Details if we have ID but no Data (or if we need IMDb ID)
-    # We always fetch details if we have a fresh MAL ID to get the score and IMDb link
-    if mal_id:
-        # Check if we already have full data
-        current_mal = anime['ratings'].get('myanimelist', {})
-        if not current_mal.get('score') or not current_mal.get('id'):
-            # Fetch fresh details
-            details = get_mal_details(mal_id)
-            if details:
-                mal_data = details
-                anime['ratings']['myanimelist'] = {
-                    'score': details.get('mal_score'),
-                    'members': details.get('mal_members'),
-                    'id': mal_id
-                }
-            else:
-                logger.warning(f"[{clean_cn}] Failed to fetch details for MAL ID {mal_id}")
-        else:
-             # We have existing data, but we might check if we have the cached 'mal_data' from search
-             if not mal_data:
-                 # Re-construct mal_data for IMDb step if needed (though we can't get imdb_id from just existing rating dict easily unless stored)
-                 # If we are enriching, likely we want to update.
-                 # For now, let's assume if we have score, we are good, UNLESS we are missing IMDb.
-                 pass
-
-    # --- 2. IMDb ---
-    imdb_id = None
-    
-    # 2.1 Check Manual Mapping
-    if anime_id in manual_mapping and 'imdb_id' in manual_mapping[anime_id]:
-        imdb_id = manual_mapping[anime_id]['imdb_id']
+    async def resolve_mal():
+        """Returns (mal_id, fresh details or None)."""
+        mal_id = None
+        mal_data = None
         
-    # 2.2 Check Existing
-    elif 'imdb' in anime['ratings'] and anime['ratings']['imdb'].get('id'):
-        imdb_id = anime['ratings']['imdb']['id']
+        # 1.1 Check Manual Mapping
+        if anime_id in manual_mapping and 'mal_id' in manual_mapping[anime_id]:
+            mal_id = manual_mapping[anime_id]['mal_id']
+            logger.info(f"[{clean_cn}] Found in Manual Mapping: MAL ID {mal_id}")
         
-    # 2.3 Extract from MAL Data
-    elif mal_data and mal_data.get('imdb_id'):
-        imdb_id = mal_data.get('imdb_id')
+        # 1.2 Check Existing Data
+        elif 'myanimelist' in anime['ratings'] and anime['ratings']['myanimelist'].get('id'):
+            mal_id = anime['ratings']['myanimelist']['id']
         
-    # 2.4 Search IMDb (Last Resort)
-    if not imdb_id:
-        # Try searching with English title first (better for IMDb)
-        query = clean_en if clean_en else clean_jp
-        # Or even Chinese? IMDb search supports Chinese sometimes but English is safer.
-        # Fallback to Jikan search result title if available?
+        # 1.3 AOD Lookup (Local)
+        if not mal_id and clean_jp:
+            mal_id = aod_service.lookup(clean_jp, year, anime_type)
+            if mal_id:
+                 logger.info(f"[{clean_cn}] AOD Match (JP): {clean_jp} -> {mal_id}")
+        
+        if not mal_id and clean_en:
+            mal_id = aod_service.lookup(clean_en, year, anime_type)
+            if mal_id:
+                 logger.info(f"[{clean_cn}] AOD Match (EN): {clean_en} -> {mal_id}")
+
+        # 1.4 Legacy Fallback (API)
+        if not mal_id and clean_jp:
+            # Only fallback if AOD failed. This is the "5%" case.
+            logger.info(f"[{clean_cn}] AOD Failed. Fallback to API Search: {clean_jp}")
+            mal_id = await mal_provider.search(clean_jp, year, anime_type, [clean_en])
+        
+        # Fetch MAL Details if we have ID but no score yet
+        # Details carry the score and the IMDb link (search results have neither link)
+        if mal_id:
+            current_mal = anime['ratings'].get('myanimelist', {})
+            if not current_mal.get('score') or not current_mal.get('id'):
+                mal_data = await mal_provider.details(mal_id)
+                if mal_data:
+                    anime['ratings']['myanimelist'] = mal_provider.as_rating(mal_data, mal_id)
+                else:
+                    logger.warning(f"[{clean_cn}] Failed to fetch details for MAL ID {mal_id}")
+        return mal_id, mal_data
+
+    mal_task = asyncio.ensure_future(resolve_mal())
+
+    # --- 2. IMDb ---
+    async def resolve_imdb():
+        imdb_id = None
         
-        if query:
-             logger.info(f"[{clean_cn}] Searching IMDb fallback: {query}")
-             imdb_id = search_imdb(query)
-
-    # Fetch IMDb Rating
-    if imdb_id:
-        # Only fetch if we don't have score or if we just found the ID
-        if 'imdb' not in anime['ratings'] or not anime['ratings']['imdb'].get('score'):
-            logger.info(f"[{clean_cn}] Fetching IMDb Rating: {imdb_id}")
-            imdb_data = get_imdb_rating(imdb_id)
-            if imdb_data:
-                anime['ratings']['imdb'] = {
-                    'score': imdb_data.get('imdb_score'),
-                    'votes': imdb_data.get('imdb_votes'),
-                    'id': imdb_id
-                }
+        # 2.1 Check Manual Mapping
+        if anime_id in manual_mapping and 'imdb_id' in manual_mapping[anime_id]:
+            imdb_id = manual_mapping[anime_id]['imdb_id']
+            
+        # 2.2 Check Existing
+        elif 'imdb' in anime['ratings'] and anime['ratings']['imdb'].get('id'):
+            imdb_id = anime['ratings']['imdb']['id']
+            
+        # 2.3 Extract from MAL Data (the only branch that waits for MAL)
+        if not imdb_id:
+            mal_id, mal_data = await mal_task
+            if mal_data and mal_data.get('imdb_id'):
+                imdb_id = mal_data.get('imdb_id')
+            elif mal_id in mal_imdb_links:
+                imdb_id = mal_imdb_links[mal_id]
+            
+        # 2.4 Search IMDb (Last Resort)
+        if not imdb_id:
+            # Try searching with English title first (better for IMDb)
+            query = clean_en if clean_en else clean_jp
+            if query:
+                 logger.info(f"[{clean_cn}] Searching IMDb fallback: {query}")
+                 imdb_id = await imdb_provider.search(query, year, anime_type, [clean_jp])
+
+        # Fetch IMDb Rating
+        if imdb_id:
+            # Only fetch if we don't have score or if we just found the ID
+            if 'imdb' not in anime['ratings'] or not anime['ratings']['imdb'].get('score'):
+                imdb_data = imdb_store.get(imdb_id) if imdb_store else None
+                if not imdb_data:
+                    logger.info(f"[{clean_cn}] Fetching IMDb Rating: {imdb_id}")
+                    imdb_data = await imdb_provider.details(imdb_id)
+                if imdb_data:
+                    anime['ratings']['imdb'] = imdb_provider.as_rating(imdb_data, imdb_id)
     
     # --- 3. Douban ---
-    # Use Cleaned Chinese Title
-    if 'douban' not in anime['ratings'] and clean_cn:
-        logger.info(f"[{clean_cn}] Searching Douban...")
-        douban_data = search_douban(clean_cn, year)
-        if douban_data:
+    async def resolve_douban():
+        # Use Cleaned Chinese Title
+        if 'douban' not in anime['ratings'] and clean_cn:
+            logger.info(f"[{clean_cn}] Searching Douban...")
+            douban_id = await douban_provider.search(clean_cn, year, anime_type, [clean_jp])
+            if douban_id:
+                douban_rating = await douban_provider.rating(douban_id)
+                if douban_rating:
+                    anime['ratings']['douban'] = douban_rating
+
+    await asyncio.gather(mal_task, resolve_imdb(), resolve_douban())
+    return anime
+
+def enrich_anime(anime: Dict) -> Dict:
+    """
+    Synchronous entry point for enrich_anime_async. The calling thread's event
+    loop is created once and reused for every title.
+    """
+    loop = getattr(_loops, 'loop', None)
+    if loop is None:
+        loop = _loops.loop = asyncio.new_event_loop()
+    return loop.run_until_complete(enrich_anime_async(anime))
+
+def refresh_mal_scores(animes: List[Dict]) -> int:
+    """
+    Refresh MAL score/members for every record that already has a MAL id.
+
+    Scores come from Jikan season pages (25 titles per call) for the years
+    we track. /anime/{id}/full is only called for ids the season pages did
+    not contain, or when the record still needs its IMDb link.
+    Returns the number of records updated.
+    """
+    tracked: Dict[int, List[Dict]] = {}
+    for anime in animes:
+        mal_id = anime.get('ratings', {}).get('myanimelist', {}).get('id')
+        if mal_id:
+            tracked.setdefault(int(mal_id), []).append(anime)
+    if not tracked:
+        return 0
+
+    # Busiest years first: most ids are found before the long tail is paged
+    year_counts = Counter(r.get('year') for records in tracked.values() for r in records if r.get('year'))
+    years = [year for year, _ in year_counts.most_common()]
+    harvested = harvest_season_scores(set(tracked), years)
+
+    full_calls = 0
+    updated = 0
+    for mal_id, records in tracked.items():
+        data = harvested.get(mal_id)
+        needs_imdb = mal_id not in mal_imdb_links and any(
+            'imdb' not in r.get('ratings', {}) and str(r['id']) not in manual_mapping for r in records
+        )
+        if data is None or needs_imdb:
+            details = get_mal_details(mal_id)
+            full_calls += 1
+            if details:
+                data = details
+                if details.get('imdb_id'):
+                    mal_imdb_links[mal_id] = details['imdb_id']
+        if not data:
+            continue
+        for anime in records:
+            anime['ratings']['myanimelist'] = {
+                'score': data.get('mal_score'),
+                'members': data.get('mal_members'),
+                'id': mal_id
+            }
+            updated += 1
+
+    logger.info(f"Bulk MAL refresh: {updated} records updated, {len(harvested)} ids from season pages, "
+                f"{full_calls} /full fallbacks.")
+    return updated
+
+def refresh_imdb_scores(animes: List[Dict], store: ImdbRatingsStore) -> int:
+    """Update every record with an IMDb id from the local dataset store (no HTTP)."""
+    updated = 0
+    for anime in animes:
+        imdb = anime.get('ratings', {}).get('imdb')
+        if not imdb or not imdb.get('id'):
+            continue
+        data = store.get(imdb['id'])
+        if data:
+            imdb['score'] = data['imdb_score']
+            imdb['votes'] = data['imdb_votes']
+            updated += 1
+    logger.info(f"IMDb dataset refresh: {updated} records updated.")
+    return updated
+
+def prefetch_douban_ratings(animes: List[Dict], should_stop=None) -> int:
+    """
+    Look up Douban for every record without a Douban rating, concurrently
+    within the Douban rate budget (see DoubanClient). Records that fail here
+    are retried by the sequential loop; suggestion results are cached, so
+    titles without a match are not requested twice. Lookups are started in
+    list order until `should_stop()` (optional) returns True.
+    Returns the number of records updated.
+    """
+    pending = {}
+    for anime in animes:
+        clean_cn = clean_bahamut_title(anime.get('title'))
+        clean_jp = clean_bahamut_title(anime.get('titleOriginal'))
+        if clean_cn and 'douban' not in anime.setdefault('ratings', {}):
+            query = (clean_cn, anime.get('year'), (clean_jp,) if clean_jp else ())
+            pending.setdefault(query, []).append(anime)
+    if not pending:
+        return 0
+
+    logger.info(f"Searching Douban for {len(pending)} titles...")
+    results = get_douban_client().search_many(list(pending), should_stop)
+    updated = 0
+    for query, douban_data in results.items():
+        if not douban_data:
+            continue
+        for anime in pending[query]:
             anime['ratings']['douban'] = {
                 'score': douban_data.get('douban_score'),
                 'votes': douban_data.get('douban_votes'),
                 'id': douban_data.get('douban_id')
             }
-        
-    return anime
+            updated += 1
+    logger.info(f"Douban prefetch: {updated} records updated.")
+    return updated
 
-def main():
+def main(mal_bulk: bool = False, imdb_source: str = 'web', budget: Optional[float] = None):
+    """
+    Enrich every Bahamut record that is missing a rating.
+
+    With a `budget` (seconds) records are handled most popular first (Bahamut
+    views, votes, year) and the run stops when the time is up. Everything done
+    is saved, and CHECKPOINT_FILE lists the records the next run continues with.
+    """
+    global imdb_store
     logger.info("Starting Cross-Platform Enrichment...")
+    run_budget = RunBudget(budget)
     
     if not os.path.exists(INPUT_FILE):
         logger.error(f"Input file not found: {INPUT_FILE}")
@@ -217,11 +384,56 @@ def main():
         except:
             logger.warning("Could not load existing file, starting fresh.")
     
+    if imdb_source == 'dataset':
+        if os.path.exists(IMDB_STORE_FILE):
+            imdb_store = ImdbRatingsStore(IMDB_STORE_FILE)
+            logger.info(f"Using IMDb dataset store with {len(imdb_store)} ratings.")
+        else:
+            logger.warning(f"IMDb store not found at {IMDB_STORE_FILE} (run imdb_dataset.py). Using web pages.")
+
+    records = []
+    for anime in animes:
+        anime_id = str(anime['id'])
+        enriched_map.setdefault(anime_id, anime.copy())
+        records.append(enriched_map[anime_id])
+    if mal_bulk:
+        refresh_mal_scores(records)
+    if imdb_store:
+        refresh_imdb_scores(records, imdb_store)
+
+    checkpoint = None
+    queue = records
+    if budget is not None:
+        checkpoint = Checkpoint(CHECKPOINT_FILE, 'enrich')
+        done = checkpoint.load()
+        if done:
+            logger.info(f"Continuing the last pass: {len(done)} animes already handled.")
+        queue = [anime for anime in prioritize(records) if str(anime['id']) not in done]
+
+    # Douban is the slowest provider (2 s spacing); overlap its requests up front
+    prefetch_budget = RunBudget(run_budget.remaining() * PREFETCH_BUDGET_SHARE) if budget is not None else None
+    prefetch_douban_ratings(queue, should_stop=prefetch_budget.exhausted if prefetch_budget else None)
+
+    # Seasons, [無修] copies, 劇場版... of one work share a franchise id
+    clusters = cluster_franchises(records, aod_service)
+    for anime in records:
+        anime['franchiseId'] = clusters[str(anime['id'])]
+    logger.info(f"Grouped {len(records)} animes into {len(set(clusters.values()))} franchises.")
+    save_data(list(enriched_map.values()), OUTPUT_FILE)
+
+    # Copies of one installment (installment_keys) are looked up once; manual
+    # mappings are per record, so those records neither give nor take ratings
+    donors = RatingDonors(aod_service)
+    for anime in records:
+        if has_all_ratings(anime) and str(anime['id']) not in manual_mapping:
+            donors.add(anime)
+    shared = 0
+
     count = 0
-    enriched_animes = []
-    total = len(animes)
+    total = len(queue)
+    stopped_at = None
     
-    for i, anime in enumerate(animes):
+    for i, anime in enumerate(queue):
         anime_id = str(anime['id'])
         
         # Use existing record if available as base, but we might want to Re-Enrich 
@@ -244,11 +456,32 @@ def main():
         # But for testing/updating AOD logic, we might want to force MAL check even if present?
         # Let's stick to standard flow: Enrich if missing.
         
-        if not (has_mal and has_imdb and has_douban):
+        # A record counts as handled (checkpoint.mark) only once it is complete,
+        # shared or enriched; one whose lookup raised is retried in this pass
+        if has_mal and has_imdb and has_douban:
+            if checkpoint:
+                checkpoint.mark(anime_id)
+        else:
+            keys = donors.keys(current_record) if anime_id not in manual_mapping else None
+            donor = donors.find(keys) if keys is not None else None
+            if donor is not None:
+                share_ratings(donor, current_record)
+                shared += 1
+                if checkpoint:
+                    checkpoint.mark(anime_id)
+                continue
+            if run_budget.exhausted():
+                stopped_at = i
+                logger.info(f"Time budget reached: {count} animes updated, {total - i} left for the next run.")
+                break
+            run_budget.start_item()
             try:
                 updated_anime = enrich_anime(current_record)
-                enriched_animes.append(updated_anime)
                 enriched_map[anime_id] = updated_anime
+                if keys is not None:
+                    donors.add(updated_anime, keys)
+                if checkpoint:
+                    checkpoint.mark(anime_id)
                 
                 count += 1
                 if count % 10 == 0:
@@ -257,12 +490,33 @@ def main():
                 
             except Exception as e:
                 logger.error(f"Error processing {anime_id}: {e}")
-                enriched_animes.append(current_record)
-        else:
-            enriched_animes.append(current_record)
-            
-    save_data(enriched_animes, OUTPUT_FILE)
+            run_budget.finish_item()
+
+    save_data([enriched_map[str(anime['id'])] for anime in animes], OUTPUT_FILE)
+    if checkpoint:
+        # Records whose lookup raised stay pending with the ones not reached,
+        # so the next run retries them before starting a new pass
+        pending = [str(anime['id']) for anime in queue if str(anime['id']) not in checkpoint.processed]
+        if pending and stopped_at is None and len(checkpoint.processed) == len(done):
+            # A whole run without progress: these keep failing, leave them to the next pass
+            logger.warning(f"{len(pending)} animes failed again; closing the pass without them.")
+            pending = []
+        checkpoint.save(pending)
+        logger.info(f"Checkpoint: {len(pending)} animes left in this pass ({CHECKPOINT_FILE})")
+    logger.info(f"Shared ratings with {shared} copies of an installment instead of looking them up.")
+    logger.info(f"Search memo (provider: hits/misses): "
+                + ', '.join(f"{p}: {s['hits']}/{s['misses']}" for p, s in query_memo.stats().items()))
+    close_providers()
     logger.info("Enrichment Complete!")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Enrich Bahamut data with MAL, IMDb and Douban ratings.")
+    parser.add_argument('--mal-bulk', action='store_true',
+                        help="Refresh MAL scores from Jikan season pages before enriching")
+    parser.add_argument('--imdb-source', choices=['web', 'dataset'], default='web',
+                        help="'dataset' reads IMDb ratings from the store built by imdb_dataset.py")
+    parser.add_argument('--budget', type=parse_duration,
+                        help="Time box, e.g. 30m: most popular first, stop and checkpoint when time is up")
+    args = parser.parse_args()
+    setup_logging()
+    main(mal_bulk=args.mal_bulk, imdb_source=args.imdb_source, budget=args.budget)
@@ -1,123 +1,239 @@
+import os
+import sys
 import requests
 import logging
+import threading
 import time
-import json
-from typing import Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from lib.html_extract import extract_property
+from lib.text_cleaner import normalize_for_match
+from lib.candidate_scoring import score_candidates
+from lib.query_variants import first_confident, query_variants
+from services.provider_base import AnimeProvider
 
 logger = logging.getLogger(__name__)
 
-LAST_REQUEST_TIME = 0
-RATE_LIMIT_DELAY = 2.0 # Douban is strict
+DOUBAN_BASE_URL = os.environ.get('DOUBAN_BASE_URL', 'https://movie.douban.com')
+RATE_LIMIT_DELAY = 2.0 # Douban is strict: minimum spacing between request starts
+MAX_IN_FLIGHT = 2 # A slow response should not hold up the next slot
+
+# Bahamut titles are Traditional Chinese, Douban's Simplified: title similarity
+# runs lower than on other providers, so the year carries more weight here
+DOUBAN_WEIGHTS = {'title': 0.5, 'year': 0.5}
+MIN_CONFIDENCE = 0.4
+# ...but a year match alone is no match: 間諜家家酒 / 间谍过家家 still scores 0.4
+MIN_TITLE_SIMILARITY = 0.3
 
-def _rate_limit():
-    global LAST_REQUEST_TIME
-    current_time = time.time()
-    elapsed = current_time - LAST_REQUEST_TIME
-    if elapsed < RATE_LIMIT_DELAY:
-        time.sleep(RATE_LIMIT_DELAY - elapsed)
-    LAST_REQUEST_TIME = time.time()
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Referer": "https://movie.douban.com/"
+}
 
-def search_douban(title: str, year: int = None) -> Optional[Dict[str, Any]]:
+class DoubanClient:
     """
-    Search Douban using the internal suggestion API which is lighter and less likely to block 
-    than scraping the search result HTML.
-    
-    API: https://movie.douban.com/j/subject_suggest?q={query}
+    Douban provider: subject_suggest search + subject page rating.
+
+    - One requests.Session (connection reuse) for every call.
+    - Request starts are spaced by rate_limit_delay across all threads, and at
+      most max_in_flight requests are open at once, so concurrency overlaps
+      network latency without exceeding the rate budget.
+    - Suggestion results are cached per normalize_for_match(title), subject
+      ratings per Douban id; re-runs and title variants cost no extra requests.
     """
-    if not title:
-        return None
-        
-    _rate_limit()
-    
-    # We clean the title a bit (remove season numbers if possible, or just try as is)
-    # Bahamut title: "鬼滅之刃 柱訓練篇 [1]" -> "鬼滅之刃 柱訓練篇"
-    clean_title = title.split('[')[0].strip()
-    
-    url = "https://movie.douban.com/j/subject_suggest"
-    params = {"q": clean_title}
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Referer": "https://movie.douban.com/"
-    }
-    
-    try:
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+
+    def __init__(self, base_url: str = None, rate_limit_delay: float = None,
+                 max_in_flight: int = MAX_IN_FLIGHT, session: requests.Session = None):
+        self.base_url = (base_url or DOUBAN_BASE_URL).rstrip('/')
+        self.rate_limit_delay = RATE_LIMIT_DELAY if rate_limit_delay is None else rate_limit_delay
+        self.max_in_flight = max(1, max_in_flight)
+        self.session = session or requests.Session()
+        self.session.headers.update(HEADERS)
+
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._rate_lock = threading.Lock()
+        self._next_start = 0.0
+        self._cache_lock = threading.Lock()
+        self._suggest_cache: Dict[str, List[Dict]] = {}
+        self._details_cache: Dict[str, Optional[Dict[str, Any]]] = {}
+
+    def _wait_for_slot(self):
+        # Reserve the next start time under the lock, sleep outside it
+        with self._rate_lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.rate_limit_delay
+        if start > now:
+            time.sleep(start - now)
+
+    def _get(self, path: str, params: Dict = None) -> requests.Response:
+        with self._slots:
+            self._wait_for_slot()
+            return self.session.get(f"{self.base_url}{path}", params=params, timeout=10)
+
+    def suggest(self, title: str) -> List[Dict]:
+        """
+        Raw subject_suggest results for a title (cached per normalized title).
+        Results are dicts: {'id', 'title', 'sub_title', 'year', 'img', ...}
+        Failed requests are not cached so they are retried on the next call.
+        """
+        key = normalize_for_match(title)
+        with self._cache_lock:
+            if key in self._suggest_cache:
+                return self._suggest_cache[key]
+
+        response = self._get('/j/subject_suggest', {"q": title})
         if response.status_code != 200:
             logger.debug(f"Douban API failed: {response.status_code}")
+            return []
+        results = response.json() or []
+
+        with self._cache_lock:
+            self._suggest_cache[key] = results
+        return results
+
+    @staticmethod
+    def rank(results: List[Dict], queries: List[str], year: int = None) -> List[Dict]:
+        """
+        Score suggestions against the title variants (see lib.candidate_scoring).
+        Suggestions carry no usable type (everything is 'movie'), so only the
+        title and year features apply.
+        """
+        candidates = [
+            {'titles': [item.get('title'), item.get('sub_title')], 'year': item.get('year') or None, 'item': item}
+            for item in results
+        ]
+        return score_candidates(queries, candidates, year, weights=DOUBAN_WEIGHTS, min_title=MIN_TITLE_SIMILARITY)
+
+    def details(self, douban_id: str) -> Optional[Dict[str, Any]]:
+        """Rating for a Douban subject id, read from the page's v:average / v:votes tags."""
+        douban_id = str(douban_id)
+        with self._cache_lock:
+            if douban_id in self._details_cache:
+                return self._details_cache[douban_id]
+
+        response = self._get(f"/subject/{douban_id}/")
+        if response.status_code == 404:
+            result = None
+        elif response.status_code != 200:
+            logger.debug(f"Douban subject {douban_id} failed: {response.status_code}")
+            return None
+        else:
+            # <strong class="ll rating_num" property="v:average">9.1</strong>
+            score = extract_property(response.text, 'v:average')
+            votes = extract_property(response.text, 'v:votes')
+            result = {
+                'douban_id': douban_id,
+                'douban_score': float(score),
+                'douban_votes': int(votes) if votes else 0
+            } if score else None
+
+        with self._cache_lock:
+            self._details_cache[douban_id] = result
+        return result
+
+    def find(self, title: str, year: int = None, alt_titles: List[str] = None) -> Optional[str]:
+        """
+        Douban id of the best suggestion: suggest -> rank. alt_titles (e.g. the
+        Japanese title) are scored as extra variants, since Douban's sub_title
+        is often the original title.
+        """
+        # Bahamut title: "鬼滅之刃 第二季 [1]" -> "鬼滅之刃 第二季", then "鬼滅之刃" if that misses
+        variants = query_variants(title)
+        queries = variants[:1] + list(alt_titles or ())
+        best_match = first_confident(variants, self.suggest, lambda results: self.rank(results, queries, year), MIN_CONFIDENCE)
+        return best_match['item']['id'] if best_match else None
+
+    def search(self, title: str, year: int = None, alt_titles: List[str] = None) -> Optional[Dict[str, Any]]:
+        """find() + subject rating. Errors are logged and give None."""
+        if not title:
             return None
-            
-        results = response.json()
-        
-        if not results:
+        try:
+            douban_id = self.find(title, year, alt_titles)
+            return self.details(douban_id) if douban_id else None
+        except Exception as e:
+            logger.error(f"Error searching Douban for '{title}': {e}")
             return None
-            
-        # Results are a list of dicts: {'id': '...', 'title': '...', 'sub_title': '...', 'year': '...', 'img': '...'}
-        # Find best match
-        best_match = None
-        
-        for item in results:
-            # Check year if available
-            item_year = item.get('year')
-            if year and item_year:
-                # Douban year might be string "2024"
-                try:
-                    if abs(int(item_year) - year) <= 1:
-                        best_match = item
-                        break
-                except:
-                    pass
-            else:
-                # If no year check, take the first one that looks like an exact match or just the first one
-                best_match = item
-                break
-                
-        if not best_match and results:
-            best_match = results[0] # Fallback to first result
-            
-        if best_match:
-            return _get_douban_details(best_match['id'])
-            
-        return None
 
-    except Exception as e:
-        logger.error(f"Error searching Douban for '{title}': {e}")
-        return None
+    def search_many(self, queries: List[Tuple], should_stop: Callable[[], bool] = None) -> Dict[Tuple, Optional[Dict[str, Any]]]:
+        """
+        Run search() for many (title, year[, alt_titles tuple]) queries with
+        max_in_flight workers. Duplicates are searched once. Returns {query: result};
+        queries not started before `should_stop()` returned True are left out.
+        """
+        skipped = object()
+
+        def run(query: Tuple):
+            if should_stop and should_stop():
+                return skipped
+            return self.search(*query)
+
+        unique = list(dict.fromkeys(queries))
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            results = pool.map(run, unique)
+            return {query: result for query, result in zip(unique, results) if result is not skipped}
+
+_default_client: Optional[DoubanClient] = None
+_default_lock = threading.Lock()
+
+def get_client() -> DoubanClient:
+    """Process-wide client shared by search_douban callers."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = DoubanClient()
+        return _default_client
+
+def search_douban(title: str, year: int = None, alt_titles: List[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Search Douban using the internal suggestion API which is lighter and less likely to block
+    than scraping the search result HTML.
+
+    API: https://movie.douban.com/j/subject_suggest?q={query}
+    """
+    return get_client().search(title, year, alt_titles)
 
 def _get_douban_details(douban_id: str) -> Optional[Dict[str, Any]]:
     """
     Fetch details for a specific Douban ID to get the rating.
     """
-    _rate_limit()
-    url = f"https://movie.douban.com/subject/{douban_id}/"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-    }
-    
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code == 404:
-            return None
-            
-        # Parse HTML for rating
-        # <strong class="ll rating_num" property="v:average">9.1</strong>
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        rating_tag = soup.find('strong', property="v:average")
-        votes_tag = soup.find('span', property="v:votes")
-        
-        if rating_tag and rating_tag.text.strip():
-            score = float(rating_tag.text.strip())
-            votes = int(votes_tag.text.strip()) if votes_tag else 0
-            
-            return {
-                'douban_id': douban_id,
-                'douban_score': score,
-                'douban_votes': votes
-            }
-            
-        return None
-        
+        return get_client().details(douban_id)
     except Exception as e:
         logger.error(f"Error details Douban {douban_id}: {e}")
         return None
+
+class DoubanProvider(AnimeProvider):
+    """Douban through a DoubanClient (shared session, rate budget and caches)."""
+    name = 'douban'
+
+    def __init__(self, client: DoubanClient = None, executor=None):
+        super().__init__(executor)
+        self.client = client or get_client()
+
+    async def search(self, query, year=None, anime_type=None, alt_titles=None):
+        if not query:
+            return None
+        try:
+            return await self._call(self.client.find, query, year, alt_titles)
+        except Exception as e:
+            logger.error(f"Error searching Douban for '{query}': {e}")
+            return None
+
+    async def details(self, douban_id):
+        try:
+            return await self._call(self.client.details, douban_id)
+        except Exception as e:
+            logger.error(f"Error details Douban {douban_id}: {e}")
+            return None
+
+    async def rating(self, douban_id):
+        return self.as_rating(await self.details(douban_id))
+
+    @staticmethod
+    def as_rating(data: Optional[Dict]) -> Optional[Dict[str, Any]]:
+        if not data:
+            return None
+        return {'score': data.get('douban_score'), 'votes': data.get('douban_votes'), 'id': data.get('douban_id')}
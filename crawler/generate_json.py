@@ -1,7 +1,15 @@
 import json
 import os
+import sys
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from lib.data_bundle import write_bundle
+from lib.arrow_export import write_catalog
+from lib.columnar import write_columnar
+from lib.json_stream import JsonArrayWriter, iter_records
+from lib.validation import StreamValidator, summary_lines, validate_records
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -9,6 +17,14 @@ logger = logging.getLogger(__name__)
 
 INPUT_FILE = '../data/animes_enriched.json'
 OUTPUT_FILE = '../data/animes.json'
+# Sharded summary / detail pages / sort orders for the dashboard (lib/data_bundle.py)
+BUNDLE_DIR = '../data/bundle'
+# Optional columnar, dictionary-encoded copy with .gz/.br siblings (lib/columnar.py)
+COLUMNAR_FILE = '../data/animes.columnar.json'
+# Optional typed, flattened table for analytics (lib/arrow_export.py, needs pyarrow)
+PARQUET_FILE = '../data/animes.parquet'
+# Machine-readable validation report of the generated dataset (lib/validation.py)
+VALIDATION_REPORT_FILE = '../data/validation_report.json'
 MANUAL_MAPPING_FILE = 'manual_mapping.json'
 
 def load_json(filepath: str) -> List[Dict]:
@@ -22,9 +38,20 @@ def save_json(data: List[Dict], filepath: str):
     with open(filepath, 'w', encoding='utf-8') as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
-def apply_manual_mappings(animes: List[Dict], mappings: Dict) -> List[Dict]:
+def save_json_if_changed(data: List[Dict], filepath: str) -> bool:
+    """save_json, skipped when the file already holds the same text (keeps its mtime and caches valid)."""
+    text = json.dumps(data, ensure_ascii=False, indent=2)
+    if os.path.exists(filepath):
+        with open(filepath, 'r', encoding='utf-8') as f:
+            if f.read() == text:
+                return False
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return True
+
+def apply_manual_mapping(anime: Dict, mapping: Dict) -> Dict:
     """
-    Override/Inject ratings based on manual mapping file.
+    Override/Inject ratings of one record from its manual mapping entry.
     Mapping format:
     {
         "bahamut_id": {
@@ -35,85 +62,133 @@ def apply_manual_mappings(animes: List[Dict], mappings: Dict) -> List[Dict]:
         }
     }
     """
+    logger.info(f"Applying manual mapping for {anime['title']} ({anime['id']})")
+
+    # Update ratings
+    if 'ratings' not in anime:
+        anime['ratings'] = {}
+
+    # IMDb Override
+    if 'imdb_id' in mapping:
+        anime['ratings']['imdb'] = {
+            'id': mapping['imdb_id'],
+            'score': mapping.get('imdb_score', 0),
+            'votes': mapping.get('imdb_votes', 0)
+        }
+
+    # MAL Override
+    if 'mal_id' in mapping:
+        anime['ratings']['myanimelist'] = {
+            'id': mapping['mal_id'],
+            'score': mapping.get('mal_score', 0),
+            'members': mapping.get('mal_members', 0)
+        }
+
+    # Douban Override
+    if 'douban_id' in mapping:
+        anime['ratings']['douban'] = {
+            'id': mapping['douban_id'],
+            'score': mapping.get('douban_score', 0),
+            'votes': mapping.get('douban_votes', 0)
+        }
+    return anime
+
+def apply_manual_mappings(animes: List[Dict], mappings: Dict) -> List[Dict]:
+    """Override/Inject ratings based on manual mapping file (see apply_manual_mapping)."""
     count = 0
     for anime in animes:
-        anime_id = str(anime['id'])
-        if anime_id in mappings:
-            mapping = mappings[anime_id]
-            logger.info(f"Applying manual mapping for {anime['title']} ({anime_id})")
-            
-            # Update ratings
-            if 'ratings' not in anime:
-                anime['ratings'] = {}
-                
-            # IMDb Override
-            if 'imdb_id' in mapping:
-                anime['ratings']['imdb'] = {
-                    'id': mapping['imdb_id'],
-                    'score': mapping.get('imdb_score', 0),
-                    'votes': mapping.get('imdb_votes', 0)
-                }
-            
-            # MAL Override
-            if 'mal_id' in mapping:
-                anime['ratings']['myanimelist'] = {
-                    'id': mapping['mal_id'],
-                    'score': mapping.get('mal_score', 0),
-                    'members': mapping.get('mal_members', 0)
-                }
-
-            # Douban Override
-            if 'douban_id' in mapping:
-                anime['ratings']['douban'] = {
-                    'id': mapping['douban_id'],
-                    'score': mapping.get('douban_score', 0),
-                    'votes': mapping.get('douban_votes', 0)
-                }
-                
+        mapping = mappings.get(str(anime['id']))
+        if mapping is not None:
+            apply_manual_mapping(anime, mapping)
             count += 1
-            
+
     logger.info(f"Applied manual mappings to {count} animes.")
     return animes
 
+def clean_record(anime: Dict) -> Optional[Dict]:
+    """The record ready for the frontend, or None when it is unusable."""
+    # Ensure required fields
+    if not anime.get('title'):
+        return None
+
+    # Ratings keep their native scales (Bahamut 1-5, others 0-10); the bundle's
+    # score columns (lib/facets.py) carry the 0-10 and vote-weighted versions.
+
+    # Ensure year is int
+    try:
+        anime['year'] = int(anime['year'])
+    except (KeyError, TypeError, ValueError):
+        anime['year'] = 0
+    return anime
+
 def validate_and_clean(animes: List[Dict]) -> List[Dict]:
     """
     Final validation and cleaning before frontend usage.
     """
-    cleaned = []
-    for anime in animes:
-        # Ensure required fields
-        if not anime.get('title'):
-            continue
-            
-        # Normalize ratings (Frontend expects 0-10 for others, Bahamut is 1-5 but we keep it 1-5 here)
-        # The frontend utils.ts handles normalization.
-        # We just ensure structure exists.
-        
-        # Ensure year is int
-        try:
-            anime['year'] = int(anime['year'])
-        except:
-            anime['year'] = 0
-            
-        cleaned.append(anime)
-        
-    return cleaned
+    return [anime for anime in animes if clean_record(anime) is not None]
+
+def load_manual_mappings(path: Optional[str] = None) -> Dict:
+    path = path or MANUAL_MAPPING_FILE
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"Failed to load manual mappings: {e}")
+        return {}
+
+def generate_streaming(input_file: str, output_file: str, mappings: Dict,
+                       validator: Optional[StreamValidator] = None) -> Dict[str, int]:
+    """
+    Read, map, clean and write one record at a time (memory stays at one
+    record plus a file chunk, and the validator's counters). The input may be
+    a JSON array or NDJSON; the output is the same indented array save_json
+    writes.
+    """
+    stats = {'read': 0, 'written': 0, 'mapped': 0, 'dropped': 0, 'changed': 0}
+    with JsonArrayWriter(output_file) as out:
+        for anime in iter_records(input_file):
+            stats['read'] += 1
+            mapping = mappings.get(str(anime.get('id')))
+            if mapping is not None:
+                apply_manual_mapping(anime, mapping)
+                stats['mapped'] += 1
+            if clean_record(anime) is None:
+                stats['dropped'] += 1
+                continue
+            out.write(anime)
+            if validator is not None:
+                validator.add(anime)
+            stats['written'] += 1
+    stats['changed'] = int(out.changed)
+    return stats
 
-def main():
+def main(columnar: bool = False, stream: bool = False, table: bool = False):
     logger.info("Generating final dataset...")
-    
+
+    if stream:
+        if not os.path.exists(INPUT_FILE):
+            logger.error(f"File not found: {INPUT_FILE}")
+            return
+        validator = StreamValidator()
+        stats = generate_streaming(INPUT_FILE, OUTPUT_FILE, load_manual_mappings(), validator)
+        logger.info(f"Streamed {stats['read']} records into {OUTPUT_FILE}: {stats['written']} written, "
+                    f"{stats['mapped']} manually mapped, {stats['dropped']} dropped"
+                    f"{'' if stats['changed'] else ' (unchanged, not rewritten)'}.")
+        report = validator.report()
+        save_json(report, VALIDATION_REPORT_FILE)
+        for line in summary_lines(report):
+            logger.info(line)
+        logger.info("The bundle needs the whole dataset in memory and is not written with --stream.")
+        return
+
     animes = load_json(INPUT_FILE)
     if not animes:
         return
         
     # Load manual mappings
-    mappings = {}
-    if os.path.exists(MANUAL_MAPPING_FILE):
-        try:
-            with open(MANUAL_MAPPING_FILE, 'r', encoding='utf-8') as f:
-                mappings = json.load(f)
-        except Exception as e:
-            logger.warning(f"Failed to load manual mappings: {e}")
+    mappings = load_manual_mappings()
             
     # Apply mappings
     if mappings:
@@ -122,9 +197,43 @@ def main():
     # Validate
     final_data = validate_and_clean(animes)
     
+    report = validate_records(final_data)
+    save_json(report, VALIDATION_REPORT_FILE)
+    for line in summary_lines(report):
+        logger.info(line)
+
     # Save
-    save_json(final_data, OUTPUT_FILE)
-    logger.info(f"Successfully generated {OUTPUT_FILE} with {len(final_data)} items.")
+    if save_json_if_changed(final_data, OUTPUT_FILE):
+        logger.info(f"Successfully generated {OUTPUT_FILE} with {len(final_data)} items.")
+    else:
+        logger.info(f"{OUTPUT_FILE} is unchanged ({len(final_data)} items), not rewritten.")
+
+    report = write_bundle(final_data, BUNDLE_DIR)
+    logger.info(f"Wrote bundle to {BUNDLE_DIR}: {len(report['changed'])}/{len(report['shards'])} shards changed, "
+                f"{report['changedBytes']} of {report['totalBytes']} bytes rewritten.")
+
+    if columnar:
+        sizes = write_columnar(final_data, COLUMNAR_FILE)
+        logger.info("Wrote columnar dataset: " + ', '.join(f"{os.path.basename(p)} {n} bytes" for p, n in sizes.items()))
+
+    if table:
+        try:
+            size = write_catalog(final_data, PARQUET_FILE)
+            logger.info(f"Wrote analytics table {PARQUET_FILE} ({size} bytes).")
+        except RuntimeError as e:
+            logger.warning(f"Skipping {PARQUET_FILE}: {e}")
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate the frontend dataset from the enriched data.")
+    parser.add_argument('--columnar', action='store_true',
+                        help=f"Also write {COLUMNAR_FILE} (+ .gz/.br), one array per field")
+    parser.add_argument('--stream', action='store_true',
+                        help="Read, clean and write one record at a time (flat memory; "
+                             "accepts NDJSON input; writes animes.json and the validation report, no bundle)")
+    parser.add_argument('--parquet', action='store_true',
+                        help=f"Also write {PARQUET_FILE}, a flat typed table for analytics (needs pyarrow)")
+    args = parser.parse_args()
+    if args.stream and (args.columnar or args.parquet):
+        parser.error("--columnar and --parquet need the whole dataset and cannot be combined with --stream")
+    main(columnar=args.columnar, stream=args.stream, table=args.parquet)
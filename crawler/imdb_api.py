@@ -1,22 +1,41 @@
+import os
+import sys
 import requests
 import logging
-import json
 import re
-from typing import Optional, Dict, Any
-from bs4 import BeautifulSoup
+from typing import Optional, Dict, Any, List
 
 import urllib.parse
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from lib.html_extract import extract_json_ld, select_rated_entity, read_until_json_ld
+from lib.candidate_scoring import score_candidates
+from lib.query_variants import first_confident, query_memo, query_variants
+from services.aod_service import accepted_aod_types
+from services.provider_base import AnimeProvider
+
 logger = logging.getLogger(__name__)
 
-def search_imdb(query: str) -> Optional[str]:
+IMDB_TITLE_URL = os.environ.get('IMDB_TITLE_URL', 'https://www.imdb.com/title')
+IMDB_SUGGEST_URL = os.environ.get('IMDB_SUGGEST_URL', 'https://v2.sg.media-imdb.com/suggestion')
+STREAM_CHUNK_SIZE = 16384
+
+# Suggestion API `qid` -> AOD vocabulary, for the candidate type feature
+IMDB_TYPES = {
+    'tvSeries': 'TV', 'tvMiniSeries': 'TV', 'movie': 'MOVIE', 'tvMovie': 'MOVIE',
+    'video': 'OVA', 'tvSpecial': 'SPECIAL', 'tvShort': 'SPECIAL', 'short': 'SPECIAL',
+}
+MIN_CONFIDENCE = 0.6
+
+_RATING_VALUE = re.compile(r'"ratingValue":\s*"?(\d+\.?\d*)"?')
+_RATING_COUNT = re.compile(r'"ratingCount":\s*(\d+)')
+
+def _fetch_imdb_candidates(query: str) -> Optional[List[Dict]]:
     """
-    Search IMDb for a title and return the best matching IMDb ID (tt...).
-    Uses the undocumented Suggestion API (v2).
+    Raw results of the undocumented Suggestion API (v2) for a query.
+    Each result: {'id': 'tt...', 'l': title, 'y': year, 'qid': 'tvSeries'|'movie'|...}
+    None on request errors.
     """
-    if not query:
-        return None
-        
     try:
         # API requires the first character for sharding
         # Clean query: remove special chars if needed, but usually urlencode is enough
@@ -25,7 +44,7 @@ def search_imdb(query: str) -> Optional[str]:
         if not first_char.isalnum(): 
             first_char = 'x' # Fallback
             
-        url = f"https://v2.sg.media-imdb.com/suggestion/{first_char}/{safe_query}.json"
+        url = f"{IMDB_SUGGEST_URL}/{first_char}/{safe_query}.json"
         
         headers = {
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
@@ -33,30 +52,57 @@ def search_imdb(query: str) -> Optional[str]:
         
         logger.debug(f"Searching IMDb: {url}")
         response = requests.get(url, headers=headers, timeout=5)
-        
         if response.status_code == 200:
-            data = response.json()
-            results = data.get('d', [])
-            
-            if results:
-                # Prioritize Anime/Animation?
-                # The API returns 'qid': 'tvSeries', 'movie', etc.
-                # We just take the first result for now as it's usually the best match by popularity
-                return results[0]['id']
-                
+            return response.json().get('d', [])
+        return []
     except Exception as e:
         logger.error(f"Error searching IMDb for '{query}': {e}")
-        
+        return None
+
+def rank_imdb_candidates(results: List[Dict], queries: List[str], year: int = None,
+                         anime_type: str = None) -> List[Dict]:
+    """Score title results (tt ids only; names and companies are dropped) against the title variants."""
+    candidates = [
+        {'titles': [item.get('l')], 'year': item.get('y'), 'type': IMDB_TYPES.get(item.get('qid')), 'item': item}
+        for item in results
+        if str(item.get('id', '')).startswith('tt')
+    ]
+    return score_candidates(queries, candidates, year, accepted_aod_types(anime_type))
+
+def search_imdb(query: str, year: int = None, anime_type: str = None,
+                alt_titles: List[str] = None) -> Optional[str]:
+    """
+    Search IMDb for a title and return the best matching IMDb ID (tt...).
+    Uses the undocumented Suggestion API (v2); results are ranked by title,
+    year and type instead of trusting the API's popularity order.
+    """
+    if not query:
+        return None
+
+    queries = [query] + (alt_titles or [])
+    best_match = first_confident(
+        query_variants(query),
+        lambda variant: query_memo.fetch('imdb', variant, _fetch_imdb_candidates),
+        lambda results: rank_imdb_candidates(results, queries, year, anime_type),
+        MIN_CONFIDENCE,
+    )
+    if best_match:
+        return best_match['item']['id']
+    logger.debug(f"IMDb: no confident match for '{query}'")
     return None
 
 def get_imdb_rating(imdb_id: str) -> Optional[Dict[str, Any]]:
     """
     Scrape IMDb rating from the title page.
+
+    The page is streamed and only read until its JSON-LD block is complete
+    (it lives in <head>); the rest of the multi-hundred-KB body is never
+    downloaded or parsed. The full body is only read for the regex fallback.
     """
     if not imdb_id or not imdb_id.startswith('tt'):
         return None
 
-    url = f"https://www.imdb.com/title/{imdb_id}/"
+    url = f"{IMDB_TITLE_URL}/{imdb_id}/"
     headers = {
         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
         "Accept-Language": "en-US,en;q=0.9"
@@ -64,48 +110,30 @@ def get_imdb_rating(imdb_id: str) -> Optional[Dict[str, Any]]:
 
     try:
         logger.debug(f"Fetching IMDb URL: {url}")
-        response = requests.get(url, headers=headers, timeout=10)
-        
-        if response.status_code == 404:
-            logger.warning(f"IMDb ID {imdb_id} not found.")
-            return None
-            
-        if response.status_code != 200:
-            logger.warning(f"IMDb request failed for {imdb_id}. Status: {response.status_code}")
-            return None
-            
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
+        with requests.get(url, headers=headers, timeout=10, stream=True) as response:
+            if response.status_code == 404:
+                logger.warning(f"IMDb ID {imdb_id} not found.")
+                return None
+
+            if response.status_code != 200:
+                logger.warning(f"IMDb request failed for {imdb_id}. Status: {response.status_code}")
+                return None
+
+            chunks = response.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+            head, complete = read_until_json_ld(chunks)
+            if not complete:
+                # No JSON-LD in <head>: the regex fallback needs the whole body
+                head += b''.join(chunks)
+            text = head.decode(response.encoding or 'utf-8', errors='replace')
+
         # Method 1: JSON-LD
         # IMDb embeds data in a <script type="application/ld+json"> tag
-        script = soup.find('script', type='application/ld+json')
-        data = {}
-        if script:
+        data = extract_json_ld(text)
+        if data is not None:
             try:
-                # Use get_text() as .string can be None if there are internal tags (unlikely for script but safe)
-                json_text = script.get_text()
-                data = json.loads(json_text)
-                
                 # Check if it's the main entity or a graph
-                candidate = None
-                
-                if '@graph' in data:
-                    # Look for ANY entity with aggregateRating
-                    for item in data['@graph']:
-                        if 'aggregateRating' in item:
-                            candidate = item
-                            break
-                        # Fallback: Prefer Movie/TVSeries if multiple exist
-                        if item.get('@type') in ['Movie', 'TVSeries', 'CreativeWork', 'TVSeason']:
-                             if not candidate:
-                                 candidate = item
-                else:
-                    candidate = data
-
-                if candidate:
-                    data = candidate
-                
-                aggregate_rating = data.get('aggregateRating', {})
+                candidate = select_rated_entity(data) or {}
+                aggregate_rating = candidate.get('aggregateRating', {})
                 
                 score = aggregate_rating.get('ratingValue')
                 votes = aggregate_rating.get('ratingCount')
@@ -124,11 +152,11 @@ def get_imdb_rating(imdb_id: str) -> Optional[Dict[str, Any]]:
             
         # Method 2: Regex Fallback
         # Look for ratingValue in text patterns
-        match = re.search(r'"ratingValue":\s*"?(\d+\.?\d*)"?', response.text)
+        match = _RATING_VALUE.search(text)
         if match:
             score = match.group(1)
             # Try to find vote count
-            match_votes = re.search(r'"ratingCount":\s*(\d+)', response.text)
+            match_votes = _RATING_COUNT.search(text)
             votes = match_votes.group(1) if match_votes else 0
             
             return {
@@ -140,4 +168,23 @@ def get_imdb_rating(imdb_id: str) -> Optional[Dict[str, Any]]:
 
     except Exception as e:
         logger.error(f"Error fetching IMDb {imdb_id}: {e}")
-        return None
\ No newline at end of file
+        return None
+
+class ImdbProvider(AnimeProvider):
+    """IMDb: search ranks Suggestion API results, details scrapes the title page rating."""
+    name = 'imdb'
+
+    async def search(self, query, year=None, anime_type=None, alt_titles=None):
+        return await self._call(search_imdb, query, year, anime_type, alt_titles)
+
+    async def details(self, imdb_id):
+        return await self._call(get_imdb_rating, imdb_id)
+
+    async def rating(self, imdb_id):
+        return self.as_rating(await self.details(imdb_id), imdb_id)
+
+    @staticmethod
+    def as_rating(data: Optional[Dict], imdb_id: str) -> Optional[Dict[str, Any]]:
+        if not data:
+            return None
+        return {'score': data.get('imdb_score'), 'votes': data.get('imdb_votes'), 'id': imdb_id}
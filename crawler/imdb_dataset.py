@@ -0,0 +1,166 @@
+"""
+Offline IMDb ratings from the public IMDb datasets (https://datasets.imdbws.com/).
+
+Instead of downloading one title page per anime, `title.ratings.tsv.gz`
+(and optionally `title.basics.tsv.gz`) are streamed and decompressed on the
+fly, filtered to the tconsts we care about, and persisted to a small SQLite
+store. Lookups are then dictionary hits.
+
+Usage:
+    python imdb_dataset.py                                   # download dumps, keep ids from our data
+    python imdb_dataset.py --ratings ratings.tsv.gz --basics basics.tsv.gz
+    python cross_platform.py --imdb-source dataset
+"""
+import argparse
+import gzip
+import io
+import json
+import logging
+import os
+import sqlite3
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, TextIO
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+IMDB_DATASETS_URL = os.environ.get('IMDB_DATASETS_URL', 'https://datasets.imdbws.com')
+RATINGS_DUMP = 'title.ratings.tsv.gz'
+BASICS_DUMP = 'title.basics.tsv.gz'
+
+STORE_FILE = '../data/imdb_ratings.sqlite'
+ID_SOURCES = ['../data/animes_enriched.json', 'manual_mapping.json']
+
+# When title.basics is ingested, every title in this genre is kept as well,
+# so titles found later by search already have a rating locally.
+KEEP_GENRE = 'Animation'
+
+NULL = '\\N'  # IMDb's null marker
+
+def open_dump(source: str) -> TextIO:
+    """Open a local or remote .tsv.gz dump as a text stream, decompressing on the fly."""
+    if source.startswith(('http://', 'https://')):
+        response = requests.get(source, stream=True, timeout=60)
+        response.raise_for_status()
+        raw = gzip.GzipFile(fileobj=response.raw)
+    else:
+        raw = gzip.open(source, 'rb')
+    return io.TextIOWrapper(raw, encoding='utf-8', newline='\n')
+
+def iter_rows(stream: TextIO) -> Iterator[Dict[str, str]]:
+    """Yield TSV rows as dicts keyed by the header line. IMDb dumps are unquoted."""
+    header = next(stream).rstrip('\n').split('\t')
+    for line in stream:
+        yield dict(zip(header, line.rstrip('\n').split('\t')))
+
+def _int_or_none(value: str) -> Optional[int]:
+    return int(value) if value and value != NULL else None
+
+def collect_wanted_ids(paths: Iterable[str]) -> Set[str]:
+    """IMDb ids referenced by our enriched data and manual mappings."""
+    wanted = set()
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        records = data.values() if isinstance(data, dict) else data
+        for record in records:
+            imdb_id = record.get('imdb_id') or record.get('ratings', {}).get('imdb', {}).get('id')
+            if imdb_id:
+                wanted.add(imdb_id)
+    return wanted
+
+class ImdbRatingsStore:
+    """Compact tconst -> (score, votes, type, title, year) store backed by SQLite."""
+
+    def __init__(self, path: str = STORE_FILE):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ratings ("
+            " tconst TEXT PRIMARY KEY, score REAL, votes INTEGER,"
+            " title_type TEXT, title TEXT, start_year INTEGER"
+            ") WITHOUT ROWID"
+        )
+        self._ratings: Optional[Dict[str, tuple]] = None
+
+    def close(self):
+        self._conn.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM ratings").fetchone()[0]
+
+    def ingest(self, ratings_source: str, basics_source: Optional[str] = None,
+               wanted: Optional[Set[str]] = None) -> int:
+        """
+        Stream the dumps and replace the store contents.
+
+        Kept tconsts: `wanted` plus, when basics are given, every title in the
+        KEEP_GENRE genre. With neither, every rated title is kept.
+        Returns the number of stored ratings.
+        """
+        keep: Optional[Set[str]] = set(wanted) if wanted is not None else None
+        basics: Dict[str, tuple] = {}
+
+        if basics_source:
+            logger.info(f"Streaming {basics_source}...")
+            with open_dump(basics_source) as stream:
+                for row in iter_rows(stream):
+                    tconst = row['tconst']
+                    is_kept_genre = KEEP_GENRE in row.get('genres', '').split(',')
+                    if keep is not None and tconst not in keep and not is_kept_genre:
+                        continue
+                    basics[tconst] = (row.get('titleType'), row.get('primaryTitle'), _int_or_none(row.get('startYear')))
+            keep = (keep or set()) | set(basics)
+
+        logger.info(f"Streaming {ratings_source}...")
+        rows: List[tuple] = []
+        with open_dump(ratings_source) as stream:
+            for row in iter_rows(stream):
+                tconst = row['tconst']
+                if keep is not None and tconst not in keep:
+                    continue
+                title_type, title, start_year = basics.get(tconst, (None, None, None))
+                rows.append((tconst, float(row['averageRating']), int(row['numVotes']), title_type, title, start_year))
+
+        with self._conn:
+            self._conn.execute("DELETE FROM ratings")
+            self._conn.executemany("INSERT OR REPLACE INTO ratings VALUES (?, ?, ?, ?, ?, ?)", rows)
+        self._ratings = None
+        logger.info(f"Stored {len(rows)} IMDb ratings in {self.path}.")
+        return len(rows)
+
+    def get(self, imdb_id: str) -> Optional[Dict[str, Any]]:
+        """Same shape as imdb_api.get_imdb_rating, or None if the title is not stored."""
+        if self._ratings is None:
+            self._ratings = {
+                tconst: (score, votes)
+                for tconst, score, votes in self._conn.execute("SELECT tconst, score, votes FROM ratings")
+            }
+        hit = self._ratings.get(imdb_id)
+        if hit is None:
+            return None
+        return {'imdb_score': hit[0], 'imdb_votes': hit[1]}
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ratings', default=f"{IMDB_DATASETS_URL}/{RATINGS_DUMP}", help='Path or URL of title.ratings.tsv.gz')
+    parser.add_argument('--basics', default=f"{IMDB_DATASETS_URL}/{BASICS_DUMP}",
+                        help='Path or URL of title.basics.tsv.gz ("" to skip)')
+    parser.add_argument('--store', default=STORE_FILE)
+    parser.add_argument('--ids-from', nargs='*', default=ID_SOURCES, help='JSON files whose IMDb ids must be kept')
+    args = parser.parse_args()
+
+    wanted = collect_wanted_ids(args.ids_from)
+    logger.info(f"{len(wanted)} IMDb ids referenced by our data.")
+
+    store = ImdbRatingsStore(args.store)
+    try:
+        store.ingest(args.ratings, args.basics or None, wanted)
+    finally:
+        store.close()
+
+if __name__ == '__main__':
+    main()
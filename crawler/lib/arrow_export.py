@@ -0,0 +1,112 @@
+"""
+Typed, flattened table of the catalog for analytics (Parquet / Arrow IPC).
+
+One row per title and one column per field, with the nested ratings spread
+into <platform>Id / <platform>Score / <platform>Votes columns (MAL votes are
+its member count) and genres kept as a list<string> column:
+
+    import pyarrow.parquet as pq
+    table = pq.read_table('../data/animes.parquet')
+    table.to_pandas()[['imdbScore', 'myanimelistScore']].corr()
+
+The columns are built in plain Python (catalog_columns); writing them needs
+the optional pyarrow package.
+"""
+import os
+from typing import Any, Dict, List, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+from lib.validation import RATING_VOTES
+
+ARROW_FORMATS = ('.parquet', '.arrow', '.feather')
+
+# (column, type name, record field); missing, empty and wrongly typed values are null
+BASE_COLUMNS: List[Tuple[str, str, str]] = [
+    ('id', 'string', 'id'),
+    ('title', 'string', 'title'),
+    ('titleOriginal', 'string', 'titleOriginal'),
+    ('titleEnglish', 'string', 'titleEnglish'),
+    ('year', 'int32', 'year'),
+    ('episodes', 'int32', 'episodes'),
+    ('popularity', 'int64', 'popularity'),
+    ('genres', 'list<string>', 'genres'),
+    ('franchiseId', 'string', 'franchiseId'),
+    ('bahamutUrl', 'string', 'bahamutUrl'),
+    ('thumbnail', 'string', 'thumbnail'),
+]
+# 0 means "unknown" in these fields (and a 0 score means unrated)
+ZERO_IS_NULL = ('year', 'episodes')
+# platform -> type of its provider id (Bahamut ratings have none)
+RATING_ID_TYPES = {'bahamut': None, 'imdb': 'string', 'douban': 'string', 'myanimelist': 'int64'}
+
+def column_types() -> Dict[str, str]:
+    types = {name: type_name for name, type_name, _ in BASE_COLUMNS}
+    for platform, id_type in RATING_ID_TYPES.items():
+        if id_type:
+            types[f'{platform}Id'] = id_type
+        types[f'{platform}Score'] = 'float64'
+        types[f'{platform}Votes'] = 'int64'
+    return types
+
+def _coerce(value: Any, type_name: str, zero_is_null: bool = False) -> Any:
+    if value is None or value == '' or value == []:
+        return None
+    if type_name == 'string':
+        return str(value)
+    if type_name in ('int32', 'int64'):
+        valid = isinstance(value, int) and not isinstance(value, bool) and value >= 0
+        return value if valid and not (zero_is_null and value == 0) else None
+    if type_name == 'float64':
+        return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0 else None
+    if type_name == 'list<string>':
+        return [str(item) for item in value] if isinstance(value, list) else None
+    return value
+
+def catalog_columns(animes: List[Dict]) -> Dict[str, List[Any]]:
+    """{column: values}, typed as column_types() says (None for null)."""
+    types = column_types()
+    columns = {name: [_coerce(anime.get(field), type_name, field in ZERO_IS_NULL) for anime in animes]
+               for name, type_name, field in BASE_COLUMNS}
+    for platform, id_type in RATING_ID_TYPES.items():
+        ratings = [((anime.get('ratings') or {}).get(platform) or {}) for anime in animes]
+        if id_type:
+            columns[f'{platform}Id'] = [_coerce(rating.get('id'), id_type) for rating in ratings]
+        columns[f'{platform}Score'] = [_coerce(rating.get('score'), 'float64') for rating in ratings]
+        votes_key = RATING_VOTES.get(platform, 'votes')
+        columns[f'{platform}Votes'] = [_coerce(rating.get(votes_key), 'int64') for rating in ratings]
+    return {name: columns[name] for name in types}
+
+def _arrow_type(type_name: str):
+    if type_name == 'list<string>':
+        return pa.list_(pa.string())
+    return getattr(pa, type_name)()
+
+def arrow_table(animes: List[Dict]):
+    """pyarrow.Table of catalog_columns (requires pyarrow)."""
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed (pip install pyarrow)")
+    types = column_types()
+    schema = pa.schema([pa.field(name, _arrow_type(type_name)) for name, type_name in types.items()])
+    columns = catalog_columns(animes)
+    return pa.Table.from_arrays([pa.array(columns[field.name], type=field.type) for field in schema], schema=schema)
+
+def write_catalog(animes: List[Dict], path: str) -> int:
+    """Write .parquet (zstd) or .arrow / .feather (Arrow IPC); returns bytes written."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in ARROW_FORMATS:
+        raise ValueError(f"Unsupported table format {ext!r} (use one of {', '.join(ARROW_FORMATS)})")
+    table = arrow_table(animes)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + '.tmp'
+    if ext == '.parquet':
+        pq.write_table(table, tmp_path, compression='zstd')
+    else:
+        feather.write_feather(table, tmp_path, compression='zstd')
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
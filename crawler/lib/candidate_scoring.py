@@ -0,0 +1,127 @@
+import difflib
+import logging
+from typing import Dict, List, Optional, Sequence
+
+from lib.text_cleaner import normalize_many
+
+try:
+    from rapidfuzz import fuzz, process
+    HAS_RAPIDFUZZ = True
+except ImportError:  # difflib fallback: same 0-100 scale, pure Python
+    HAS_RAPIDFUZZ = False
+
+try:
+    import numpy  # noqa: F401  (process.cdist returns an ndarray)
+    HAS_CDIST = HAS_RAPIDFUZZ
+except ImportError:
+    HAS_CDIST = False
+
+logger = logging.getLogger(__name__)
+
+# Shared ranking for provider search results (MAL, Douban, IMDb).
+#
+# A candidate is a dict with:
+#   'titles': list of titles to compare against (None/empty entries ignored)
+#   'year':   release year or None
+#   'type':   release type in AOD vocabulary (TV, MOVIE, OVA, ONA, SPECIAL) or None
+# plus any provider fields, which are passed through untouched.
+#
+# Features score 0..1; the confidence is their weighted mean over the features
+# known for that pair (no year on either side -> the year weight is dropped).
+# Two vetoes set the confidence to 0 whatever the other features say: years
+# further apart than YEAR_TOLERANCE (another season or a remake), and a title
+# similarity below min_title.
+
+DEFAULT_WEIGHTS = {'title': 0.6, 'year': 0.25, 'type': 0.15}
+YEAR_TOLERANCE = 1  # off by one still earns partial credit (broadcast vs. premiere year)
+
+def similarity_matrix(queries: Sequence[str], choices: Sequence[str]) -> List[List[float]]:
+    """
+    Normalized-title similarity (0-100) of every query against every choice,
+    in one batched call. Strings are compared after normalize_for_match.
+    """
+    if not queries or not choices:
+        return [[0.0] * len(choices) for _ in queries]
+    norm_queries = normalize_many(queries)
+    norm_choices = normalize_many(choices)
+    if HAS_CDIST:
+        return process.cdist(norm_queries, norm_choices, scorer=fuzz.ratio).tolist()
+    if HAS_RAPIDFUZZ:
+        return [[fuzz.ratio(q, c) for c in norm_choices] for q in norm_queries]
+
+    matrix = []
+    for q in norm_queries:
+        matcher = difflib.SequenceMatcher(None, b=q, autojunk=False)  # b is the cached side
+        row = []
+        for c in norm_choices:
+            matcher.set_seq1(c)
+            row.append(matcher.ratio() * 100)
+        matrix.append(row)
+    return matrix
+
+def year_score(year: Optional[int], candidate_year: Optional[int]) -> Optional[float]:
+    if not year or not candidate_year:
+        return None
+    try:
+        diff = abs(int(candidate_year) - int(year))
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, 1.0 - diff / (YEAR_TOLERANCE + 1))
+
+def type_score(accepted_types: Sequence[str], candidate_type: Optional[str]) -> Optional[float]:
+    if not accepted_types or not candidate_type:
+        return None
+    return 1.0 if candidate_type in accepted_types else 0.0
+
+def score_candidates(queries: Sequence[str], candidates: List[Dict], year: Optional[int] = None,
+                     accepted_types: Sequence[str] = (), weights: Optional[Dict[str, float]] = None,
+                     min_title: float = 0.0) -> List[Dict]:
+    """
+    Rank candidates for a title.
+
+    queries: every title variant we have for the anime (empty ones ignored).
+    accepted_types: AOD types compatible with the anime (see accepted_aod_types).
+    min_title: title similarity (0..1) a candidate needs at all.
+    Returns [{'candidate', 'confidence', 'title', 'year', 'type'}] best first;
+    ties keep the provider's order.
+    """
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    queries = [q for q in dict.fromkeys(queries) if q]
+
+    # One flat choice list for all candidates; owners maps each column back
+    choices, owners = [], []
+    for i, cand in enumerate(candidates):
+        for title in dict.fromkeys(cand.get('titles') or []):
+            if title:
+                choices.append(title)
+                owners.append(i)
+
+    best_title = [0.0] * len(candidates)
+    for row in similarity_matrix(queries, choices):
+        for col, value in enumerate(row):
+            owner = owners[col]
+            if value > best_title[owner]:
+                best_title[owner] = value
+
+    ranked = []
+    for i, cand in enumerate(candidates):
+        features = {
+            'title': best_title[i] / 100,
+            'year': year_score(year, cand.get('year')),
+            'type': type_score(accepted_types, cand.get('type')),
+        }
+        known = {name: value for name, value in features.items() if value is not None}
+        total_weight = sum(weights[name] for name in known)
+        confidence = sum(weights[name] * value for name, value in known.items()) / total_weight if total_weight else 0.0
+        if features['year'] == 0.0 or features['title'] < min_title:
+            confidence = 0.0
+        ranked.append({'candidate': cand, 'confidence': round(confidence, 4), **features})
+
+    ranked.sort(key=lambda r: r['confidence'], reverse=True)
+    return ranked
+
+def best_candidate(ranked: List[Dict], min_confidence: float) -> Optional[Dict]:
+    """Top candidate if it clears min_confidence, else None."""
+    if ranked and ranked[0]['confidence'] >= min_confidence:
+        return ranked[0]['candidate']
+    return None
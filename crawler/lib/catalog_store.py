@@ -0,0 +1,150 @@
+"""
+Indexed in-memory catalog behind api_server.py.
+
+Built once from the generated records: rows by id, rows per genre, the
+dashboard sort orders (lib/data_bundle.sort_orders), normalized scores for
+composite ranking (lib/facets.py), facets and the title search index. A
+query intersects the filter indexes, walks the requested order and slices
+one page, so its cost does not depend on rendering the whole catalog.
+
+Filters follow app/lib/filters.ts: a search query replaces the other
+filters, genres match any of the given ones (OR), the year is a single year
+or a range, and minVotes applies to Bahamut votes.
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from lib.data_bundle import SORT_PLATFORMS, dumps_compact, sort_orders
+from lib.facets import PLATFORM_SCALES, facet_counts, score_columns
+from lib.search_index import build_search_index, search
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# As in sorting.ts when no weights are given
+DEFAULT_WEIGHTS = {'bahamut': 25.0, 'imdb': 25.0, 'douban': 25.0, 'myanimelist': 25.0}
+# Composite orders kept per distinct weight set
+COMPOSITE_CACHE_SIZE = 64
+
+_YEAR_OPTION = re.compile(r'^(\d{4})(?:-(\d{4}))?$')
+
+def parse_year_option(text: Optional[str]) -> Optional[Tuple[int, int]]:
+    """'2024' -> (2024, 2024), '2010-2019' -> (2010, 2019), '' / 'all' -> None."""
+    if not text or text == 'all':
+        return None
+    match = _YEAR_OPTION.match(text.strip())
+    if not match:
+        raise ValueError(f"Invalid year: {text!r} (e.g. 2024 or 2010-2019)")
+    start = int(match.group(1))
+    return start, int(match.group(2) or start)
+
+def parse_weights(text: Optional[str]) -> Dict[str, float]:
+    """'bahamut:40,imdb:20' -> weights, with unlisted platforms at 0; '' -> DEFAULT_WEIGHTS."""
+    if not text:
+        return dict(DEFAULT_WEIGHTS)
+    weights = {platform: 0.0 for platform in DEFAULT_WEIGHTS}
+    for part in text.split(','):
+        platform, _, value = part.partition(':')
+        if platform not in weights:
+            raise ValueError(f"Unknown platform in weights: {platform!r}")
+        try:
+            weights[platform] = float(value)
+        except ValueError:
+            raise ValueError(f"Invalid weight for {platform}: {value!r}")
+    return weights
+
+class CatalogStore:
+    def __init__(self, animes: List[Dict]):
+        self.animes = animes
+        self.by_id = {str(anime.get('id')): row for row, anime in enumerate(animes)}
+        self.by_genre: Dict[str, List[int]] = {}
+        for row, anime in enumerate(animes):
+            for genre in dict.fromkeys(anime.get('genres') or []):
+                self.by_genre.setdefault(genre, []).append(row)
+        self.years = [anime.get('year') or 0 for anime in animes]
+        self.votes = [((anime.get('ratings') or {}).get('bahamut') or {}).get('votes') or 0 for anime in animes]
+        self.orders = sort_orders(animes)
+        columns = score_columns(animes)
+        self.norms = {platform: columns[f'{platform}Norm'] for platform in PLATFORM_SCALES}
+        self.facets = facet_counts(animes)
+        self.search_index = build_search_index(animes)
+        # Changes whenever the records do; part of every ETag
+        self.version = hashlib.sha256(dumps_compact(animes)).hexdigest()[:16]
+        self._composite: 'OrderedDict[Tuple, List[int]]' = OrderedDict()
+        # api_server queries from several threads at once
+        self._composite_lock = threading.Lock()
+
+    def get(self, anime_id: str) -> Optional[Dict]:
+        row = self.by_id.get(str(anime_id))
+        return None if row is None else self.animes[row]
+
+    def match(self, genres: Sequence[str] = (), year: Optional[Tuple[int, int]] = None,
+              min_votes: int = 0, q: Optional[str] = None) -> Optional[Set[int]]:
+        """Rows passing the filters; None means every row."""
+        if q and q.strip():
+            return set(search(self.search_index, q))
+        rows: Optional[Set[int]] = None
+        if genres:
+            rows = {row for genre in genres for row in self.by_genre.get(genre, ())}
+        if year is not None:
+            start, end = year
+            candidates = rows if rows is not None else range(len(self.animes))
+            rows = {row for row in candidates if start <= self.years[row] <= end}
+        if min_votes > 0:
+            candidates = rows if rows is not None else range(len(self.animes))
+            rows = {row for row in candidates if self.votes[row] >= min_votes}
+        return rows
+
+    def composite_order(self, weights: Dict[str, float]) -> List[int]:
+        """Rows by calculateCompositeScore, best first (Bahamut score breaks ties)."""
+        key = tuple(sorted(weights.items()))
+        with self._composite_lock:
+            order = self._composite.get(key)
+            if order is not None:
+                self._composite.move_to_end(key)
+                return order
+
+        scores = []
+        for row in range(len(self.animes)):
+            total = weight = 0.0
+            for platform, w in weights.items():
+                value = self.norms[platform][row]
+                if value is not None:
+                    total += value * w
+                    weight += w
+            scores.append(total / weight if weight else 0.0)
+        bahamut = self.norms['bahamut']
+        order = sorted(range(len(self.animes)), key=lambda row: (scores[row], bahamut[row] or 0), reverse=True)
+
+        with self._composite_lock:
+            self._composite[key] = order
+            if len(self._composite) > COMPOSITE_CACHE_SIZE:
+                self._composite.popitem(last=False)
+        return order
+
+    def order(self, sort: str = 'bahamut', weights: Optional[Dict[str, float]] = None) -> List[int]:
+        if sort == 'composite':
+            return self.composite_order(weights or DEFAULT_WEIGHTS)
+        if sort not in self.orders:
+            raise ValueError(f"Unknown sort: {sort!r} (one of {', '.join(SORT_PLATFORMS + ('composite',))})")
+        return self.orders[sort]
+
+    def query(self, genres: Iterable[str] = (), year: Optional[Tuple[int, int]] = None, min_votes: int = 0,
+              q: Optional[str] = None, sort: str = 'bahamut', weights: Optional[Dict[str, float]] = None,
+              page: int = 1, page_size: int = DEFAULT_PAGE_SIZE) -> Dict[str, Any]:
+        """One page of matching records in the requested order."""
+        if page < 1 or not 1 <= page_size <= MAX_PAGE_SIZE:
+            raise ValueError(f"page must be >= 1 and pageSize between 1 and {MAX_PAGE_SIZE}")
+        order = self.order(sort, weights)
+        rows = self.match(list(genres), year, min_votes, q)
+        matched = order if rows is None else [row for row in order if row in rows]
+        start = (page - 1) * page_size
+        return {
+            'total': len(matched),
+            'page': page,
+            'pageSize': page_size,
+            'pages': -(-len(matched) // page_size),
+            'items': [self.animes[row] for row in matched[start:start + page_size]],
+        }
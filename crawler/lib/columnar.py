@@ -0,0 +1,136 @@
+"""
+Columnar, dictionary-encoded dataset format (optional generate_json output).
+
+Records become one array per field instead of one object per record:
+
+    {"format": 1, "count": N,
+     "columns": {"id": [...], "title": [...], "ratings.imdb.score": [...], ...},
+     "encodings": {"genres": "dict", "thumbnail": "prefix", ...},
+     "dicts": {"genres": ["奇幻", ...], "thumbnail": ["https://p2.bahamut.com.tw/B/2KU/42/", ...]}}
+
+- Nested dicts are flattened to dotted column names (ratings.bahamut.score);
+  an empty dict stays a value of its own column.
+- Lists of strings (genres, tags) are dictionary-encoded: each value is a list
+  of ints into dicts[column], most frequent string first (smallest ints).
+- URL columns are prefix-compressed: each value is [prefix index, suffix],
+  split after the last '/' or '='.
+- null and a missing key are the same thing; decoding drops both.
+
+Files are written with precompressed .gz (and .br when brotli is installed)
+siblings, for static hosts that serve them as-is.
+"""
+import gzip
+import json
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COLUMNAR_FORMAT = 1
+URL_COLUMNS = ('thumbnail', 'bahamutUrl', 'acgUrl')
+
+_URL_SPLIT = re.compile(r'^(.*[/=])(.*)$')
+
+def _flatten(record: Dict, prefix: str = '') -> Iterable[Tuple[str, Any]]:
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            yield from _flatten(value, name + '.')
+        else:
+            yield name, value
+
+def _is_string_list(values: List[Any]) -> bool:
+    lists = [v for v in values if v is not None]
+    return bool(lists) and all(isinstance(v, list) and all(isinstance(s, str) for s in v) for v in lists)
+
+def _dictionary_encode(values: List[Any]) -> Tuple[List[str], List[Any]]:
+    counts = Counter(s for v in values if v for s in v)
+    table = [s for s, _ in sorted(counts.items(), key=lambda item: -item[1])]
+    code = {s: i for i, s in enumerate(table)}
+    return table, [None if v is None else [code[s] for s in v] for v in values]
+
+def _prefix_encode(values: List[Any]) -> Tuple[List[str], List[Any]]:
+    table: Dict[str, int] = {}
+    encoded = []
+    for value in values:
+        if value is None:
+            encoded.append(None)
+            continue
+        match = _URL_SPLIT.match(value)
+        prefix, suffix = match.groups() if match else ('', value)
+        encoded.append([table.setdefault(prefix, len(table)), suffix])
+    return list(table), encoded
+
+def encode_columnar(animes: List[Dict]) -> Dict[str, Any]:
+    """Records -> columnar payload (see module docstring)."""
+    rows = [dict(_flatten(anime)) for anime in animes]
+    names = list(dict.fromkeys(name for row in rows for name in row))
+    columns, encodings, dicts = {}, {}, {}
+    for name in names:
+        values = [row.get(name) for row in rows]
+        if name in URL_COLUMNS and all(v is None or isinstance(v, str) for v in values):
+            dicts[name], values = _prefix_encode(values)
+            encodings[name] = 'prefix'
+        elif _is_string_list(values):
+            dicts[name], values = _dictionary_encode(values)
+            encodings[name] = 'dict'
+        columns[name] = values
+    return {'format': COLUMNAR_FORMAT, 'count': len(animes), 'columns': columns,
+            'encodings': encodings, 'dicts': dicts}
+
+def decode_columnar(payload: Dict[str, Any]) -> List[Dict]:
+    """Columnar payload -> records (null / missing values omitted)."""
+    columns = {}
+    for name, values in payload['columns'].items():
+        encoding = payload['encodings'].get(name)
+        table = payload['dicts'].get(name)
+        if encoding == 'dict':
+            values = [None if v is None else [table[i] for i in v] for v in values]
+        elif encoding == 'prefix':
+            values = [None if v is None else table[v[0]] + v[1] for v in values]
+        columns[name] = (name.split('.'), values)
+
+    records = []
+    for i in range(payload['count']):
+        record: Dict[str, Any] = {}
+        for path, values in columns.values():
+            value = values[i]
+            if value is None:
+                continue
+            node = record
+            for key in path[:-1]:
+                node = node.setdefault(key, {})
+            node[path[-1]] = value
+        records.append(record)
+    return records
+
+def dumps_compact(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def compress_variants(raw: bytes) -> Dict[str, bytes]:
+    """{'.gz': ..., '.br': ...}; .br only when brotli is installed."""
+    variants = {'.gz': gzip.compress(raw, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(raw, quality=11)
+    return variants
+
+def write_with_variants(raw: bytes, path: str) -> Dict[str, int]:
+    """Write `path` and its compressed siblings. Returns {path: bytes}."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    sizes = {}
+    for suffix, data in [('', raw)] + list(compress_variants(raw).items()):
+        target = path + suffix
+        tmp_path = target + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, target)
+        sizes[target] = len(data)
+    return sizes
+
+def write_columnar(animes: List[Dict], path: str) -> Dict[str, int]:
+    return write_with_variants(dumps_compact(encode_columnar(animes)), path)
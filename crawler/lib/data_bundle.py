@@ -0,0 +1,196 @@
+"""
+Sharded, content-addressed frontend bundle written next to animes.json by
+generate_json.
+
+Layout (compact JSON, no indentation):
+    index.json            the manifest: row count, page size and the file
+                          holding each logical shard below
+    summary.json          {"fields": [...], "rows": [[...], ...]}: what the grid
+                          cards, filters and sorts read, one array per record,
+                          followed by the score columns of lib/facets.py
+    facets.json           genre / year histograms and the year range
+    orders.json           {sort option: [row indices]}: precomputed sort orders
+    search.json           n-gram title index over the rows (lib/search_index.py)
+    details/page-NNNN.json  full records, PAGE_SIZE rows per file
+
+Every shard except index.json is stored under a name carrying a hash of its
+content (summary.3f2a9c01b7de.json), so it can be cached forever; only
+index.json has to be revalidated. A run writes just the shards whose content
+changed and keeps the previous run's files for clients still holding the old
+index. Pages are positional, so a rating change rewrites one page, while
+inserting or removing records shifts every page after them.
+
+Rows keep the generator's order; row i of summary.json is record
+i % PAGE_SIZE of page i // PAGE_SIZE. The orders reproduce
+app/lib/sorting.ts (missing scores last, Bahamut score as tie-breaker; a
+missing Bahamut score counts as 0, where sorting.ts compares NaN). 'composite'
+depends on the user's weights and is not precomputed.
+"""
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from lib.facets import SCORE_FIELDS, facet_counts, score_columns
+from lib.search_index import build_search_index
+
+BUNDLE_FORMAT = 2
+INDEX_FILE = 'index.json'
+# Hex digits of the SHA-256 kept in shard names
+HASH_CHARS = 12
+PAGE_SIZE = 200
+
+SUMMARY_FIELDS = (
+    'id', 'title', 'titleOriginal', 'thumbnail', 'year', 'genres', 'episodes',
+    'bahamutScore', 'bahamutVotes', 'imdbScore', 'imdbVotes', 'doubanScore', 'myanimelistScore',
+)
+# summary field -> (platform, rating key)
+RATING_FIELDS = {
+    'bahamutScore': ('bahamut', 'score'),
+    'bahamutVotes': ('bahamut', 'votes'),
+    'imdbScore': ('imdb', 'score'),
+    'imdbVotes': ('imdb', 'votes'),
+    'doubanScore': ('douban', 'score'),
+    'myanimelistScore': ('myanimelist', 'score'),
+}
+SORT_PLATFORMS = ('bahamut', 'imdb', 'douban', 'myanimelist')
+
+def _rating(anime: Dict, platform: str, key: str) -> Any:
+    return ((anime.get('ratings') or {}).get(platform) or {}).get(key)
+
+def summary_row(anime: Dict) -> List[Any]:
+    row = []
+    for field in SUMMARY_FIELDS:
+        if field in RATING_FIELDS:
+            row.append(_rating(anime, *RATING_FIELDS[field]))
+        else:
+            row.append(anime.get(field))
+    return row
+
+def _sort_key(anime: Dict, platform: str) -> Tuple:
+    bahamut_score = _rating(anime, 'bahamut', 'score') or 0
+    if platform == 'bahamut':
+        return (bahamut_score, _rating(anime, 'bahamut', 'votes') or 0)
+    score = _rating(anime, platform, 'score')
+    # compareWithSecondary: rated first (by score), then Bahamut score
+    if score is None:
+        return (0, 0, bahamut_score)
+    return (1, score, bahamut_score)
+
+def sort_orders(animes: List[Dict], platforms=SORT_PLATFORMS) -> Dict[str, List[int]]:
+    """Row indices per sort option, best first. Stable, like Array.prototype.sort."""
+    rows = range(len(animes))
+    return {
+        platform: sorted(rows, key=lambda i: _sort_key(animes[i], platform), reverse=True)
+        for platform in platforms
+    }
+
+def page_file(page: int) -> str:
+    return f"details/page-{page:04d}.json"
+
+def dumps_compact(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def content_name(name: str, digest: str) -> str:
+    """'details/page-0003.json' -> 'details/page-0003.<hash>.json'"""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{digest[:HASH_CHARS]}{ext}"
+
+def write_bytes(data: bytes, path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def build_bundle(animes: List[Dict], page_size: int = PAGE_SIZE) -> Dict[str, Any]:
+    """{relative path: JSON payload} for every bundle file."""
+    pages = [animes[start:start + page_size] for start in range(0, len(animes), page_size)]
+    scores = score_columns(animes)
+    rows = [summary_row(anime) + [scores[field][i] for field in SCORE_FIELDS] for i, anime in enumerate(animes)]
+    files: Dict[str, Any] = {
+        'summary.json': {'fields': list(SUMMARY_FIELDS + SCORE_FIELDS), 'rows': rows},
+        'facets.json': facet_counts(animes),
+        'orders.json': sort_orders(animes),
+        'search.json': build_search_index(animes),
+    }
+    for page, records in enumerate(pages):
+        files[page_file(page)] = records
+    return files
+
+def build_index(count: int, page_size: int, shards: Dict[str, Dict]) -> Dict[str, Any]:
+    """index.json for {logical name: {'file', 'sha256', 'bytes'}}."""
+    pages = sorted(name for name in shards if name.startswith('details/'))
+    return {
+        'format': BUNDLE_FORMAT,
+        'count': count,
+        'pageSize': page_size,
+        'summary': shards['summary.json']['file'],
+        'facets': shards['facets.json']['file'],
+        'orders': shards['orders.json']['file'],
+        'search': shards['search.json']['file'],
+        'details': [shards[name]['file'] for name in pages],
+        'shards': shards,
+    }
+
+def read_index(bundle_dir: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(bundle_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _bundle_files(bundle_dir: str) -> List[str]:
+    names = []
+    for root, _, files in os.walk(bundle_dir):
+        for name in files:
+            names.append(os.path.relpath(os.path.join(root, name), bundle_dir).replace(os.sep, '/'))
+    return names
+
+def write_bundle(animes: List[Dict], bundle_dir: str, page_size: int = PAGE_SIZE) -> Dict[str, Any]:
+    """
+    Write the shards that changed, then index.json, and remove files that
+    neither this index nor the previous one refers to.
+    Returns {'shards': {logical name: {'file', 'sha256', 'bytes'}},
+             'changed': [logical names rewritten], 'changedBytes': int, 'totalBytes': int}.
+    """
+    previous = read_index(bundle_dir) or {}
+    shards, changed = {}, []
+    for name, payload in build_bundle(animes, page_size).items():
+        raw = dumps_compact(payload)
+        digest = hashlib.sha256(raw).hexdigest()
+        target = content_name(name, digest)
+        if not os.path.exists(os.path.join(bundle_dir, target)):
+            write_bytes(raw, os.path.join(bundle_dir, target))
+            changed.append(name)
+        shards[name] = {'file': target, 'sha256': digest, 'bytes': len(raw)}
+
+    index_raw = dumps_compact(build_index(len(animes), page_size, shards))
+    if index_raw != dumps_compact(previous):
+        write_bytes(index_raw, os.path.join(bundle_dir, INDEX_FILE))
+
+    keep = {INDEX_FILE} | {shard['file'] for shard in shards.values()}
+    keep |= {shard.get('file') for shard in (previous.get('shards') or {}).values()}
+    for name in _bundle_files(bundle_dir):
+        if name not in keep:
+            os.remove(os.path.join(bundle_dir, name))
+
+    return {
+        'shards': shards,
+        'changed': changed,
+        'changedBytes': sum(shards[name]['bytes'] for name in changed),
+        'totalBytes': sum(shard['bytes'] for shard in shards.values()),
+    }
+
+def load_bundle(bundle_dir: str, page: Optional[int] = None) -> Dict[str, Any]:
+    """index + summary + facets + orders (and one detail page), as a client would read them."""
+    def read(name: str):
+        with open(os.path.join(bundle_dir, name), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    index = read(INDEX_FILE)
+    bundle = {'index': index, 'summary': read(index['summary']), 'facets': read(index['facets']),
+              'orders': read(index['orders'])}
+    if page is not None:
+        bundle['page'] = read(index['details'][page])
+    return bundle
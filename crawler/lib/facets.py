@@ -0,0 +1,100 @@
+"""
+Facet counts and precomputed score columns for the frontend bundle.
+
+- facet_counts: genre and year histograms plus the year range, which
+  app/lib/data-loader.ts otherwise rebuilds from every record on load.
+- score_columns: per platform, the score on a 0-10 scale ("<platform>Norm",
+  Bahamut's 1-5 doubled as normalizeRating does) and a vote-weighted
+  Bayesian average ("<platform>Bayes"):
+
+      bayes = (v * R + m * C) / (v + m)
+
+  R is the title's normalized score and v its votes (MAL members), C the mean
+  normalized score of the platform's rated titles and m the median of their
+  votes, so thinly voted titles are pulled towards the platform mean.
+
+Only scores > 0 count as rated, as in calculateCompositeScore. Columns are
+computed in one NumPy pass per platform when NumPy is installed, with a
+pure-Python fallback giving the same values.
+"""
+import statistics
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# platform -> (factor to a 0-10 scale, votes key)
+PLATFORM_SCALES = {
+    'bahamut': (2.0, 'votes'),
+    'imdb': (1.0, 'votes'),
+    'douban': (1.0, 'votes'),
+    'myanimelist': (1.0, 'members'),
+}
+SCORE_DECIMALS = 3
+
+SCORE_FIELDS = tuple(f"{platform}{suffix}" for platform in PLATFORM_SCALES for suffix in ('Norm', 'Bayes'))
+
+def facet_counts(animes: List[Dict]) -> Dict:
+    """{'genres': [[genre, count], ...] by name, 'years': [[year, count], ...], 'yearRange': [min, max] or None}"""
+    genres = Counter(genre for anime in animes for genre in dict.fromkeys(anime.get('genres') or []))
+    years = Counter(anime.get('year') for anime in animes if (anime.get('year') or 0) > 0)
+    return {
+        'genres': sorted([genre, count] for genre, count in genres.items()),
+        'years': sorted([year, count] for year, count in years.items()),
+        'yearRange': [min(years), max(years)] if years else None,
+    }
+
+def _platform_values(animes: List[Dict], platform: str, votes_key: str) -> Tuple[List[float], List[float]]:
+    """Raw scores (0 when unrated) and votes per row."""
+    scores, votes = [], []
+    for anime in animes:
+        rating = (anime.get('ratings') or {}).get(platform) or {}
+        score = rating.get('score')
+        scores.append(float(score) if isinstance(score, (int, float)) and score > 0 else 0.0)
+        votes.append(float(rating.get(votes_key) or 0))
+    return scores, votes
+
+def _columns_numpy(scores: List[float], votes: List[float], factor: float) -> Tuple[List, List]:
+    raw = np.asarray(scores, dtype=np.float64)
+    weight = np.asarray(votes, dtype=np.float64)
+    rated = raw > 0
+    norm = np.where(rated, raw * factor, np.nan)
+    if rated.any():
+        mean = norm[rated].mean()
+        prior = float(np.median(weight[rated]))
+        total = weight + prior
+        safe_total = np.where(total > 0, total, 1.0)
+        bayes = np.where(total > 0, (weight * norm + prior * mean) / safe_total, norm)
+    else:
+        bayes = norm
+    return ([None if np.isnan(x) else x for x in np.round(norm, SCORE_DECIMALS).tolist()],
+            [None if np.isnan(x) else x for x in np.round(bayes, SCORE_DECIMALS).tolist()])
+
+def _columns_python(scores: List[float], votes: List[float], factor: float) -> Tuple[List, List]:
+    norm = [score * factor if score > 0 else None for score in scores]
+    rated = [i for i, value in enumerate(norm) if value is not None]
+    if not rated:
+        return norm, list(norm)
+    mean = sum(norm[i] for i in rated) / len(rated)
+    prior = statistics.median(votes[i] for i in rated)
+    bayes = []
+    for value, weight in zip(norm, votes):
+        if value is None:
+            bayes.append(None)
+        elif weight + prior > 0:
+            bayes.append(round((weight * value + prior * mean) / (weight + prior), SCORE_DECIMALS))
+        else:
+            bayes.append(round(value, SCORE_DECIMALS))
+    return [None if value is None else round(value, SCORE_DECIMALS) for value in norm], bayes
+
+def score_columns(animes: List[Dict], platforms=PLATFORM_SCALES) -> Dict[str, List[Optional[float]]]:
+    """{'bahamutNorm': [...], 'bahamutBayes': [...], ...}, one value per row (None when unrated)."""
+    compute = _columns_numpy if np is not None else _columns_python
+    columns = {}
+    for platform, (factor, votes_key) in platforms.items():
+        scores, votes = _platform_values(animes, platform, votes_key)
+        columns[f"{platform}Norm"], columns[f"{platform}Bayes"] = compute(scores, votes, factor)
+    return columns
@@ -0,0 +1,109 @@
+import json
+import re
+import logging
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Targeted extraction from raw HTML without building a DOM.
+# Pages we read (IMDb, Douban) are large, but we only ever need one tag.
+
+_JSON_LD_OPEN = re.compile(r'<script\b[^>]*\btype\s*=\s*["\']application/ld\+json["\'][^>]*>', re.IGNORECASE)
+_JSON_LD_OPEN_BYTES = re.compile(rb'<script\b[^>]*\btype\s*=\s*["\']application/ld\+json["\'][^>]*>', re.IGNORECASE)
+_SCRIPT_CLOSE = re.compile(r'</script\s*>', re.IGNORECASE)
+_SCRIPT_CLOSE_BYTES = re.compile(rb'</script\s*>', re.IGNORECASE)
+_HEAD_CLOSE_BYTES = re.compile(rb'</head\s*>', re.IGNORECASE)
+
+# Schema.org types that describe the title itself (vs. people, reviews...)
+TITLE_ENTITY_TYPES = ['Movie', 'TVSeries', 'CreativeWork', 'TVSeason']
+
+def find_json_ld(html: str) -> Optional[str]:
+    """Return the text of the first application/ld+json script block, or None."""
+    opening = _JSON_LD_OPEN.search(html)
+    if not opening:
+        return None
+    closing = _SCRIPT_CLOSE.search(html, opening.end())
+    if not closing:
+        return None
+    return html[opening.end():closing.start()]
+
+def extract_json_ld(html: str) -> Optional[Any]:
+    """Decode the first JSON-LD block. Malformed or missing blocks give None."""
+    block = find_json_ld(html)
+    if block is None:
+        return None
+    try:
+        return json.loads(block)
+    except ValueError as e:
+        logger.debug(f"JSON-LD block is not valid JSON: {e}")
+        return None
+
+def select_rated_entity(data: Any) -> Optional[Dict]:
+    """
+    Pick the entity carrying the rating from a JSON-LD document.
+    For an @graph (or a top-level list), the first item with aggregateRating
+    wins; otherwise the first title-like entity (TITLE_ENTITY_TYPES).
+    """
+    if isinstance(data, dict) and '@graph' not in data:
+        return data
+
+    items: Iterable = data.get('@graph', []) if isinstance(data, dict) else (data or [])
+    candidate = None
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        if 'aggregateRating' in item:
+            return item
+        # Fallback: Prefer Movie/TVSeries if multiple exist
+        if not candidate and item.get('@type') in TITLE_ENTITY_TYPES:
+            candidate = item
+    return candidate
+
+def read_until_json_ld(chunks: Iterable[bytes], limit: int = 4 * 1024 * 1024) -> Tuple[bytes, bool]:
+    """
+    Consume a streamed response only as far as needed: until the first
+    JSON-LD block is complete, or </head> closes without one.
+
+    Returns (bytes read, complete) where complete=False means the block was
+    not found in the head and the caller may need the rest of the body.
+    """
+    buf = bytearray()
+    opening = None
+    # Each search only covers what the previous chunks could not have
+    # completed: an opening tag from its last unclosed '<', closing tags
+    # from the tail that could hold one split across chunks
+    open_from = 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        tail_from = max(0, len(buf) - 64)
+        buf.extend(chunk)
+        if opening is None:
+            opening = _JSON_LD_OPEN_BYTES.search(buf, open_from)
+        if opening:
+            if _SCRIPT_CLOSE_BYTES.search(buf, max(opening.end(), tail_from)):
+                return bytes(buf), True
+        else:
+            if _HEAD_CLOSE_BYTES.search(buf, tail_from):
+                return bytes(buf), False
+            tag_start = buf.rfind(b'<', open_from)
+            open_from = tag_start if tag_start != -1 and buf.find(b'>', tag_start) == -1 else len(buf)
+        if len(buf) >= limit:
+            break
+    return bytes(buf), False
+
+@lru_cache(maxsize=64)
+def _property_pattern(name: str) -> 're.Pattern':
+    # <strong class="ll rating_num" property="v:average">9.1</strong>
+    return re.compile(
+        r'<(\w+)\b[^>]*\bproperty\s*=\s*["\']' + re.escape(name) + r'["\'][^>]*>\s*([^<]*?)\s*</\1\s*>',
+        re.IGNORECASE
+    )
+
+def extract_property(html: str, name: str) -> Optional[str]:
+    """Text of the first element with property="{name}" (RDFa), stripped. Empty text gives None."""
+    match = _property_pattern(name).search(html)
+    if not match or not match.group(2):
+        return None
+    return match.group(2)
@@ -0,0 +1,114 @@
+"""
+Record-at-a-time JSON reading and writing, for datasets too large to hold twice.
+
+iter_records reads either a JSON array (what the scrapers write) or NDJSON
+(one record per line) and yields one record at a time, holding only the
+current chunk of the file. JsonArrayWriter writes records one at a time with
+the same layout as json.dump(records, f, indent=2), so a streamed animes.json
+is byte-identical to one written in full.
+"""
+import json
+import os
+from typing import Any, Dict, Iterator, TextIO
+
+CHUNK_CHARS = 1 << 16
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\r\n'
+
+def _iter_array(f: TextIO, buffer: str, chunk_chars: int) -> Iterator[Any]:
+    pos = buffer.index('[') + 1
+    eof = False
+    while True:
+        # Skip separators, refilling the buffer as needed
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE + ',':
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            buffer, pos = f.read(chunk_chars), 0
+            eof = not buffer
+        if pos >= len(buffer):
+            raise ValueError("Unterminated JSON array")
+        if buffer[pos] == ']':
+            return
+        try:
+            value, end = _decoder.raw_decode(buffer, pos)
+        except ValueError:
+            end = None
+        # A value ending at the buffer edge may be cut short (e.g. a number)
+        if end is None or (end == len(buffer) and not eof):
+            chunk = f.read(chunk_chars)
+            if not chunk:
+                if end is None:
+                    raise ValueError(f"Truncated JSON value at character {pos}")
+                eof = True
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        yield value
+        pos = end
+
+def iter_records(path: str, chunk_chars: int = CHUNK_CHARS) -> Iterator[Dict]:
+    """Records of a JSON array or NDJSON file, one at a time."""
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = f.read(chunk_chars)
+        first = buffer.lstrip(_WHITESPACE)[:1]
+        if first == '[':
+            yield from _iter_array(f, buffer, chunk_chars)
+            return
+        f.seek(0)
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+class JsonArrayWriter:
+    """
+    Writes a JSON array one record at a time (json.dump(..., indent=2) layout)
+    to a temporary file that replaces `path` on close, unless the content is
+    unchanged. `changed` tells which happened.
+
+        with JsonArrayWriter(path) as out:
+            for record in records:
+                out.write(record)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.tmp_path = path + '.tmp'
+        self.count = 0
+        self.changed = False
+        self._f = None
+
+    def __enter__(self) -> 'JsonArrayWriter':
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._f = open(self.tmp_path, 'w', encoding='utf-8')
+        return self
+
+    def write(self, record: Any):
+        text = json.dumps(record, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+        self._f.write(('[\n  ' if self.count == 0 else ',\n  ') + text)
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        self._f.write('\n]' if self.count else '[]')
+        self._f.close()
+        if exc_type is not None:
+            os.remove(self.tmp_path)
+            return False
+        if _same_content(self.tmp_path, self.path):
+            os.remove(self.tmp_path)
+        else:
+            os.replace(self.tmp_path, self.path)
+            self.changed = True
+        return False
+
+def _same_content(a: str, b: str, chunk_bytes: int = 1 << 20) -> bool:
+    if not os.path.exists(b) or os.path.getsize(a) != os.path.getsize(b):
+        return False
+    with open(a, 'rb') as fa, open(b, 'rb') as fb:
+        while True:
+            block = fa.read(chunk_bytes)
+            if block != fb.read(chunk_bytes):
+                return False
+            if not block:
+                return True
@@ -0,0 +1,158 @@
+"""
+Search-query variants and a run-wide memo of provider results.
+
+enrich_anime sends one cleaned title per provider. When that misses, a
+cheaper or broader query often hits: the title without its season marker,
+the romaji/ASCII part of a mixed title, or the franchise base. Results are
+memoized per (provider, normalized query) so franchise prefixes shared by
+many records reach the network once.
+
+A broader query also finds the franchise's other seasons, so its results
+are only trusted when the candidate's year matches exactly or one of its
+titles carries the same season number as the original title.
+"""
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple, TypeVar
+
+from lib.candidate_scoring import best_candidate
+from lib.text_cleaner import SEASON_STRIP_PATTERNS, clean_bahamut_title, normalize_for_match
+
+T = TypeVar('T')
+
+# Variants tried per title (the cleaned title included); each miss costs a request
+MAX_VARIANTS = 3
+# Broader variants with fewer letters are too generic to search for
+MIN_VARIANT_CHARS = 4
+
+_SEASON_STRIP = re.compile('|'.join(SEASON_STRIP_PATTERNS), re.IGNORECASE)
+_NON_ASCII = re.compile(r'[^\x00-\x7f]+')
+# "Title: Subtitle", "Title - Subtitle", "Title～Subtitle～"
+_SUBTITLE = re.compile(r'\s*(?:[:：~～]|\s[-–—]\s).*$')
+_EDGE_PUNCTUATION = re.compile(r'^[\s\-–—:：~～×・,.]+|[\s\-–—:：~～×・,.]+$')
+_WHITESPACE = re.compile(r'\s+')
+_NUMBER = re.compile(r'\d+')
+_ROMAN = {'ii': 2, 'iii': 3, 'iv': 4, 'v': 5, 'vi': 6, 'vii': 7, 'viii': 8, 'ix': 9, 'x': 10}
+
+def _tidy(text: str) -> str:
+    return _EDGE_PUNCTUATION.sub('', _WHITESPACE.sub(' ', text))
+
+def strip_season(title: str) -> str:
+    """Title without season / part markers, case kept: "呪術廻戦 第2期" -> "呪術廻戦"."""
+    return _tidy(_SEASON_STRIP.sub(' ', unicodedata.normalize('NFKC', title)))
+
+def ascii_part(title: str) -> str:
+    """Romaji / English part of a mixed title: "SPY×FAMILY 間諜家家酒" -> "SPY FAMILY"."""
+    return _tidy(_NON_ASCII.sub(' ', unicodedata.normalize('NFKC', title)))
+
+def base_title(title: str) -> str:
+    """Franchise base: no season marker and no subtitle ("Title: Subtitle 2" -> "Title")."""
+    return _tidy(_SUBTITLE.sub('', strip_season(title)))
+
+def season_numbers(title: Optional[str]) -> FrozenSet[int]:
+    """Numbers of a title's season / part markers: "Dr.STONE 第4期" and "Dr. Stone 4th Season" -> {4}."""
+    numbers = set()
+    for match in _SEASON_STRIP.finditer(unicodedata.normalize('NFKC', title or '')):
+        marker = normalize_for_match(match.group(0))
+        digits = _NUMBER.search(marker)
+        if digits:
+            numbers.add(int(digits.group(0)))
+        elif marker in _ROMAN:
+            numbers.add(_ROMAN[marker])
+    return frozenset(numbers)
+
+def query_variants(title: Optional[str], limit: int = MAX_VARIANTS) -> List[str]:
+    """
+    Ordered, deduplicated search queries for a (Bahamut) title, most specific first:
+        1. the cleaned title (clean_bahamut_title)
+        2. without season / part markers
+        3. the ASCII (romaji / English) part of 2., when the title mixes scripts
+        4. the franchise base (no subtitle)
+    Variants are deduplicated on normalize_for_match; broader ones with fewer
+    than MIN_VARIANT_CHARS letters are dropped.
+    """
+    cleaned = clean_bahamut_title(title)
+    if not cleaned:
+        return []
+
+    variants, seen = [], set()
+    stripped = strip_season(cleaned)
+    for i, variant in enumerate((cleaned, stripped, ascii_part(stripped), base_title(cleaned))):
+        key = normalize_for_match(variant)
+        if not key or key in seen or (i and sum(c.isalpha() for c in key) < MIN_VARIANT_CHARS):
+            continue
+        seen.add(key)
+        variants.append(variant)
+        if len(variants) >= limit:
+            break
+    return variants
+
+class QueryMemo:
+    """
+    Thread-safe (provider, normalized query) -> result store, kept for the
+    whole run. None means the request failed and is not stored, so it is
+    retried; empty result lists are stored.
+    """
+
+    def __init__(self):
+        self._store: Dict[Tuple[str, str], object] = {}
+        self._lock = threading.Lock()
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+
+    def fetch(self, provider: str, query: str, fn: Callable[[str], Optional[T]]) -> Optional[T]:
+        key = (provider, normalize_for_match(query))
+        with self._lock:
+            if key in self._store:
+                self.hits[provider] += 1
+                return self._store[key]
+            self.misses[provider] += 1
+
+        result = fn(query)
+        if result is not None:
+            with self._lock:
+                self._store[key] = result
+        return result
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {p: {'hits': self.hits[p], 'misses': self.misses[p]} for p in sorted(set(self.hits) | set(self.misses))}
+
+    def clear(self):
+        with self._lock:
+            self._store.clear()
+            self.hits.clear()
+            self.misses.clear()
+
+# Shared by mal_api and imdb_api (DoubanClient caches its own suggestions the same way)
+query_memo = QueryMemo()
+
+def first_confident(variants: List[str], fetch: Callable[[str], Optional[List[Dict]]],
+                    rank: Callable[[List[Dict]], List[Dict]], min_confidence: float) -> Optional[Dict]:
+    """
+    Try each variant in order: fetch its results, rank them (against the
+    caller's original titles) and return the first candidate that clears
+    min_confidence (as best_candidate does). Candidates found by a broader
+    variant must also pass broad_match.
+    """
+    seasons = season_numbers(variants[0]) if variants else frozenset()
+    for i, variant in enumerate(variants):
+        results = fetch(variant)
+        if results:
+            ranked = rank(results)
+            best = best_candidate(ranked, min_confidence)
+            if best and (i == 0 or broad_match(ranked[0], seasons)):
+                return best
+    return None
+
+def broad_match(ranked: Dict, seasons: FrozenSet[int]) -> bool:
+    """
+    A ranked candidate (lib.candidate_scoring) from a broader query: the same
+    year, or a title with the original's season numbers. Otherwise it is
+    likely an earlier season of a sequel the provider does not list yet.
+    """
+    if ranked.get('year') == 1.0:
+        return True
+    return bool(seasons) and any(seasons <= season_numbers(title)
+                                 for title in ranked['candidate'].get('titles') or () if title)
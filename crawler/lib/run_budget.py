@@ -0,0 +1,120 @@
+"""
+Time-boxed runs: a wall-clock budget, popularity-first ordering and a
+checkpoint of where the last unfinished pass stopped.
+
+A pass walks the prioritized titles over one or more runs. Each run skips the
+ids the current pass already handled and records what is left; once nothing
+is left the pass is marked complete and the next run starts a new one.
+"""
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# Assumed cost of the first item, before any has been timed
+DEFAULT_ITEM_SECONDS = 5.0
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)\s*([hms]?)')
+_DURATION_UNITS = {'h': 3600, 'm': 60, 's': 1, '': 1}
+
+def parse_duration(text: str) -> float:
+    """'30m', '1h30m', '90s', '45' (seconds) -> seconds."""
+    text = str(text).strip().lower()
+    parts = _DURATION_PART.findall(text)
+    if not parts or _DURATION_PART.sub('', text).strip():
+        raise ValueError(f"Invalid duration: {text!r} (e.g. 30m, 1h30m, 90s)")
+    return sum(float(value) * _DURATION_UNITS[unit] for value, unit in parts)
+
+def priority_key(anime: Dict) -> Tuple[int, int, int]:
+    """Most-watched first, then most-voted on Bahamut, then newest."""
+    return (
+        anime.get('popularity') or 0,
+        anime.get('ratings', {}).get('bahamut', {}).get('votes') or 0,
+        anime.get('year') or 0,
+    )
+
+def prioritize(animes: Iterable[Dict]) -> List[Dict]:
+    """Records in processing order (stable for equal keys)."""
+    return sorted(animes, key=priority_key, reverse=True)
+
+class RunBudget:
+    """
+    Wall-clock budget for a run. `exhausted()` is true once the remaining
+    time would not fit another item, judged by the slowest item so far, so a
+    run stops before the budget rather than after it. No budget never runs out.
+    """
+
+    def __init__(self, seconds: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.seconds = seconds
+        self.clock = clock
+        self.started = clock()
+        self.items = 0
+        self.slowest = 0.0
+        self._item_started: Optional[float] = None
+
+    def elapsed(self) -> float:
+        return self.clock() - self.started
+
+    def remaining(self) -> float:
+        return float('inf') if self.seconds is None else self.seconds - self.elapsed()
+
+    def start_item(self):
+        self._item_started = self.clock()
+
+    def finish_item(self):
+        if self._item_started is not None:
+            self.slowest = max(self.slowest, self.clock() - self._item_started)
+            self._item_started = None
+        self.items += 1
+
+    def exhausted(self) -> bool:
+        if self.seconds is None:
+            return False
+        return self.remaining() < (self.slowest if self.items else DEFAULT_ITEM_SECONDS)
+
+class Checkpoint:
+    """
+    JSON record of the current pass of one stage:
+        {stage, updated, complete, processed: [ids], pending: [ids]}
+    `pending` is in priority order, as of the run that wrote it.
+    """
+
+    def __init__(self, path: str, stage: str):
+        self.path = path
+        self.stage = stage
+        self.processed: Set[str] = set()
+        self.resumed = False
+
+    def load(self) -> Set[str]:
+        """Ids handled earlier in the unfinished pass (empty when starting a new pass)."""
+        if not os.path.exists(self.path):
+            return set()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except Exception:
+            return set()
+        if state.get('stage') != self.stage or state.get('complete'):
+            return set()
+        self.processed = set(state.get('processed', []))
+        self.resumed = True
+        return set(self.processed)
+
+    def mark(self, item_id: str):
+        self.processed.add(str(item_id))
+
+    def save(self, pending: List[str]):
+        state = {
+            'stage': self.stage,
+            'updated': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'complete': not pending,
+            'processed': sorted(self.processed),
+            'pending': [str(item_id) for item_id in pending],
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,95 @@
+"""
+Title search index written into the frontend bundle (search.json).
+
+Every row's title variants (cleaned Bahamut title, titleOriginal,
+titleEnglish) are normalized with normalize_for_match, spaces removed, and
+split into character n-grams (NGRAM = 2, suits CJK titles). Each n-gram maps
+to the sorted row ids containing it, delta-encoded:
+
+    {"format": 2, "n": 2,
+     "normalization": {"seasonRules": [[regex, replacement], ...], "separators": regex},
+     "keys": ["呪術廻戦\\n咒術迴戰", ...],          # per row, variants joined by "\\n"
+     "postings": {"呪術": [3, 17, 2], ...}}        # row ids 3, 20, 22
+
+A query is normalized the same way (NFKC, lowercase, the exported rules,
+spaces removed). Rule replacements use JavaScript's String.replace syntax
+($1 for a group), ready for `query.replace(new RegExp(regex, 'g'), replacement)`. Intersecting the posting lists of its n-grams gives the
+candidate rows and a substring check against `keys` confirms them, so the
+cost follows the number of matches rather than the catalog size. Queries
+shorter than n scan `keys`.
+"""
+import re
+from typing import Dict, List, Optional
+
+from lib.text_cleaner import SEASON_MARKER_RULES, SEPARATOR_PATTERN, clean_bahamut_title, normalize_for_match
+
+SEARCH_INDEX_FORMAT = 2
+NGRAM = 2
+TITLE_FIELDS = ('title', 'titleOriginal', 'titleEnglish')
+
+_PY_GROUP_REF = re.compile(r'\\(\d)')
+
+def js_replacement(replacement: str) -> str:
+    """Python re.sub replacement -> JavaScript String.replace: r' \1 ' -> ' $1 ' ('$' escaped as '$$')."""
+    return _PY_GROUP_REF.sub(r'$\1', replacement.replace('$', '$$'))
+
+def search_key(text: Optional[str]) -> str:
+    """normalize_for_match without spaces: "Re：ゼロ" and "re ゼロ" both give "reゼロ"."""
+    return normalize_for_match(text).replace(' ', '')
+
+def row_keys(anime: Dict) -> List[str]:
+    """Distinct search keys of a record's title variants."""
+    keys = (search_key(clean_bahamut_title(anime.get(field))) for field in TITLE_FIELDS)
+    return [key for key in dict.fromkeys(keys) if key]
+
+def ngrams(key: str, n: int = NGRAM) -> List[str]:
+    return list(dict.fromkeys(key[i:i + n] for i in range(len(key) - n + 1)))
+
+def _delta_encode(rows: List[int]) -> List[int]:
+    return [row - previous for previous, row in zip([0] + rows, rows)]
+
+def _delta_decode(deltas: List[int]) -> List[int]:
+    rows, total = [], 0
+    for delta in deltas:
+        total += delta
+        rows.append(total)
+    return rows
+
+def build_search_index(animes: List[Dict], n: int = NGRAM) -> Dict:
+    keys = [row_keys(anime) for anime in animes]
+    postings: Dict[str, List[int]] = {}
+    for row, row_variants in enumerate(keys):
+        grams = dict.fromkeys(gram for key in row_variants for gram in ngrams(key, n))
+        for gram in grams:
+            postings.setdefault(gram, []).append(row)
+    return {
+        'format': SEARCH_INDEX_FORMAT,
+        'n': n,
+        'normalization': {'seasonRules': [[pattern, js_replacement(replacement)]
+                                          for pattern, replacement in SEASON_MARKER_RULES],
+                          'separators': SEPARATOR_PATTERN},
+        'keys': ['\n'.join(row_variants) for row_variants in keys],
+        'postings': {gram: _delta_encode(rows) for gram, rows in postings.items()},
+    }
+
+def search(index: Dict, query: str) -> List[int]:
+    """Row ids whose title variants contain the query (reference for the client lookup)."""
+    key = search_key(query)
+    if not key:
+        return []
+    n = index['n']
+    if len(key) < n:
+        candidates = range(len(index['keys']))
+    else:
+        lists = []
+        for gram in ngrams(key, n):
+            if gram not in index['postings']:
+                return []
+            lists.append(index['postings'][gram])
+        # Start from the shortest list; the rest only filter it
+        lists.sort(key=len)
+        candidates = set(_delta_decode(lists[0]))
+        for deltas in lists[1:]:
+            candidates.intersection_update(_delta_decode(deltas))
+        candidates = sorted(candidates)
+    return [row for row in candidates if key in index['keys'][row]]
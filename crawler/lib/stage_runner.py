@@ -0,0 +1,111 @@
+"""
+Streaming stages connected by bounded queues.
+
+    source -> [stage 1: N workers] -> queue -> [stage 2: M workers] -> ... -> results
+
+A feeder thread pulls records from the source iterator; every stage runs its
+function on its own worker threads and hands results on through a queue of at
+most `queue_size` items, so a fast stage waits for a slow one instead of
+buffering the whole catalog. A function returning None drops the record; an
+exception is logged and drops it too. Results come back in source order.
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 32
+
+_END = object()
+
+class Stage:
+    def __init__(self, name: str, fn: Callable[[Any], Optional[Any]], workers: int = 1):
+        if workers < 1:
+            raise ValueError(f"Stage {name} needs at least one worker")
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.stats = {'received': 0, 'emitted': 0, 'dropped': 0, 'errors': 0, 'seconds': 0.0}
+        self._lock = threading.Lock()
+        self._running = workers
+
+    def _count(self, **deltas):
+        with self._lock:
+            for key, value in deltas.items():
+                self.stats[key] += value
+
+    def _finish(self) -> bool:
+        """True for the last worker of the stage to finish."""
+        with self._lock:
+            self._running -= 1
+            return self._running == 0
+
+def _feed(source: Iterable[Any], out: queue.Queue, receivers: int, should_stop: Optional[Callable[[], bool]]):
+    try:
+        for seq, item in enumerate(source):
+            if should_stop and should_stop():
+                logger.info("Pipeline stopped feeding new records.")
+                break
+            out.put((seq, item))
+    except Exception as e:
+        logger.error(f"Pipeline source failed: {e}")
+    finally:
+        for _ in range(receivers):
+            out.put(_END)
+
+def _work(stage: Stage, inbox: queue.Queue, out: queue.Queue, receivers: int):
+    while True:
+        entry = inbox.get()
+        if entry is _END:
+            break
+        seq, item = entry
+        stage._count(received=1)
+        start = time.perf_counter()
+        try:
+            result = stage.fn(item)
+        except Exception as e:
+            logger.error(f"[{stage.name}] record {seq} failed: {e}")
+            stage._count(errors=1, dropped=1, seconds=time.perf_counter() - start)
+            continue
+        stage._count(seconds=time.perf_counter() - start)
+        if result is None:
+            stage._count(dropped=1)
+            continue
+        stage._count(emitted=1)
+        out.put((seq, result))
+    if stage._finish():
+        for _ in range(receivers):
+            out.put(_END)
+
+def run_stages(source: Iterable[Any], stages: List[Stage], queue_size: int = QUEUE_SIZE,
+               should_stop: Optional[Callable[[], bool]] = None) -> Tuple[List[Any], Dict[str, Dict]]:
+    """
+    Stream `source` through `stages`. Returns (results in source order,
+    {stage name: {'received', 'emitted', 'dropped', 'errors', 'seconds'}}); `seconds`
+    is time spent in the stage function, summed over its workers.
+    `should_stop()` (optional) is checked before each new record is fed.
+    """
+    queues = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+    receivers = [stage.workers for stage in stages] + [1]
+    threads = [threading.Thread(target=_feed, args=(source, queues[0], receivers[0], should_stop),
+                                name='pipeline-source', daemon=True)]
+    for i, stage in enumerate(stages):
+        for n in range(stage.workers):
+            threads.append(threading.Thread(target=_work, args=(stage, queues[i], queues[i + 1], receivers[i + 1]),
+                                            name=f'pipeline-{stage.name}-{n}', daemon=True))
+    for thread in threads:
+        thread.start()
+
+    results = []
+    while True:
+        entry = queues[-1].get()
+        if entry is _END:
+            break
+        results.append(entry)
+    for thread in threads:
+        thread.join()
+    results.sort(key=lambda entry: entry[0])
+    return [item for _, item in results], {stage.name: dict(stage.stats) for stage in stages}
@@ -1,55 +1,120 @@
 import re
 import unicodedata
 import logging
+from functools import lru_cache
+from typing import Iterable, List, Optional, Pattern, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on memoized titles. AOD titles + synonyms are ~150k strings;
+# Bahamut adds a few thousand. Beyond this we simply recompute.
+NORMALIZE_CACHE_SIZE = 262144
+CLEAN_CACHE_SIZE = 16384
+
+# Season markers rewritten to plain numbers before punctuation is stripped.
+# Applied in order. Entries are (regex, replacement) so new markers are a data change.
+# AOD often uses "Title 2" or "Title Season 2", so "第2期" -> " 2 ".
+SEASON_MARKER_RULES: Tuple[Tuple[str, str], ...] = (
+    # 第2期 -> 2
+    (r'第\s*(\d+)\s*期', r' \1 '),
+    # 參之章 (Season 3) - Specific to Fire Force but might appear elsewhere
+    (r'參之章', ' 3 '),
+    (r'弐ノ章', ' 2 '),
+)
+
+# Separators that often differ between databases:
+# - Colons (Re:Zero vs Re Zero)
+# - Dashes (Sword Art Online - Progressive vs Sword Art Online Progressive)
+# - Exclamations (K-On! vs K-On)
+SEPARATOR_PATTERN = r'[:\-–—!?,.~/""「」『』]'
+
+# Bahamut suffixes in parenthesis: (電影版), (OVA), (TV), (特別篇)...
+# Targets specific known keywords so titles like "(2011)" are kept.
+BAHAMUT_SUFFIX_KEYWORDS = ['電影版', '劇場版', 'OVA', 'OAD', 'TV', '特別篇', '總集篇', '無修', '重製版']
+
+# Bahamut release-type labels -> AOD type vocabulary (TV, MOVIE, OVA, ONA, SPECIAL, MUSIC).
+# Bahamut marks these as "[電影]", "[特別篇]", "(TV版)", "(電影版)" or a "劇場版" prefix.
+BAHAMUT_TYPE_LABELS = {
+    '電影': 'MOVIE',
+    '電影版': 'MOVIE',
+    '劇場版': 'MOVIE',
+    'OVA': 'OVA',
+    'OAD': 'OVA',
+    '特別篇': 'SPECIAL',
+    '總集篇': 'SPECIAL',
+    'TV': 'TV',
+    'TV版': 'TV',
+}
+# Labels that mark the type even outside brackets ("劇場版 GIVEN ...")
+_INLINE_MOVIE_LABELS = ('劇場版', '電影版')
+
+# Season / part markers (lowercase forms; matched after NFKC + lowercase).
+SEASON_STRIP_PATTERNS: Tuple[str, ...] = (
+    r'第\s*[\d一二三四五六七八九十]+\s*[季期部章]',
+    r'[參弐][之ノ]章',
+    r'(?:the\s+)?final\s+season',
+    r'\d+(?:st|nd|rd|th)\s+season',
+    r'season\s*\d+',
+    r'part\s*\d+',
+    r'\s\d{1,2}$',  # "Title 2"
+    r'\s(?:i{2,3}|iv|vi{0,2})$',  # "Title III"
+)
+
+# Markers that tell installments of one franchise apart: seasons plus movies
+# and specials. franchise_key drops them.
+FRANCHISE_MARKER_PATTERNS: Tuple[str, ...] = SEASON_STRIP_PATTERNS + (
+    r'劇場版|電影版|特別篇|總集篇',
+    r'\b(?:ova|oad)\b',
+)
+
+_SEASON_MARKERS: List[Tuple[Pattern, str]] = [(re.compile(p), r) for p, r in SEASON_MARKER_RULES]
+_SEPARATORS = re.compile(SEPARATOR_PATTERN)
+_WHITESPACE = re.compile(r'\s+')
+_BRACKET_TAGS = re.compile(r'\s*\[[^\]]*\]')
+_BAHAMUT_SUFFIXES = re.compile(r'\s*\((?:' + '|'.join(BAHAMUT_SUFFIX_KEYWORDS) + r')[^)]*\)')
+_FRANCHISE_MARKERS = re.compile('|'.join(FRANCHISE_MARKER_PATTERNS))
+_BAHAMUT_TYPE_TAG = re.compile(
+    r'[\[(]\s*(' + '|'.join(sorted(BAHAMUT_TYPE_LABELS, key=len, reverse=True)) + r')\s*[\])]'
+)
+
 def normalize_for_match(text: str) -> str:
     """
     Normalize text for "Fuzzy-Exact" matching.
     1. NFKC normalization (Full-width -> Half-width).
     2. Lowercase.
-    3. Remove specific punctuation/separators that cause mismatch.
+    3. Rewrite season markers (SEASON_MARKER_RULES) to numbers.
+    4. Replace separators that cause mismatch with spaces, collapse whitespace.
+
+    Results are memoized (bounded by NORMALIZE_CACHE_SIZE).
     """
     if not text:
         return ""
-    
+    return _normalize_cached(text)
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize_cached(text: str) -> str:
     # 1. NFKC Normalization (e.g., Ａ -> A, １ -> 1, 　 -> space)
-    normalized = unicodedata.normalize('NFKC', text)
-    
+    # is_normalized is a fast scan that avoids building a copy for already-clean text
+    if not unicodedata.is_normalized('NFKC', text):
+        text = unicodedata.normalize('NFKC', text)
+
     # 2. Lowercase
-    normalized = normalized.lower()
-    
-    # 3. Strip aggressive punctuation
-    # We remove things that often differ between databases:
-    # - Colons (Re:Zero vs Re Zero)
-    # - Dashes (Sword Art Online - Progressive vs Sword Art Online Progressive)
-    # - Exclamations (K-On! vs K-On)
-    # - Spaces (remove all spaces to be super robust? Or normalize to single space?)
-    
-    # 3.1 Handle Japanese Season markers common in Bahamut but maybe not in AOD synonyms
-    # "第2期" -> " 2nd Season" or just " 2"
-    # AOD often uses "Title 2" or "Title Season 2"
-    # Let's try to normalize to " 2" to match "Title 2" patterns if we strip "Season" later?
-    # Or keep it simple: normalize to numbers.
-    
-    # 第2期 -> 2
-    normalized = re.sub(r'第\s*(\d+)\s*期', r' \1 ', normalized)
-    
-    # 參之章 (Season 3) - Specific to Fire Force but might appear elsewhere
-    normalized = normalized.replace('參之章', ' 3 ')
-    normalized = normalized.replace('弐ノ章', ' 2 ')
-    
-    # 続編 -> Season 2 (or just strip it?)
-    # "怪獣8号 続編" -> "Kaiju 8-gou Sequel"
-    
-    # Replace standard separators with space
-    normalized = re.sub(r'[:\-–—!?,.~/""''「」『』]', ' ', normalized)
-    
-    # Collapse multiple spaces and strip
-    normalized = re.sub(r'\s+', ' ', normalized).strip()
-    
-    return normalized
+    normalized = text.lower()
+
+    # 3. Season markers
+    for pattern, replacement in _SEASON_MARKERS:
+        normalized = pattern.sub(replacement, normalized)
+
+    # 4. Separators -> space, then collapse multiple spaces and strip
+    normalized = _SEPARATORS.sub(' ', normalized)
+    return _WHITESPACE.sub(' ', normalized).strip()
+
+def normalize_many(texts: Iterable[str]) -> List[str]:
+    """
+    Batch version of normalize_for_match; output order matches input order.
+    Duplicates (within the batch or across calls) are served from the cache.
+    """
+    return [_normalize_cached(text) if text else "" for text in texts]
 
 def clean_bahamut_title(title: str) -> str:
     """
@@ -62,21 +127,60 @@ def clean_bahamut_title(title: str) -> str:
     """
     if not title:
         return ""
-    
-    cleaned = title
-    
+    return _clean_bahamut_cached(title)
+
+@lru_cache(maxsize=CLEAN_CACHE_SIZE)
+def _clean_bahamut_cached(title: str) -> str:
     # 1. Remove [1], [2], [12.5], [無修], [先行版] etc.
-    # Pattern: Space (optional) + [ + anything + ]
-    # We anchor to the end or check if it looks like metadata
-    cleaned = re.sub(r'\s*\[[^\]]*\]', '', cleaned)
-    
-    # 2. Remove common Bahamut suffixes in parenthesis
-    # These are usually (電影版), (OVA), (TV), (特別篇)
-    # Be careful not to remove (2011) if it distinguishes the show, 
-    # BUT AOD usually puts year in a separate field.
-    # Let's target specific known keywords to be safe.
-    keywords = ['電影版', '劇場版', 'OVA', 'OAD', 'TV', '特別篇', '總集篇', '無修', '重製版']
-    pattern = r'\s*\((?:' + '|'.join(keywords) + r')[^)]*\)'
-    cleaned = re.sub(pattern, '', cleaned)
-    
+    cleaned = _BRACKET_TAGS.sub('', title)
+
+    # 2. Remove known Bahamut suffixes in parenthesis
+    cleaned = _BAHAMUT_SUFFIXES.sub('', cleaned)
+
     return cleaned.strip()
+
+def franchise_key(title: str) -> str:
+    """
+    Match key shared by every installment of a franchise: the cleaned Bahamut
+    title without season / part / movie / special markers, normalized.
+    Falls back to the plain normalized title when only markers remain.
+
+    Examples:
+    - "咒術迴戰 第二季 [1]" -> "咒術迴戰"
+    - "間諜家家酒 劇場版 [電影]" -> "間諜家家酒"
+    - "進擊的巨人 The Final Season [無修]" -> "進擊的巨人"
+    """
+    if not title:
+        return ""
+    return _franchise_key_cached(title)
+
+@lru_cache(maxsize=CLEAN_CACHE_SIZE)
+def _franchise_key_cached(title: str) -> str:
+    cleaned = unicodedata.normalize('NFKC', clean_bahamut_title(title)).lower()
+    base = normalize_for_match(_FRANCHISE_MARKERS.sub(' ', cleaned))
+    return base or normalize_for_match(cleaned)
+
+def extract_bahamut_type(title: str) -> Optional[str]:
+    """
+    Read the release type from a raw Bahamut title, in AOD vocabulary.
+
+    Examples:
+    - "熊貓大冒險 [電影]" -> "MOVIE"
+    - "SK8 the infinity EXTRA PART [特別篇]" -> "SPECIAL"
+    - "叫我對大哥 (TV版) [1]" -> "TV"
+    - "鬼滅之刃 柱訓練篇 [1]" -> None (unlabeled; most TV series)
+    """
+    if not title:
+        return None
+    match = _BAHAMUT_TYPE_TAG.search(title)
+    if match:
+        return BAHAMUT_TYPE_LABELS[match.group(1)]
+    if any(label in title for label in _INLINE_MOVIE_LABELS):
+        return 'MOVIE'
+    return None
+
+def clear_caches():
+    """Drop memoized results (e.g. between benchmark runs)."""
+    _normalize_cached.cache_clear()
+    _clean_bahamut_cached.cache_clear()
+    _franchise_key_cached.cache_clear()
@@ -0,0 +1,222 @@
+"""
+Schema-driven dataset validation.
+
+Every rule of the schema is a check on one value of one column (nested
+ratings as dotted columns, ratings.imdb.score). validate_records reads the
+records into those columns once and runs each rule down its column;
+StreamValidator runs the same rules on one record at a time and keeps only
+counters and the failing ids. Both are plain Python loops: the checks are
+type tests on mixed objects. The report is plain JSON:
+
+    {"count": 1745, "passed": true,
+     "checks": [{"rule": "required:episodes", "severity": "warning",
+                 "failed": 275, "ids": ["112233", ...]}, ...],
+     "coverage": {"titleOriginal": {"present": 1688, "ratio": 0.967, "min": 0.7,
+                                    "severity": "warning", "passed": true},
+                  "ratings.imdb": {...}, ...}}
+
+"passed" is false when the record count is below minCount, an error-severity
+check fails or an error-severity coverage ratio is below its minimum;
+warnings never fail. DEFAULT_SCHEMA only warns (a short dataset is the one
+failure, as validate_data always had it); STRICT_SCHEMA makes missing ids or
+titles and low coverage errors.
+"""
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Vote counts live under 'votes' except on MAL, which reports members
+RATING_VOTES = {'bahamut': 'votes', 'imdb': 'votes', 'douban': 'votes', 'myanimelist': 'members'}
+
+DEFAULT_SCHEMA: Dict[str, Any] = {
+    # Present and non-empty (0 and [] count as missing, as before)
+    'required': {
+        'id': 'warning', 'title': 'warning', 'bahamutUrl': 'warning', 'thumbnail': 'warning', 'year': 'warning',
+        'episodes': 'warning', 'genres': 'warning', 'popularity': 'warning', 'ratings': 'warning',
+    },
+    # platform -> score range; a present score must be a number in it
+    'ratings': {'bahamut': (1.0, 5.0), 'imdb': (0.0, 10.0), 'douban': (0.0, 10.0), 'myanimelist': (0.0, 10.0)},
+    # Platforms every record should be rated on
+    'requiredRatings': ('bahamut',),
+    'year': {'min': 1950, 'maxAhead': 1},
+    # column -> minimum share of records having it (None: reported only)
+    'coverage': {
+        'titleOriginal': 0.7,
+        'ratings.bahamut': None, 'ratings.imdb': None, 'ratings.douban': None, 'ratings.myanimelist': None,
+    },
+    'coverageSeverity': 'warning',
+    'minCount': 0,
+}
+
+# Opt-in (validate_data --strict): records without id or title and coverage below target fail
+STRICT_SCHEMA: Dict[str, Any] = dict(
+    DEFAULT_SCHEMA,
+    required=dict(DEFAULT_SCHEMA['required'], id='error', title='error'),
+    coverageSeverity='error',
+)
+
+# (rule, severity, column, failed(value))
+Rule = Tuple[str, str, str, Callable[[Any], bool]]
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _missing(value: Any) -> bool:
+    return not value
+
+def _present(value: Any) -> bool:
+    return value is not None and value != '' and value != 0
+
+def _rules(schema: Dict) -> List[Rule]:
+    rules = [(f'required:{field}', severity, field, _missing) for field, severity in schema['required'].items()]
+
+    def bad_votes(count: Any) -> bool:
+        return count is not None and not (_is_int(count) and count >= 0)
+
+    for platform, (low, high) in schema['ratings'].items():
+        # None is "not rated yet" (e.g. MAL titles without a score); anything else must be a number in range
+        def bad_score(score: Any, low: float = low, high: float = high) -> bool:
+            return score is not None and not (_is_number(score) and low <= score <= high)
+        rules.append((f'rating:{platform}.score', 'warning', f'ratings.{platform}.score', bad_score))
+        rules.append((f'rating:{platform}.votes', 'warning', f'ratings.{platform}.votes', bad_votes))
+        if platform in schema['requiredRatings']:
+            rules.append((f'rating:{platform}.present', 'warning', f'ratings.{platform}.score',
+                          lambda score: not _is_number(score)))
+
+    low = schema['year']['min']
+    high = datetime.now().year + schema['year']['maxAhead']
+    rules.append(('year:range', 'warning', 'year', lambda year: not (_is_int(year) and low <= year <= high)))
+    return rules
+
+def _coverage_column(name: str) -> str:
+    return f'{name}.score' if name.startswith('ratings.') else name
+
+def _columns(schema: Dict) -> List[str]:
+    """The columns the schema reads, id first."""
+    columns = ['id'] + [column for _, _, column, _ in _rules(schema)]
+    columns += [_coverage_column(name) for name in schema['coverage']]
+    return list(dict.fromkeys(columns))
+
+def _path(column: str) -> Tuple[str, ...]:
+    keys = column.split('.')
+    if len(keys) == 3 and keys[2] == 'votes':
+        keys[2] = RATING_VOTES.get(keys[1], 'votes')
+    return tuple(keys)
+
+def load_columns(records: List[Dict], schema: Dict = DEFAULT_SCHEMA) -> Dict[str, List[Any]]:
+    """The columns the schema reads: top-level fields plus ratings.<platform>.score/.votes."""
+    # Nested columns are read from their parent's column (ratings -> ratings.imdb -> ratings.imdb.score)
+    read: Dict[Tuple[str, ...], List[Any]] = {(): records}
+
+    def column_of(path: Tuple[str, ...]) -> List[Any]:
+        if path not in read:
+            parent = column_of(path[:-1])
+            key = path[-1]
+            read[path] = [value.get(key) if isinstance(value, dict) else None for value in parent]
+        return read[path]
+
+    return {column: column_of(_path(column)) for column in _columns(schema)}
+
+def _row_id(anime_id: Any, row: int) -> str:
+    return str(anime_id) if anime_id is not None else f'#{row}'
+
+def _report(count: int, checks: List[Dict], present: Dict[str, int], schema: Dict) -> Dict[str, Any]:
+    report_coverage = {}
+    for name, minimum in schema['coverage'].items():
+        ratio = present[name] / count if count else None
+        report_coverage[name] = {'present': present[name], 'ratio': None if ratio is None else round(ratio, 4),
+                                 'min': minimum, 'severity': schema['coverageSeverity'],
+                                 'passed': minimum is None or ratio is None or ratio >= minimum}
+    count_ok = count >= schema['minCount']
+    return {
+        'count': count,
+        'minCount': schema['minCount'],
+        'passed': (count_ok
+                   and not any(check['failed'] for check in checks if check['severity'] == 'error')
+                   and all(entry['passed'] for entry in report_coverage.values() if entry['severity'] == 'error')),
+        'checks': checks,
+        'coverage': report_coverage,
+    }
+
+def validate_columns(columns: Dict[str, List[Any]], schema: Dict) -> Dict[str, Any]:
+    ids = [_row_id(value, row) for row, value in enumerate(columns['id'])]
+    checks = []
+    for rule, severity, column, failed in _rules(schema):
+        failing = [ids[row] for row, value in enumerate(columns[column]) if failed(value)]
+        checks.append({'rule': rule, 'severity': severity, 'failed': len(failing), 'ids': failing})
+    present = {name: sum(1 for value in columns[_coverage_column(name)] if _present(value))
+               for name in schema['coverage']}
+    return _report(len(ids), checks, present, schema)
+
+def validate_records(records: List[Dict], schema: Optional[Dict] = None) -> Dict[str, Any]:
+    """Validation report for the records (see module docstring)."""
+    schema = dict(DEFAULT_SCHEMA, **(schema or {}))
+    return validate_columns(load_columns(records, schema), schema)
+
+class StreamValidator:
+    """
+    validate_records for records seen one at a time (generate_json --stream).
+    add() runs every rule on the record and keeps running counts (records,
+    present values per coverage column) plus the ids of failing rows, which
+    the report lists; nothing else of the record is kept. report() gives the
+    same report as validate_records.
+    """
+
+    def __init__(self, schema: Optional[Dict] = None):
+        self.schema = dict(DEFAULT_SCHEMA, **(schema or {}))
+        self.rules = _rules(self.schema)
+        # (column, parent column or None for the record, key), parents first
+        self.steps: List[Tuple[str, Optional[str], str]] = []
+        for column in _columns(self.schema):
+            path = _path(column)
+            names = column.split('.')  # the votes column reads 'members' on MAL
+            for depth in range(1, len(path) + 1):
+                step = ('.'.join(names[:depth]), '.'.join(names[:depth - 1]) or None, path[depth - 1])
+                if step not in self.steps:
+                    self.steps.append(step)
+        self.coverage_columns = {name: _coverage_column(name) for name in self.schema['coverage']}
+        self.count = 0
+        self.failing: Dict[str, List[str]] = {rule: [] for rule, _, _, _ in self.rules}
+        self.present = dict.fromkeys(self.schema['coverage'], 0)
+
+    def add(self, record: Dict):
+        values: Dict[str, Any] = {}
+        for column, parent, key in self.steps:
+            source = record if parent is None else values[parent]
+            values[column] = source.get(key) if isinstance(source, dict) else None
+        row_id = _row_id(values['id'], self.count)
+        for rule, _, column, failed in self.rules:
+            if failed(values[column]):
+                self.failing[rule].append(row_id)
+        for name, column in self.coverage_columns.items():
+            if _present(values[column]):
+                self.present[name] += 1
+        self.count += 1
+
+    def report(self) -> Dict[str, Any]:
+        checks = [{'rule': rule, 'severity': severity, 'failed': len(self.failing[rule]),
+                   'ids': list(self.failing[rule])} for rule, severity, _, _ in self.rules]
+        return _report(self.count, checks, self.present, self.schema)
+
+def failed_ids(report: Dict[str, Any], severity: str = 'error') -> List[str]:
+    """Ids failing any check of the given severity, in report order."""
+    return list(dict.fromkeys(i for check in report['checks'] if check['severity'] == severity for i in check['ids']))
+
+def summary_lines(report: Dict[str, Any]) -> List[str]:
+    """Human-readable lines for logs and the validate_data CLI."""
+    lines = [f"{'✅' if report['count'] >= report['minCount'] else '❌'} {report['count']} records"
+             + (f" (minimum {report['minCount']})" if report['minCount'] else '')]
+    for check in report['checks']:
+        if check['failed']:
+            icon = '❌' if check['severity'] == 'error' else '⚠️'
+            sample = ', '.join(check['ids'][:5]) + (', ...' if check['failed'] > 5 else '')
+            lines.append(f"{icon} {check['rule']}: {check['failed']} records ({sample})")
+    for name, entry in report['coverage'].items():
+        target = f" (min {entry['min']:.0%})" if entry['min'] is not None else ''
+        icon = '✅' if entry['passed'] else '❌' if entry['severity'] == 'error' else '⚠️'
+        ratio = '-' if entry['ratio'] is None else f"{entry['ratio']:.1%}"
+        lines.append(f"{icon} coverage {name}: {ratio}{target}")
+    lines.append('✅ Validation passed' if report['passed'] else '❌ Validation failed')
+    return lines
@@ -1,8 +1,16 @@
+import os
+import threading
 import time
 import requests
 import logging
-from typing import Optional, Dict, Any
-from thefuzz import fuzz
+import sys
+from typing import Optional, Dict, Any, Iterable, List, Set
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from lib.candidate_scoring import score_candidates
+from lib.query_variants import first_confident, query_memo, query_variants
+from services.aod_service import accepted_aod_types
+from services.provider_base import AnimeProvider
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -10,97 +18,101 @@ logger = logging.getLogger(__name__)
 
 LAST_REQUEST_TIME = 0
 RATE_LIMIT_DELAY = 1.0  # Jikan allows ~3/sec, we play safe with 1/sec
+# Spacing is shared by every thread (pipeline.py may run several enrich workers)
+_RATE_LOCK = threading.Lock()
+
+# Overridable so the local stand-in server (mock_servers/jikan.py) can be used
+JIKAN_BASE_URL = os.environ.get('JIKAN_BASE_URL', 'https://api.jikan.moe/v4')
+JIKAN_SEASONS = ('winter', 'spring', 'summer', 'fall')
+SEASON_PAGE_SIZE = 25  # Jikan's maximum page size
+
+# Jikan `type` -> AOD vocabulary, for the candidate type feature
+JIKAN_TYPES = {'TV': 'TV', 'Movie': 'MOVIE', 'OVA': 'OVA', 'ONA': 'ONA', 'Special': 'SPECIAL', 'TV Special': 'SPECIAL'}
+MIN_CONFIDENCE = 0.65  # Below this a wrong pick is likelier than a right one
 
 def _rate_limit():
     global LAST_REQUEST_TIME
-    current_time = time.time()
-    elapsed = current_time - LAST_REQUEST_TIME
-    if elapsed < RATE_LIMIT_DELAY:
-        time.sleep(RATE_LIMIT_DELAY - elapsed)
-    LAST_REQUEST_TIME = time.time()
-
-def search_mal_by_japanese_title(japanese_title: str, year: int = None) -> Optional[Dict[str, Any]]:
-    """
-    Search MAL using Jikan API.
-    
-    Args:
-        japanese_title: The original Japanese title of the anime.
-        year: The release year (optional, used for validation/ranking).
-        
-    Returns:
-        Dict containing MAL ID, score, members, and external links (IMDb ID), or None if not found.
-    """
-    if not japanese_title:
-        return None
+    with _RATE_LOCK:
+        current_time = time.time()
+        elapsed = current_time - LAST_REQUEST_TIME
+        if elapsed < RATE_LIMIT_DELAY:
+            time.sleep(RATE_LIMIT_DELAY - elapsed)
+        LAST_REQUEST_TIME = time.time()
 
+def _fetch_mal_candidates(query: str) -> Optional[List[Dict]]:
+    """Raw Jikan /anime?q= results (top 5). None on request errors."""
     _rate_limit()
-    
-    url = "https://api.jikan.moe/v4/anime"
+
+    url = f"{JIKAN_BASE_URL}/anime"
     params = {
-        "q": japanese_title,
+        "q": query,
         "limit": 5,  # Fetch top 5 to find best match
-        "type": "tv", # Default to TV, but Bahamut has movies too... handle carefully.
-                      # Actually Bahamut mixes them. Let's not filter by type initially.
+        # No type filter: Bahamut mixes TV, movies and OVAs; type is a ranking feature instead
     }
-    
-    # Bahamut often has "Title [Season]" or "Title (Year)". 
-    # The 'japanese_title' from scraper is usually clean, but let's be careful.
-    
+
     try:
         response = requests.get(url, params=params, timeout=10)
         if response.status_code == 429:
             logger.warning("MAL API Rate Limit Hit. Sleeping 5s...")
             time.sleep(5)
-            return search_mal_by_japanese_title(japanese_title, year)
-        
+            return _fetch_mal_candidates(query)
+
         response.raise_for_status()
-        data = response.json()
-        
-        results = data.get('data', [])
-        if not results:
-            # Retry with less strict params? Or just return None.
-            # Sometimes titles are slightly different. 
-            return None
-            
-        # Find best match
-        best_match = None
-        best_score = 0
-        
-        for anime in results:
-            # Titles to check: default title, title_english, title_japanese
-            titles = [anime.get('title'), anime.get('title_english'), anime.get('title_japanese')]
-            titles = [t for t in titles if t] # Filter None
-            
-            # Fuzzy match score
-            current_score = 0
-            for t in titles:
-                score = fuzz.ratio(japanese_title.lower(), t.lower())
-                if score > current_score:
-                    current_score = score
-            
-            # Year penalty: if year is provided and differs significantly
-            anime_year = anime.get('year')
-            if year and anime_year:
-                if abs(anime_year - year) > 1:
-                    current_score -= 20 # Penalize wrong year
-            
-            if current_score > best_score:
-                best_score = current_score
-                best_match = anime
-        
-        if best_match and best_score > 60: # Threshold
-            return _process_mal_result(best_match)
-        
+        return response.json().get('data', [])
+    except Exception as e:
+        logger.error(f"Error searching MAL for '{query}': {e}")
         return None
 
-    except Exception as e:
-        logger.error(f"Error searching MAL for '{japanese_title}': {e}")
+def rank_mal_candidates(results: List[Dict], queries: List[str], year: int = None,
+                        anime_type: str = None) -> List[Dict]:
+    """Score Jikan search results against every title variant (see lib.candidate_scoring)."""
+    candidates = [
+        {
+            'titles': [anime.get('title'), anime.get('title_english'), anime.get('title_japanese')]
+                      + [t.get('title') for t in anime.get('titles') or []],
+            'year': anime.get('year') or (anime.get('aired') or {}).get('prop', {}).get('from', {}).get('year'),
+            'type': JIKAN_TYPES.get(anime.get('type')),
+            'anime': anime,
+        }
+        for anime in results
+    ]
+    return score_candidates(queries, candidates, year, accepted_aod_types(anime_type))
+
+def search_mal_by_japanese_title(japanese_title: str, year: int = None, anime_type: str = None,
+                                 alt_titles: List[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Search MAL using Jikan API.
+    
+    Args:
+        japanese_title: The original Japanese title of the anime.
+        year: The release year (optional, used for validation/ranking).
+        anime_type: AOD type or Bahamut label (optional, used for ranking).
+        alt_titles: Other known titles (e.g. English); scored as extra query variants.
+        
+    Returns:
+        Dict containing MAL ID, score, members, and external links (IMDb ID), or None if not found.
+    """
+    if not japanese_title:
         return None
 
+    # Broader variants (no season marker, romaji part...) only run when the
+    # previous one found nothing confident; ranking still uses the full titles
+    queries = [japanese_title] + (alt_titles or [])
+    best_match = first_confident(
+        query_variants(japanese_title),
+        lambda variant: query_memo.fetch('mal', variant, _fetch_mal_candidates),
+        lambda results: rank_mal_candidates(results, queries, year, anime_type),
+        MIN_CONFIDENCE,
+    )
+    if best_match:
+        logger.debug(f"MAL match for '{japanese_title}': {best_match['anime'].get('mal_id')}")
+        return _process_mal_result(best_match['anime'])
+    return None
+
 def get_mal_details(mal_id: int) -> Optional[Dict[str, Any]]:
     """Fetch full details to get external links (IMDb)"""
     _rate_limit()
-    url = f"https://api.jikan.moe/v4/anime/{mal_id}/full"
+    url = f"{JIKAN_BASE_URL}/anime/{mal_id}/full"
     try:
         response = requests.get(url, timeout=10)
         if response.status_code == 429:
@@ -114,6 +126,65 @@ def get_mal_details(mal_id: int) -> Optional[Dict[str, Any]]:
         logger.error(f"Error fetching MAL details {mal_id}: {e}")
         return None
 
+def get_season_page(year: int, season: str, page: int = 1) -> Optional[Dict[str, Any]]:
+    """Fetch one page (25 entries) of /seasons/{year}/{season}. Returns the raw Jikan payload."""
+    _rate_limit()
+    url = f"{JIKAN_BASE_URL}/seasons/{year}/{season}"
+    params = {"page": page, "limit": SEASON_PAGE_SIZE}
+    try:
+        response = requests.get(url, params=params, timeout=10)
+        if response.status_code == 429:
+            logger.warning("MAL API Rate Limit Hit. Sleeping 5s...")
+            time.sleep(5)
+            return get_season_page(year, season, page)
+        if response.status_code == 404:
+            return None
+
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        logger.error(f"Error fetching MAL season {year} {season} page {page}: {e}")
+        return None
+
+def harvest_season_scores(mal_ids: Set[int], years: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Bulk alternative to calling get_mal_details per title.
+
+    Pages through /seasons/{year}/{season} for the given years (in the given
+    order, so pass the busiest years first) and keeps score/members for every
+    wanted MAL id. Stops as soon as all ids were seen.
+
+    Season entries carry no external links, so `imdb_id` is always None;
+    callers fall back to get_mal_details for that and for ids not found here.
+    """
+    remaining = set(mal_ids)
+    found: Dict[int, Dict[str, Any]] = {}
+    calls = 0
+
+    for year in years:
+        for season in JIKAN_SEASONS:
+            page = 1
+            while remaining:
+                payload = get_season_page(year, season, page)
+                calls += 1
+                if not payload:
+                    break
+                for anime in payload.get('data', []):
+                    mal_id = anime.get('mal_id')
+                    if mal_id in remaining:
+                        found[mal_id] = _process_mal_result(anime)
+                        remaining.discard(mal_id)
+                if not payload.get('pagination', {}).get('has_next_page'):
+                    break
+                page += 1
+            if not remaining:
+                break
+        if not remaining:
+            break
+
+    logger.info(f"Season harvest: {len(found)}/{len(mal_ids)} MAL ids in {calls} calls.")
+    return found
+
 def _process_mal_result(data: Dict) -> Dict:
     """Extract relevant fields from Jikan response"""
     
@@ -144,3 +215,23 @@ def _process_mal_result(data: Dict) -> Dict:
         'year': data.get('year'),
         'imdb_id': imdb_id # Might be None from search result
     }
+
+class MalProvider(AnimeProvider):
+    """MAL through Jikan: search ranks /anime?q= results, details is /anime/{id}/full."""
+    name = 'myanimelist'
+
+    async def search(self, query, year=None, anime_type=None, alt_titles=None):
+        result = await self._call(search_mal_by_japanese_title, query, year, anime_type, alt_titles)
+        return result['mal_id'] if result else None
+
+    async def details(self, mal_id):
+        return await self._call(get_mal_details, mal_id)
+
+    async def rating(self, mal_id):
+        return self.as_rating(await self.details(mal_id), mal_id)
+
+    @staticmethod
+    def as_rating(data: Optional[Dict], mal_id: int) -> Optional[Dict[str, Any]]:
+        if not data:
+            return None
+        return {'score': data.get('mal_score'), 'members': data.get('mal_members'), 'id': mal_id}
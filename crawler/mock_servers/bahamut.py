@@ -0,0 +1,108 @@
+"""
+Local stand-in for the Bahamut (動畫瘋 + ACG database) pages the scraper reads.
+
+Routes (markup matches the selectors in bahamut_scraper.py):
+    /animeList.php?page=N      list page with `a.theme-list-main` cards
+    /animeRef.php?sn=ID        anime detail page
+    /acgDetail.php?s=ID        ACG database page (h2: Japanese, English titles)
+
+Usage:
+    python -m mock_servers.bahamut [--titles 1000] [--port 8004]
+    BAHAMUT_BASE_URL=http://127.0.0.1:8004 python bahamut_scraper.py
+"""
+import argparse
+import threading
+import time
+from typing import Dict, List
+
+from mock_servers.base import html_response, serve
+from mock_servers.synthetic import make_dataset
+
+LIST_PAGE_SIZE = 18
+
+CARD = '<a href="animeRef.php?sn={sn}" class="theme-list-main"><div class="theme-info-block"><p class="theme-name">{title}</p></div></a>'
+
+DETAIL_PAGE = """<!DOCTYPE html><html><head><meta charset="utf-8"><title>{title} - 巴哈姆特動畫瘋</title>
+<meta property="og:image" content="https://p2.bahamut.com.tw/B/2KU/{sn}.JPG"></head><body>
+<div class="anime_name"><h1>{title}</h1></div>
+<div class="anime_info_detail"><p class="newanime-count">觀看次數<span>{views}</span></p></div>
+<section class="season"><ul>{episodes}</ul></section>
+<div class="data-file"><ul class="type-list">
+<li class="type"><span class="title">首播日期</span><p class="content">{year}/04/01</p></li>
+<li class="type"><span class="title">作品類型</span><ul class="tag-list">{tags}</ul></li>
+</ul><a href="{acg_url}">作品資料</a></div>
+<div class="acg-score"><div class="score-overall-number">{score}</div><div class="score-overall-people">{votes}人評價</div></div>
+</body></html>"""
+
+ACG_PAGE = """<!DOCTYPE html><html><head><meta charset="utf-8"></head><body>
+<div class="ACG-mster_box1"><h1>{cn}</h1><h2>{jp}</h2><h2>{en}</h2></div></body></html>"""
+
+class BahamutStandIn:
+    """
+    Serves a synthetic dataset (mock_servers.synthetic.make_dataset). Bahamut
+    titles carry the usual "[1]" / "[電影]" suffixes. `acg_base_url` is set
+    once the server address is known, since detail pages link to ACG pages.
+    """
+
+    def __init__(self, dataset: List[Dict], acg_base_url: str = ''):
+        self.dataset = dataset
+        self.by_sn = {str(t['sn']): t for t in dataset}
+        self.by_acg = {str(t['acg_sn']): t for t in dataset}
+        self.acg_base_url = acg_base_url
+        self.requests: List[str] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def display_title(t: Dict) -> str:
+        return f"{t['title_cn']} [電影]" if t['type'] == 'MOVIE' else f"{t['title_cn']} [1]"
+
+    @staticmethod
+    def _views(count: int) -> str:
+        return f"{count / 10000:.1f}萬" if count >= 10000 else str(count)
+
+    def _list_page(self, page: int) -> str:
+        items = self.dataset[(page - 1) * LIST_PAGE_SIZE:page * LIST_PAGE_SIZE]
+        cards = ''.join(CARD.format(sn=t['sn'], title=self.display_title(t)) for t in items)
+        return f'<!DOCTYPE html><html><body><div class="theme-list-block">{cards}</div></body></html>'
+
+    def _detail_page(self, t: Dict) -> str:
+        return DETAIL_PAGE.format(
+            title=self.display_title(t), sn=t['sn'], views=self._views(t['popularity']), year=t['year'],
+            episodes=''.join(f'<li><a href="?sn={t["sn"]}{i}">{i + 1}</a></li>' for i in range(t['episodes'])),
+            tags=''.join(f'<li class="tag">{g}</li>' for g in t['genres']),
+            acg_url=f"{self.acg_base_url}/acgDetail.php?s={t['acg_sn']}",
+            score=t['bahamut_score'], votes=f"{t['bahamut_votes']:,}",
+        )
+
+    def handle(self, method: str, path: str, query: Dict[str, str]):
+        with self._lock:
+            self.requests.append(path)
+
+        if path == '/animeList.php':
+            return html_response(self._list_page(int(query.get('page', 1))))
+        if path == '/animeRef.php' and query.get('sn') in self.by_sn:
+            return html_response(self._detail_page(self.by_sn[query['sn']]))
+        if path == '/acgDetail.php' and query.get('s') in self.by_acg:
+            t = self.by_acg[query['s']]
+            return html_response(ACG_PAGE.format(cn=t['title_cn'], jp=t['title_jp'], en=t['title_en']))
+        return html_response('<html><body>404</body></html>', 404)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--titles', type=int, default=1000, help="Synthetic dataset size")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--port', type=int, default=8004)
+    args = parser.parse_args()
+
+    app = BahamutStandIn(make_dataset(args.titles, args.seed))
+    server, base_url = serve(app, port=args.port)
+    app.acg_base_url = base_url
+    print(f"Bahamut stand-in on {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
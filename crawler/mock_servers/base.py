@@ -0,0 +1,188 @@
+"""
+Minimal HTTP plumbing shared by the local stand-in servers.
+
+A stand-in "app" implements `handle(method, path, query) -> (status, headers, body)`
+where body is bytes, str or a JSON-serializable object. `serve` runs it on a
+background thread and returns the server plus its base URL.
+
+`Conditions` wraps any app with upstream misbehaviour: a latency distribution,
+a rate limit answered with 429, and random 5xx errors.
+"""
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+Response = Tuple[int, Dict[str, str], Any]
+
+def json_response(payload: Any, status: int = 200) -> Response:
+    return status, {'Content-Type': 'application/json; charset=utf-8'}, payload
+
+def html_response(html: str, status: int = 200) -> Response:
+    return status, {'Content-Type': 'text/html; charset=utf-8'}, html
+
+class TitleIndex:
+    """
+    Search over catalog titles that stays O(1) for 50k-entry catalogs:
+    exact (case-insensitive) title hits first, then entries sharing the
+    query's first word. Small catalogs also get substring matches.
+    """
+    SUBSTRING_SCAN_LIMIT = 2000
+
+    def __init__(self, items: List[Dict], titles: Callable[[Dict], Iterable[str]]):
+        self.items = items
+        self.titles = titles
+        self.exact: Dict[str, List[int]] = {}
+        self.first_word: Dict[str, List[int]] = {}
+        for i, item in enumerate(items):
+            for title in titles(item):
+                if not title:
+                    continue
+                key = title.lower()
+                self.exact.setdefault(key, []).append(i)
+                words = key.split()
+                if words:
+                    self.first_word.setdefault(words[0], []).append(i)
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        query = (query or '').lower().strip()
+        if not query:
+            return []
+        hits = list(dict.fromkeys(self.exact.get(query, []) + self.first_word.get(query.split()[0], [])))
+        if len(self.items) <= self.SUBSTRING_SCAN_LIMIT:
+            hits += [i for i, item in enumerate(self.items)
+                     if i not in hits and any(query in (t or '').lower() for t in self.titles(item))]
+        return [self.items[i] for i in hits[:limit]]
+
+def parse_latency(spec: Optional[str]) -> Callable[[random.Random], float]:
+    """
+    Latency distribution from a spec string (seconds):
+        '0.05'                   fixed
+        'uniform:0.01,0.2'       uniform between two bounds
+        'lognormal:0.05,0.6'     median, sigma (long tail, like real APIs)
+        'exp:0.05'               exponential with the given mean
+    Empty / None means no added latency.
+    """
+    if not spec:
+        return lambda rng: 0.0
+    kind, _, params = spec.partition(':')
+    if not params:
+        value = float(kind)
+        return lambda rng: value
+    args = [float(x) for x in params.split(',')]
+    if kind == 'uniform':
+        low, high = args
+        return lambda rng: rng.uniform(low, high)
+    if kind == 'lognormal':
+        median, sigma = args
+        mu = math.log(median)
+        return lambda rng: rng.lognormvariate(mu, sigma)
+    if kind == 'exp':
+        mean, = args
+        return lambda rng: rng.expovariate(1 / mean)
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+class TokenBucket:
+    """`rate` requests/sec with bursts up to `burst`. rate <= 0 disables limiting."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        if self.rate <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+class Conditions:
+    """
+    Wrap a stand-in app with upstream behaviour:
+    - latency: spec for parse_latency, sampled per request
+    - rate_limit: requests/sec before answering 429 (Retry-After: 1)
+    - error_rate: probability of a 500/503 response
+    Status counts are kept in `.stats` for load-test reports.
+    """
+
+    def __init__(self, app, latency: Optional[str] = None, rate_limit: float = 0,
+                 error_rate: float = 0.0, seed: Optional[int] = None):
+        self.app = app
+        self.latency = parse_latency(latency)
+        self.bucket = TokenBucket(rate_limit)
+        self.error_rate = error_rate
+        self.stats: Counter = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def handle(self, method: str, path: str, query: Dict[str, str]) -> Response:
+        with self._lock:
+            delay = self.latency(self._rng)
+            fail = self._rng.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay)
+
+        if not self.bucket.take():
+            response = 429, {'Content-Type': 'application/json', 'Retry-After': '1'}, {'status': 429, 'message': 'Too Many Requests'}
+        elif fail:
+            response = json_response({'status': 503, 'message': 'Injected failure'}, 503)
+        else:
+            response = self.app.handle(method, path, query)
+
+        with self._lock:
+            self.stats[response[0]] += 1
+        return response
+
+def _make_handler(app):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+            status, headers, body = app.handle('GET', parts.path, query)
+            if not isinstance(body, (bytes, str)):
+                body = json.dumps(body, ensure_ascii=False)
+            if isinstance(body, str):
+                body = body.encode('utf-8')
+
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # keep test and load-test output clean
+
+    return Handler
+
+class _QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients that stop reading early (streamed IMDb pages) reset the connection
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+def serve(app, host: str = '127.0.0.1', port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """Start `app` on a daemon thread. port=0 picks a free port."""
+    server = _QuietServer((host, port), _make_handler(app))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
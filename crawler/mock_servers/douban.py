@@ -0,0 +1,105 @@
+"""
+Local stand-in for the two Douban endpoints the crawler uses.
+
+Routes (same shapes as movie.douban.com):
+    /j/subject_suggest?q=...   JSON list of {id, title, sub_title, year, img, type}
+    /subject/{id}/             HTML page with v:average / v:votes tags
+
+Usage:
+    python -m mock_servers.douban [--catalog mock_servers/fixtures/douban_catalog.json] [--port 8002]
+    DOUBAN_BASE_URL=http://127.0.0.1:8002 python cross_platform.py
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, List
+
+from mock_servers.base import TitleIndex, json_response, html_response, serve
+
+DEFAULT_CATALOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'douban_catalog.json')
+
+_SUBJECT_ROUTE = re.compile(r'^/subject/(\d+)/?$')
+
+# Enough of the real page around the rating block for extractors to be honest
+SUBJECT_PAGE = """<!DOCTYPE html><html lang="zh-CN"><head><meta charset="utf-8"><title>{title} (豆瓣)</title></head>
+<body><div id="wrapper"><h1><span property="v:itemreviewed">{title} {sub_title}</span> <span class="year">({year})</span></h1>
+{filler}
+<div id="interest_sectl"><div class="rating_wrap clearbox" rel="v:rating">
+<div class="rating_self clearfix" typeof="v:Rating"><strong class="ll rating_num" property="v:average">{score}</strong>
+<span property="v:best" content="10.0"></span></div>
+<div class="rating_sum"><a href="comments" class="rating_people"><span property="v:votes">{votes}</span>人评价</a></div>
+</div></div></div></body></html>"""
+
+class DoubanStandIn:
+    """
+    Catalog entries: {id, title, sub_title, year, score, votes[, aliases]}. `latency`
+    (seconds) is added to every response; `max_in_flight` records the highest
+    number of requests served at once, to check client-side concurrency limits.
+    """
+
+    def __init__(self, catalog: List[Dict], latency: float = 0.0):
+        self.by_id = {str(item['id']): item for item in catalog}
+        # `aliases` (e.g. the Traditional Chinese title) are searchable but never returned
+        self.titles = TitleIndex(catalog, lambda item: [item.get('title'), item.get('sub_title')] + item.get('aliases', []))
+        self.latency = latency
+        self.requests: List[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _suggest(self, q: str) -> List[Dict]:
+        return [
+            {'id': item['id'], 'title': item['title'], 'sub_title': item.get('sub_title', ''),
+             'year': item.get('year', ''), 'type': 'movie', 'img': '', 'episode': ''}
+            for item in self.titles.search(q)
+        ]
+
+    def _subject(self, item: Dict) -> str:
+        filler = '<div class="related-info">' + '<p>簡介</p>' * 200 + '</div>'
+        return SUBJECT_PAGE.format(filler=filler, **{k: item.get(k, '') for k in ('title', 'sub_title', 'year', 'score', 'votes')})
+
+    def handle(self, method: str, path: str, query: Dict[str, str]):
+        with self._lock:
+            self.requests.append(path)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+
+            if path == '/j/subject_suggest':
+                return json_response(self._suggest(query.get('q', '')))
+
+            match = _SUBJECT_ROUTE.match(path)
+            if match and match.group(1) in self.by_id:
+                return html_response(self._subject(self.by_id[match.group(1)]))
+
+            return html_response('<html><body>404</body></html>', 404)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+def load_catalog(path: str = DEFAULT_CATALOG) -> List[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--catalog', default=DEFAULT_CATALOG)
+    parser.add_argument('--port', type=int, default=8002)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    args = parser.parse_args()
+
+    server, base_url = serve(DoubanStandIn(load_catalog(args.catalog), latency=args.latency), port=args.port)
+    print(f"Douban stand-in on {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
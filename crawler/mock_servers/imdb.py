@@ -0,0 +1,82 @@
+"""
+Local stand-in for the IMDb endpoints the crawler uses.
+
+Routes:
+    /suggestion/{c}/{query}.json   Suggestion API v2: {"d": [{id, l, y, qid}, ...]}
+    /title/{tt}/                   title page: JSON-LD (aggregateRating) in <head>, large body
+
+Usage:
+    python -m mock_servers.imdb [--port 8003]
+    IMDB_SUGGEST_URL=http://127.0.0.1:8003/suggestion IMDB_TITLE_URL=http://127.0.0.1:8003/title python cross_platform.py
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from typing import Dict, List
+from urllib.parse import unquote
+
+from mock_servers.base import TitleIndex, html_response, json_response, serve
+from mock_servers.synthetic import imdb_catalog, make_dataset
+
+_SUGGEST_ROUTE = re.compile(r'^/suggestion/[^/]+/(.+)\.json$')
+_TITLE_ROUTE = re.compile(r'^/title/(tt\d+)/?$')
+
+QID_TYPES = {'tvSeries': 'TVSeries', 'tvMiniSeries': 'TVSeries', 'movie': 'Movie', 'video': 'Movie'}
+
+class ImdbStandIn:
+    """
+    Catalog entries: {id, l, y, qid, score, votes}. Title pages are ~`body_kb`
+    KB so streaming readers have something to skip.
+    """
+
+    def __init__(self, catalog: List[Dict], body_kb: int = 300):
+        self.by_id = {item['id']: item for item in catalog}
+        self.titles = TitleIndex(catalog, lambda item: (item.get('l'),))
+        self.body = '<div class="ipc-page-section">' + '<p class="ipc-html-content">cast and crew</p>' * (body_kb * 1024 // 48) + '</div>'
+        self.requests: List[str] = []
+        self._lock = threading.Lock()
+
+    def _title_page(self, item: Dict) -> str:
+        ld = {
+            '@context': 'https://schema.org', '@type': QID_TYPES.get(item.get('qid'), 'CreativeWork'),
+            'url': f"/title/{item['id']}/", 'name': item['l'],
+            'aggregateRating': {'@type': 'AggregateRating', 'ratingCount': item['votes'], 'ratingValue': item['score']},
+        }
+        return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{item["l"]} - IMDb</title>'
+                f'<script type="application/ld+json">{json.dumps(ld, ensure_ascii=False)}</script></head>'
+                f'<body>{self.body}</body></html>')
+
+    def handle(self, method: str, path: str, query: Dict[str, str]):
+        with self._lock:
+            self.requests.append(path)
+
+        match = _SUGGEST_ROUTE.match(path)
+        if match:
+            hits = self.titles.search(unquote(match.group(1)), limit=8)
+            return json_response({'d': [{k: item[k] for k in ('id', 'l', 'y', 'qid')} for item in hits], 'q': match.group(1), 'v': 1})
+
+        match = _TITLE_ROUTE.match(path)
+        if match and match.group(1) in self.by_id:
+            return html_response(self._title_page(self.by_id[match.group(1)]))
+
+        return html_response('<html><body>404 Not Found</body></html>', 404)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--titles', type=int, default=1000, help="Synthetic dataset size")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--port', type=int, default=8003)
+    args = parser.parse_args()
+
+    server, base_url = serve(ImdbStandIn(imdb_catalog(make_dataset(args.titles, args.seed))), port=args.port)
+    print(f"IMDb stand-in on {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
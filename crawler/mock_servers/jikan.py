@@ -0,0 +1,107 @@
+"""
+Local stand-in for the Jikan v4 API, serving canned JSON.
+
+Routes (same shapes as api.jikan.moe/v4):
+    /v4/seasons/{year}/{season}?page=N&limit=25
+    /v4/anime/{id}/full
+    /v4/anime?q=...&limit=5
+
+Usage:
+    python -m mock_servers.jikan [--catalog mock_servers/fixtures/jikan_catalog.json] [--port 8001]
+    JIKAN_BASE_URL=http://127.0.0.1:8001/v4 python cross_platform.py --mal-bulk
+"""
+import argparse
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from mock_servers.base import TitleIndex, json_response, serve
+
+DEFAULT_CATALOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'jikan_catalog.json')
+
+_SEASON_ROUTE = re.compile(r'^/v4/seasons/(\d{4})/(winter|spring|summer|fall)$')
+_FULL_ROUTE = re.compile(r'^/v4/anime/(\d+)/full$')
+
+class JikanStandIn:
+    """
+    Catalog entries are Jikan anime objects (mal_id, title, score, members,
+    year, season, ...). An optional `external` list is only returned by /full,
+    like the real API.
+    """
+
+    def __init__(self, catalog: List[Dict], page_size: int = 25):
+        self.page_size = page_size
+        self.by_id = {anime['mal_id']: anime for anime in catalog}
+        self.by_season = defaultdict(list)
+        for anime in catalog:
+            self.by_season[(anime.get('year'), anime.get('season'))].append(anime)
+        self.titles = TitleIndex(catalog, lambda a: (a.get('title'), a.get('title_english'), a.get('title_japanese')))
+        self.requests: List[str] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _public(anime: Dict) -> Dict:
+        return {k: v for k, v in anime.items() if k != 'external'}
+
+    def _page(self, items: List[Dict], page: int, limit: int) -> Dict:
+        limit = min(limit, self.page_size)
+        last_page = max(1, math.ceil(len(items) / limit))
+        chunk = items[(page - 1) * limit:page * limit]
+        return {
+            'pagination': {
+                'last_visible_page': last_page,
+                'has_next_page': page < last_page,
+                'current_page': page,
+                'items': {'count': len(chunk), 'total': len(items), 'per_page': limit},
+            },
+            'data': [self._public(a) for a in chunk],
+        }
+
+    def handle(self, method: str, path: str, query: Dict[str, str]):
+        with self._lock:
+            self.requests.append(path)
+
+        match = _SEASON_ROUTE.match(path)
+        if match:
+            items = self.by_season.get((int(match.group(1)), match.group(2)), [])
+            page = int(query.get('page', 1))
+            return json_response(self._page(items, page, int(query.get('limit', self.page_size))))
+
+        match = _FULL_ROUTE.match(path)
+        if match:
+            anime = self.by_id.get(int(match.group(1)))
+            if anime is None:
+                return json_response({'status': 404, 'message': 'Resource does not exist'}, 404)
+            return json_response({'data': dict(anime, external=anime.get('external', []))})
+
+        if path == '/v4/anime':
+            limit = int(query.get('limit', 5))
+            return json_response(self._page(self.titles.search(query.get('q', ''), limit), 1, limit))
+
+        return json_response({'status': 404, 'message': 'Not Found'}, 404)
+
+def load_catalog(path: str = DEFAULT_CATALOG) -> List[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--catalog', default=DEFAULT_CATALOG)
+    parser.add_argument('--port', type=int, default=8001)
+    args = parser.parse_args()
+
+    server, base_url = serve(JikanStandIn(load_catalog(args.catalog)), port=args.port)
+    print(f"Jikan stand-in on {base_url}/v4 (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
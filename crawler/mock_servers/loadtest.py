@@ -0,0 +1,254 @@
+"""
+Load test: run the real pipeline (scrape -> enrich -> generate) against the
+local stand-ins for Bahamut, Jikan, IMDb and Douban, and report records/sec.
+
+Every stand-in is served from one synthetic dataset (mock_servers.synthetic),
+so the report also checks that the resolved MAL / IMDb / Douban ids are right.
+
+Upstream behaviour is configurable per server ([name=] prefix, name in
+bahamut, jikan, imdb, douban; no prefix applies to all):
+    --latency jikan=lognormal:0.08,0.5     see base.parse_latency
+    --rate-limit jikan=3                   requests/sec, then 429
+    --error-rate douban=0.02               share of injected 503s
+
+Client-side politeness delays (MIN_DELAY, RATE_LIMIT_DELAY) are zeroed unless
+--client-delays is given; server-side limits still apply.
+
+Usage:
+    python -m mock_servers.loadtest --titles 500
+    python -m mock_servers.loadtest --titles 50000 --stages enrich,generate --latency lognormal:0.03,0.6
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+CRAWLER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(CRAWLER_DIR)
+
+from mock_servers.base import Conditions, serve
+from mock_servers.bahamut import BahamutStandIn
+from mock_servers.douban import DoubanStandIn
+from mock_servers.imdb import ImdbStandIn
+from mock_servers.jikan import JikanStandIn
+from mock_servers.synthetic import douban_catalog, imdb_catalog, jikan_catalog, make_dataset, write_aod
+
+SERVERS = ('bahamut', 'jikan', 'imdb', 'douban')
+STAGES = ('scrape', 'enrich', 'generate')
+
+def per_server(values: List[str], cast, default) -> Dict[str, object]:
+    """['lognormal:0.05,0.5', 'douban=0.2'] -> {server: value}; prefixed values override unprefixed ones."""
+    settings = {name: default for name in SERVERS}
+    overrides = {}
+    for value in values or []:
+        name, sep, rest = value.partition('=')
+        if sep and name in SERVERS:
+            overrides[name] = cast(rest)
+        else:
+            settings = {name: cast(value) for name in SERVERS}
+    settings.update(overrides)
+    return settings
+
+def start_servers(dataset: List[Dict], latency: Dict, rate_limit: Dict, error_rate: Dict, seed: int):
+    apps = {
+        'bahamut': BahamutStandIn(dataset),
+        'jikan': JikanStandIn(jikan_catalog(dataset)),
+        'imdb': ImdbStandIn(imdb_catalog(dataset)),
+        'douban': DoubanStandIn(douban_catalog(dataset)),
+    }
+    servers, urls, conditions = [], {}, {}
+    for i, name in enumerate(SERVERS):
+        conditions[name] = Conditions(apps[name], latency[name], rate_limit[name], error_rate[name], seed + i)
+        server, urls[name] = serve(conditions[name])
+        servers.append(server)
+    apps['bahamut'].acg_base_url = urls['bahamut']
+    return servers, urls, conditions
+
+def point_clients_at(urls: Dict[str, str], client_delays: bool = False):
+    """
+    Set the base URL overrides. The environment covers modules imported
+    later (and child processes); already-imported modules are patched too.
+    """
+    env = {
+        'BAHAMUT_BASE_URL': urls['bahamut'],
+        'JIKAN_BASE_URL': f"{urls['jikan']}/v4",
+        'IMDB_SUGGEST_URL': f"{urls['imdb']}/suggestion",
+        'IMDB_TITLE_URL': f"{urls['imdb']}/title",
+        'DOUBAN_BASE_URL': urls['douban'],
+    }
+    os.environ.update(env)
+
+    import bahamut_scraper
+    import douban_api
+    import imdb_api
+    import mal_api
+    bahamut_scraper.BASE_URL = env['BAHAMUT_BASE_URL']
+    bahamut_scraper.ANIME_LIST_URL = f"{env['BAHAMUT_BASE_URL']}/animeList.php"
+    mal_api.JIKAN_BASE_URL = env['JIKAN_BASE_URL']
+    imdb_api.IMDB_SUGGEST_URL = env['IMDB_SUGGEST_URL']
+    imdb_api.IMDB_TITLE_URL = env['IMDB_TITLE_URL']
+    douban_api.DOUBAN_BASE_URL = env['DOUBAN_BASE_URL']
+    if not client_delays:
+        bahamut_scraper.MIN_DELAY = bahamut_scraper.MAX_DELAY = 0
+        mal_api.RATE_LIMIT_DELAY = 0
+        douban_api.RATE_LIMIT_DELAY = 0
+    # The shared Douban client may already exist
+    client = douban_api.get_client()
+    client.base_url = env['DOUBAN_BASE_URL']
+    client.rate_limit_delay = douban_api.RATE_LIMIT_DELAY
+
+# Module globals run() repoints at its workdir (and the services loaded from
+# there); restored when it returns so later callers in the process are unaffected
+RUN_GLOBALS = {
+    'bahamut_scraper': ('OUTPUT_FILE',),
+    'cross_platform': ('INPUT_FILE', 'OUTPUT_FILE', 'AOD_FILE', 'AOD_INDEX_FILE', 'MANUAL_MAPPING_FILE',
+                       'aod_service', 'manual_mapping'),
+    'generate_json': ('INPUT_FILE', 'OUTPUT_FILE', 'BUNDLE_DIR', 'VALIDATION_REPORT_FILE', 'MANUAL_MAPPING_FILE'),
+}
+
+def save_globals() -> Dict[tuple, object]:
+    return {(module, name): getattr(sys.modules[module], name)
+            for module, names in RUN_GLOBALS.items() for name in names}
+
+def restore_globals(saved: Dict[tuple, object]):
+    for (module, name), value in saved.items():
+        setattr(sys.modules[module], name, value)
+
+def bahamut_records(dataset: List[Dict], acg_base_url: str = '') -> List[Dict]:
+    """What the scraper would have produced, for runs that skip the scrape stage."""
+    return [{
+        'id': str(t['sn']),
+        'bahamutUrl': f"https://ani.gamer.com.tw/animeRef.php?sn={t['sn']}",
+        'ratings': {'bahamut': {'score': t['bahamut_score'], 'votes': t['bahamut_votes']}},
+        'title': BahamutStandIn.display_title(t),
+        'thumbnail': '',
+        'popularity': t['popularity'],
+        'year': t['year'],
+        'episodes': t['episodes'],
+        'genres': t['genres'],
+        'titleOriginal': t['title_jp'],
+        'titleEnglish': t['title_en'],
+        'acgUrl': f"{acg_base_url}/acgDetail.php?s={t['acg_sn']}",
+    } for t in dataset]
+
+def check_ids(enriched: List[Dict], dataset: List[Dict]) -> Dict[str, str]:
+    """Share of records whose resolved provider id is the right one (found / correct)."""
+    truth = {str(t['sn']): t for t in dataset}
+    report = {}
+    for platform, key in (('myanimelist', 'mal_id'), ('imdb', 'imdb_id'), ('douban', 'douban_id')):
+        found = correct = 0
+        for anime in enriched:
+            resolved = anime.get('ratings', {}).get(platform, {}).get('id')
+            if resolved:
+                found += 1
+                correct += str(resolved) == str(truth[str(anime['id'])][key])
+        report[platform] = f"{found}/{len(enriched)} found, {correct} correct"
+    return report
+
+def run(args) -> Dict:
+    dataset = make_dataset(args.titles, args.seed)
+    latency = per_server(args.latency, str, None)
+    rate_limit = per_server(args.rate_limit, float, 0.0)
+    error_rate = per_server(args.error_rate, float, 0.0)
+    servers, urls, conditions = start_servers(dataset, latency, rate_limit, error_rate, args.seed)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='ani-radar-loadtest-')
+    data_dir = os.path.join(workdir, 'data')
+    os.makedirs(data_dir, exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(workdir)  # cross_platform.log lands here
+
+    point_clients_at(urls, args.client_delays)
+    import bahamut_scraper
+    import cross_platform
+    import generate_json
+    saved = save_globals()
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    raw_file = os.path.join(data_dir, 'bahamut_raw.json')
+    enriched_file = os.path.join(data_dir, 'animes_enriched.json')
+    stages = [s for s in STAGES if s in args.stages.split(',')]
+    report = {'titles': args.titles, 'workdir': workdir, 'stages': {}}
+
+    try:
+        for stage in stages:
+            start = time.perf_counter()
+            if stage == 'scrape':
+                bahamut_scraper.OUTPUT_FILE = raw_file
+                with contextlib.redirect_stdout(io.StringIO() if not args.verbose else sys.stdout):
+                    bahamut_scraper.main()
+                with open(raw_file, 'r', encoding='utf-8') as f:
+                    records = len(json.load(f))
+            elif stage == 'enrich':
+                if not os.path.exists(raw_file):
+                    with open(raw_file, 'w', encoding='utf-8') as f:
+                        json.dump(bahamut_records(dataset, urls['bahamut']), f, ensure_ascii=False)
+                cross_platform.INPUT_FILE = raw_file
+                cross_platform.OUTPUT_FILE = enriched_file
+                cross_platform.AOD_FILE = write_aod(dataset, os.path.join(data_dir, 'aod.jsonl'))
+                cross_platform.AOD_INDEX_FILE = os.path.join(data_dir, 'aod_index.json')
+                cross_platform.MANUAL_MAPPING_FILE = os.path.join(data_dir, 'manual_mapping.json')
+                cross_platform.main()
+                with open(enriched_file, 'r', encoding='utf-8') as f:
+                    enriched = json.load(f)
+                records = len(enriched)
+                report['ids'] = check_ids(enriched, dataset)
+            else:
+                generate_json.INPUT_FILE = enriched_file
+                generate_json.OUTPUT_FILE = os.path.join(data_dir, 'animes.json')
+                generate_json.BUNDLE_DIR = os.path.join(data_dir, 'bundle')
+                generate_json.VALIDATION_REPORT_FILE = os.path.join(data_dir, 'validation_report.json')
+                generate_json.MANUAL_MAPPING_FILE = cross_platform.MANUAL_MAPPING_FILE
+                generate_json.main()
+                with open(generate_json.OUTPUT_FILE, 'r', encoding='utf-8') as f:
+                    records = len(json.load(f))
+            seconds = time.perf_counter() - start
+            report['stages'][stage] = {'records': records, 'seconds': round(seconds, 2),
+                                       'records_per_sec': round(records / seconds, 1) if seconds else None}
+    finally:
+        os.chdir(cwd)
+        restore_globals(saved)
+        for server in servers:
+            server.shutdown()
+
+    report['servers'] = {name: dict(sorted(c.stats.items())) for name, c in conditions.items()}
+    if not args.workdir and not args.keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--titles', type=int, default=500, help="Synthetic dataset size")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--stages', default=','.join(STAGES), help="Comma-separated subset of: " + ', '.join(STAGES))
+    parser.add_argument('--latency', action='append', help="[server=]distribution (repeatable)")
+    parser.add_argument('--rate-limit', action='append', help="[server=]requests/sec (repeatable)")
+    parser.add_argument('--error-rate', action='append', help="[server=]share of 503s (repeatable)")
+    parser.add_argument('--client-delays', action='store_true', help="Keep the crawler's own politeness delays")
+    parser.add_argument('--workdir', help="Keep outputs here (default: temporary, removed)")
+    parser.add_argument('--keep', action='store_true', help="Do not remove the temporary workdir")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    report = run(args)
+    print(f"\nLoad test: {report['titles']} synthetic titles ({report['workdir']})\n")
+    print(f"{'stage':<10}{'records':>9}{'seconds':>10}{'records/s':>11}")
+    for stage, row in report['stages'].items():
+        print(f"{stage:<10}{row['records']:>9}{row['seconds']:>10.2f}{row['records_per_sec'] or 0:>11.1f}")
+    if 'ids' in report:
+        print("\nResolved ids:")
+        for platform, line in report['ids'].items():
+            print(f"  {platform:<12}{line}")
+    print("\nUpstream responses by status:")
+    for name, stats in report['servers'].items():
+        print(f"  {name:<9}{stats}")
+
+if __name__ == '__main__':
+    main()
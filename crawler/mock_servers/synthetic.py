@@ -0,0 +1,114 @@
+"""
+Synthetic cross-provider dataset for the stand-in servers.
+
+One `make_dataset` call yields titles whose ids and names agree across
+Bahamut, Jikan, IMDb, Douban and the AOD release, so the whole pipeline
+(scrape -> enrich -> generate) resolves them the way it would real data.
+"""
+import json
+import random
+from typing import Dict, Iterator, List
+
+from benchmarks.synthetic_aod import LATIN_WORDS, KANA
+
+SEASONS = ['winter', 'spring', 'summer', 'fall']
+TYPES = [('TV', 'TV', 'tvSeries'), ('MOVIE', 'Movie', 'movie'), ('OVA', 'OVA', 'video'), ('ONA', 'ONA', 'tvSeries')]
+# Traditional -> Simplified pairs: Douban titles differ from Bahamut's like the real sites
+TRAD_SIMP = {'劍': '剑', '與': '与', '學': '学', '園': '园', '戰': '战', '記': '记', '夢': '梦',
+             '龍': '龙', '國': '国', '傳': '传', '說': '说', '異': '异', '騎': '骑', '島': '岛', '戀': '恋'}
+CJK = list(TRAD_SIMP) + list('少女之王子的天空海星月花風雪光影神鬼獸機械城市森林物語日常')
+GENRES = ['奇幻', '冒險', '戀愛', '校園', '科幻', '喜劇', '運動', '懸疑', '日常', '戰鬥']
+
+def _unique(rng: random.Random, seen: set, make) -> str:
+    while True:
+        value = make()
+        if value not in seen:
+            seen.add(value)
+            return value
+
+def make_dataset(count: int, seed: int = 0, aod_coverage: float = 0.9) -> List[Dict]:
+    """
+    `count` titles. aod_coverage is the share listed in the AOD release; the
+    rest only resolve through the MAL search fallback.
+    """
+    rng = random.Random(seed)
+    seen_cn, seen_jp, seen_en = set(), set(), set()
+    dataset = []
+    for n in range(count):
+        aod_type, jikan_type, imdb_type = rng.choice(TYPES)
+        year = rng.randint(1995, 2025)
+        cn = _unique(rng, seen_cn, lambda: ''.join(rng.choice(CJK) for _ in range(rng.randint(3, 8))))
+        dataset.append({
+            'sn': 100000 + n,
+            'acg_sn': 200000 + n,
+            'mal_id': 1 + n,
+            'imdb_id': f"tt{9000000 + n}",
+            'douban_id': str(30000000 + n),
+            'title_cn': cn,
+            'title_cn_simplified': ''.join(TRAD_SIMP.get(c, c) for c in cn),
+            'title_jp': _unique(rng, seen_jp, lambda: ''.join(rng.choice(KANA) for _ in range(rng.randint(5, 12)))),
+            'title_en': _unique(rng, seen_en, lambda: ' '.join(rng.choice(LATIN_WORDS).capitalize() for _ in range(rng.randint(2, 5)))),
+            'year': year,
+            'season': rng.choice(SEASONS),
+            'type': aod_type,
+            'jikan_type': jikan_type,
+            'imdb_type': imdb_type,
+            'episodes': 1 if aod_type == 'MOVIE' else rng.randint(1, 26),
+            'genres': rng.sample(GENRES, rng.randint(1, 4)),
+            'in_aod': rng.random() < aod_coverage,
+            'bahamut_score': round(rng.uniform(3.5, 5.0), 1),
+            'bahamut_votes': rng.randint(10, 50000),
+            'popularity': rng.randint(1000, 5000000),
+            'mal_score': round(rng.uniform(5.0, 9.2), 2),
+            'mal_members': rng.randint(1000, 3000000),
+            'imdb_score': round(rng.uniform(5.0, 9.2), 1),
+            'imdb_votes': rng.randint(10, 500000),
+            'douban_score': round(rng.uniform(5.0, 9.6), 1),
+            'douban_votes': rng.randint(10, 300000),
+        })
+    return dataset
+
+def jikan_catalog(dataset: List[Dict]) -> List[Dict]:
+    return [{
+        'mal_id': t['mal_id'], 'title': t['title_en'], 'title_english': t['title_en'], 'title_japanese': t['title_jp'],
+        'type': t['jikan_type'], 'year': t['year'], 'season': t['season'], 'episodes': t['episodes'],
+        'score': t['mal_score'], 'members': t['mal_members'],
+        'external': [{'name': 'IMDb', 'url': f"https://www.imdb.com/title/{t['imdb_id']}/"}],
+    } for t in dataset]
+
+def douban_catalog(dataset: List[Dict]) -> List[Dict]:
+    # `aliases` are searchable but not returned, like Douban's trad/simp folding
+    return [{
+        'id': t['douban_id'], 'title': t['title_cn_simplified'], 'sub_title': t['title_jp'], 'year': str(t['year']),
+        'score': t['douban_score'], 'votes': t['douban_votes'], 'aliases': [t['title_cn']],
+    } for t in dataset]
+
+def imdb_catalog(dataset: List[Dict]) -> List[Dict]:
+    return [{
+        'id': t['imdb_id'], 'l': t['title_en'], 'y': t['year'], 'qid': t['imdb_type'],
+        'score': t['imdb_score'], 'votes': t['imdb_votes'],
+    } for t in dataset]
+
+def iter_aod_entries(dataset: List[Dict]) -> Iterator[Dict]:
+    for t in dataset:
+        if not t['in_aod']:
+            continue
+        yield {
+            'sources': [f"https://myanimelist.net/anime/{t['mal_id']}", f"https://anidb.net/anime/{t['mal_id']}"],
+            'title': t['title_en'],
+            'type': t['type'],
+            'episodes': t['episodes'],
+            'status': 'FINISHED',
+            'animeSeason': {'season': t['season'].upper(), 'year': t['year']},
+            'synonyms': [t['title_jp'], t['title_cn']],
+            'relatedAnime': [],
+            'tags': [],
+        }
+
+def write_aod(dataset: List[Dict], path: str) -> str:
+    """AOD release in the JSON Lines layout the crawler reads (header line first)."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'$schema': 'synthetic', 'license': {'name': 'ODbL-1.0'}}) + '\n')
+        for entry in iter_aod_entries(dataset):
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    return path
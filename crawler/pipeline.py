@@ -0,0 +1,321 @@
+"""
+One-process pipeline: scrape -> enrich -> generate, streamed.
+
+    Bahamut list pages -> [scrape] -> queue -> [enrich] -> queue -> [generate] -> sink
+
+Each record moves to the next stage as soon as it is ready (lib/stage_runner.py,
+bounded queues), so enrichment starts with the first scraped title instead of
+after the whole catalog. The hand-off files are not re-read between stages;
+the sink writes every output once at the end:
+
+    scrape   -> bahamut_raw.json        (merged with the existing file, as bahamut_scraper.py does)
+    enrich   -> animes_enriched.json    (franchise ids recomputed over the whole catalog)
+    generate -> animes.json, bundle/, validation_report.json
+
+--stages runs a contiguous part of the chain; a run starting after scrape
+reads its input from the previous stage's file. All paths are resolved from
+--data-dir (default: ../data next to this script), so it runs from any
+working directory.
+
+Usage:
+    python crawler/pipeline.py [--stages scrape,enrich,generate] [--limit N]
+                               [--enrich-workers 1] [--queue-size 32] [--data-dir DIR]
+"""
+import copy
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set
+
+CRAWLER_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(CRAWLER_DIR)
+import bahamut_scraper
+import cross_platform
+import generate_json
+from lib.data_bundle import write_bundle
+from lib.json_stream import iter_records
+from lib.stage_runner import QUEUE_SIZE, Stage, run_stages
+from lib.validation import summary_lines, validate_records
+from services.franchise import RatingDonors, cluster_franchises, has_all_ratings, share_ratings
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('scrape', 'enrich', 'generate')
+DATA_DIR = os.path.join(CRAWLER_DIR, '..', 'data')
+MANUAL_MAPPING_FILE = os.path.join(CRAWLER_DIR, 'manual_mapping.json')
+
+def parse_stages(text: str) -> List[str]:
+    """'enrich,generate' -> ['enrich', 'generate']; the stages must be contiguous and in order."""
+    names = [name.strip() for name in text.split(',') if name.strip()]
+    unknown = [name for name in names if name not in STAGES]
+    if unknown or not names:
+        raise ValueError(f"Unknown stages: {', '.join(unknown) or text!r} (choose from {', '.join(STAGES)})")
+    start = STAGES.index(names[0])
+    if names != list(STAGES[start:start + len(names)]):
+        raise ValueError(f"Stages must be a contiguous run of {' -> '.join(STAGES)}, got {' -> '.join(names)}")
+    return names
+
+def data_paths(data_dir: str = DATA_DIR) -> Dict[str, str]:
+    data_dir = os.path.abspath(data_dir)
+    return {
+        'raw': os.path.join(data_dir, 'bahamut_raw.json'),
+        'enriched': os.path.join(data_dir, 'animes_enriched.json'),
+        'output': os.path.join(data_dir, 'animes.json'),
+        'bundle': os.path.join(data_dir, 'bundle'),
+        'report': os.path.join(data_dir, 'validation_report.json'),
+        'aod': os.path.join(data_dir, 'anime-offline-database.jsonl'),
+        'aod_index': os.path.join(data_dir, 'aod_index.json'),
+    }
+
+def load_by_id(path: str) -> Dict[str, Dict]:
+    """id -> record of a JSON array / NDJSON file, in file order ({} when missing)."""
+    if not os.path.exists(path):
+        return {}
+    return {str(record['id']): record for record in iter_records(path)}
+
+def merge_previous(raw: Dict, previous: Optional[Dict]) -> Dict:
+    """Fresh Bahamut fields over the previously enriched record, keeping its other platforms' ratings."""
+    if previous is None:
+        return copy.deepcopy(raw)
+    record = copy.deepcopy(previous)
+    fresh = copy.deepcopy(raw)
+    ratings = record.get('ratings') or {}
+    ratings.update(fresh.pop('ratings', None) or {})
+    record.update(fresh)
+    record['ratings'] = ratings
+    return record
+
+class Pipeline:
+    """
+    Stage functions plus the per-id results the sink needs. Each stage keeps
+    what it produced by id; `order` is the source order of the ids.
+    """
+
+    def __init__(self, stages: Sequence[str], paths: Dict[str, str], mappings: Optional[Dict] = None):
+        self.stages = list(stages)
+        self.paths = paths
+        self.mappings = mappings or {}
+        self.order: List[str] = []
+        self.scraped: Dict[str, Dict] = {}
+        self.enriched: Dict[str, Dict] = {}
+        self.generated: Dict[str, Dict] = {}
+        self.dropped: Set[str] = set()
+        self.previous_enriched: Dict[str, Dict] = {}
+        # installment key -> fully rated record, as in cross_platform.main
+        self.donors = RatingDonors()
+        self.shared = 0
+        self._lock = threading.Lock()
+
+    # --- source ---
+
+    def source(self, limit: Optional[int] = None) -> Iterator:
+        first = self.stages[0]
+        if first == 'scrape':
+            items = bahamut_scraper.iter_anime_urls()
+            key = bahamut_scraper.extract_anime_id
+        else:
+            items = iter_records(self.paths['raw' if first == 'enrich' else 'enriched'])
+            key = lambda record: str(record['id'])
+        for item in itertools.islice(items, limit):
+            self.order.append(key(item))
+            yield item
+
+    # --- stages ---
+
+    def scrape(self, url: str) -> Optional[Dict]:
+        anime = bahamut_scraper.scrape_anime_detail(url)
+        bahamut_scraper.rate_limit()
+        if anime:
+            with self._lock:
+                self.scraped[str(anime['id'])] = anime
+        return anime
+
+    def prepare_enrich(self):
+        self.previous_enriched = load_by_id(self.paths['enriched'])
+        self.donors = RatingDonors(cross_platform.aod_service)
+        for anime in self.previous_enriched.values():
+            if has_all_ratings(anime) and str(anime['id']) not in cross_platform.manual_mapping:
+                self.donors.add(anime)
+
+    def enrich(self, raw: Dict) -> Dict:
+        anime_id = str(raw['id'])
+        record = merge_previous(raw, self.previous_enriched.get(anime_id))
+        if not has_all_ratings(record):
+            # Copies of one installment take the ratings of the first one looked up
+            keys = self.donors.keys(record) if anime_id not in cross_platform.manual_mapping else None
+            with self._lock:
+                donor = self.donors.find(keys) if keys is not None else None
+            if donor is not None:
+                share_ratings(donor, record)
+                with self._lock:
+                    self.shared += 1
+            else:
+                try:
+                    record = cross_platform.enrich_anime(record)
+                except Exception as e:
+                    logger.error(f"Error enriching {anime_id}: {e}")
+                else:
+                    # Only a complete lookup is copied; the others are looked up on their own
+                    if keys is not None and has_all_ratings(record):
+                        with self._lock:
+                            self.donors.add(record, keys)
+        with self._lock:
+            self.enriched[anime_id] = record
+        return record
+
+    def generate(self, anime: Dict) -> Optional[Dict]:
+        anime_id = str(anime.get('id'))
+        record = copy.deepcopy(anime)
+        mapping = self.mappings.get(anime_id)
+        if mapping is not None:
+            generate_json.apply_manual_mapping(record, mapping)
+        if generate_json.clean_record(record) is None:
+            with self._lock:
+                self.dropped.add(anime_id)
+            return None
+        with self._lock:
+            self.generated[anime_id] = record
+        return record
+
+    def stage_list(self, enrich_workers: int = 1) -> List[Stage]:
+        fns = {'scrape': (self.scrape, 1), 'enrich': (self.enrich, enrich_workers), 'generate': (self.generate, 1)}
+        return [Stage(name, *fns[name]) for name in self.stages]
+
+    # --- sink ---
+
+    def catalog(self, records: Dict[str, Dict], previous: Iterable[str]) -> List[str]:
+        """Ids of the previous file in its order, then the new ones in source order."""
+        ids = list(dict.fromkeys(previous))
+        known = set(ids)
+        ids.extend(anime_id for anime_id in self.order if anime_id in records and anime_id not in known)
+        return ids
+
+    def finish(self) -> Dict[str, int]:
+        """Write the outputs of every stage that ran; returns record counts per file."""
+        written = {}
+        ids = list(self.order)
+
+        if 'scrape' in self.stages:
+            previous_raw = load_by_id(self.paths['raw'])
+            ids = self.catalog(self.scraped, previous_raw)
+            raw = [self.scraped.get(anime_id) or previous_raw[anime_id] for anime_id in ids]
+            os.makedirs(os.path.dirname(self.paths['raw']), exist_ok=True)
+            with open(self.paths['raw'], 'w', encoding='utf-8') as f:
+                json.dump(raw, f, ensure_ascii=False, indent=4)
+            written['raw'] = len(raw)
+            raw_by_id = dict(zip(ids, raw))
+        elif self.stages[0] == 'enrich':
+            # The raw file is the catalog, streamed this run or not (--limit)
+            raw_by_id = load_by_id(self.paths['raw'])
+            ids = list(raw_by_id)
+
+        if 'enrich' in self.stages:
+            # Titles not streamed this run (--limit) keep their enriched record
+            enriched = [self.enriched.get(anime_id)
+                        or self.previous_enriched.get(anime_id)
+                        or merge_previous(raw_by_id[anime_id], None) for anime_id in ids]
+            # Seasons, [無修] copies, 劇場版... of one work share a franchise id
+            clusters = cluster_franchises(enriched, cross_platform.aod_service)
+            for anime in enriched:
+                anime['franchiseId'] = clusters[str(anime['id'])]
+            for anime_id, anime in self.generated.items():
+                anime['franchiseId'] = clusters.get(anime_id, anime.get('franchiseId'))
+            cross_platform.save_data(enriched, self.paths['enriched'])
+            written['enriched'] = len(enriched)
+            logger.info(f"Grouped {len(enriched)} animes into {len(set(clusters.values()))} franchises; "
+                        f"shared ratings with {self.shared} copies of an installment.")
+            pending = dict(zip(ids, enriched))
+        elif self.stages[0] == 'generate':
+            # The enriched file is the catalog, streamed this run or not (--limit)
+            pending = load_by_id(self.paths['enriched'])
+            ids = list(pending)
+        else:
+            pending = {}
+
+        if 'generate' in self.stages:
+            final = []
+            for anime_id in ids:
+                if anime_id in self.dropped:
+                    continue
+                record = self.generated.get(anime_id)
+                if record is None and anime_id in pending:
+                    # Carried over from an earlier run, not streamed this time
+                    record = self.generate(pending[anime_id])
+                if record is not None:
+                    final.append(record)
+
+            report = validate_records(final)
+            generate_json.save_json(report, self.paths['report'])
+            for line in summary_lines(report):
+                logger.info(line)
+            if generate_json.save_json_if_changed(final, self.paths['output']):
+                logger.info(f"Wrote {self.paths['output']} with {len(final)} items.")
+            else:
+                logger.info(f"{self.paths['output']} is unchanged ({len(final)} items), not rewritten.")
+            bundle = write_bundle(final, self.paths['bundle'])
+            logger.info(f"Bundle: {len(bundle['changed'])}/{len(bundle['shards'])} shards changed, "
+                        f"{bundle['changedBytes']} of {bundle['totalBytes']} bytes rewritten.")
+            written['output'] = len(final)
+        return written
+
+def load_enrich_services(paths: Dict[str, str]):
+    """cross_platform's services, pointed at absolute paths."""
+    cross_platform.MANUAL_MAPPING_FILE = MANUAL_MAPPING_FILE
+    cross_platform.AOD_FILE = paths['aod']
+    cross_platform.AOD_INDEX_FILE = paths['aod_index']
+    cross_platform.load_services()
+    if cross_platform.aod_service:
+        cross_platform.aod_service.load()
+
+def run(stages: Sequence[str] = STAGES, data_dir: str = DATA_DIR, limit: Optional[int] = None,
+        enrich_workers: int = 1, queue_size: int = QUEUE_SIZE) -> Dict[str, Dict]:
+    """Run the pipeline; returns per-stage stats."""
+    paths = data_paths(data_dir)
+    stages = list(stages)
+    start_file = {'enrich': paths['raw'], 'generate': paths['enriched']}.get(stages[0])
+    if start_file and not os.path.exists(start_file):
+        logger.error(f"Input file not found: {start_file}")
+        return {}
+
+    mappings = generate_json.load_manual_mappings(MANUAL_MAPPING_FILE) if 'generate' in stages else {}
+    pipeline = Pipeline(stages, paths, mappings)
+    if 'enrich' in stages:
+        load_enrich_services(paths)
+        pipeline.prepare_enrich()
+
+    logger.info(f"Running {' -> '.join(stages)} (data: {os.path.abspath(data_dir)})")
+    started = time.perf_counter()
+    _, stats = run_stages(pipeline.source(limit), pipeline.stage_list(enrich_workers), queue_size)
+    written = pipeline.finish()
+    if 'enrich' in stages:
+        cross_platform.close_providers()
+    elapsed = time.perf_counter() - started
+
+    for name, stage in stats.items():
+        logger.info(f"[{name}] {stage['received']} in, {stage['emitted']} out, {stage['dropped']} dropped "
+                    f"({stage['errors']} errors), {stage['seconds']:.1f}s busy")
+    logger.info(f"Pipeline finished in {elapsed:.1f}s: " + ', '.join(f"{name} {n}" for name, n in written.items()))
+    return stats
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Scrape, enrich and generate in one streaming run.")
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help="Comma-separated contiguous stages to run (default: scrape,enrich,generate)")
+    parser.add_argument('--limit', type=int, default=None, help="Only the first N source records")
+    parser.add_argument('--enrich-workers', type=int, default=1,
+                        help="Threads in the enrich stage (providers rate-limit per process)")
+    parser.add_argument('--queue-size', type=int, default=QUEUE_SIZE, help="Records buffered between stages")
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    args = parser.parse_args()
+    # The stage modules configure logging when imported; this run's setup wins
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', force=True)
+    try:
+        selected = parse_stages(args.stages)
+    except ValueError as e:
+        parser.error(str(e))
+    run(selected, args.data_dir, args.limit, args.enrich_workers, args.queue_size)
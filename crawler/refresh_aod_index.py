@@ -0,0 +1,90 @@
+"""
+Apply a new anime-offline-database release to the persisted AOD index.
+
+Instead of rebuilding the whole title index every week, the new JSONL is
+diffed against the persisted index (the previous release) by `sources`
+identity, and only added/removed/updated entries are re-indexed.
+
+The report lists already-enriched Bahamut titles whose AOD match changed,
+so only those records need to be re-enriched.
+
+Usage:
+    python refresh_aod_index.py [--release PATH] [--index PATH] [--report PATH]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.aod_service import AnimeOfflineDatabase
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+AOD_FILE = '../data/anime-offline-database.jsonl'
+AOD_INDEX_FILE = '../data/aod_index.json'
+ENRICHED_FILE = '../data/animes_enriched.json'
+REPORT_FILE = '../data/aod_remap_report.json'
+
+def lookup_all(aod: AnimeOfflineDatabase, animes: list) -> dict:
+    return {str(anime['id']): aod.lookup_bahamut(anime) for anime in animes}
+
+def refresh(release: str, index_path: str, enriched_path: str, workers: int = 1) -> dict:
+    aod = AnimeOfflineDatabase(release, index_path=index_path, workers=workers)
+    if not aod.load_index():
+        # First run: nothing to diff against, build and persist the full index
+        logger.info("No persisted index found. Building from scratch...")
+        aod.load()
+        return {'delta': None, 'remapped': []}
+
+    animes = []
+    if os.path.exists(enriched_path):
+        with open(enriched_path, 'r', encoding='utf-8') as f:
+            animes = json.load(f)
+
+    before = lookup_all(aod, animes)
+    delta = aod.apply_release(release)
+    aod.save_index()
+    after = lookup_all(aod, animes)
+
+    remapped = []
+    for anime in animes:
+        anime_id = str(anime['id'])
+        if before[anime_id] != after[anime_id]:
+            current = anime.get('ratings', {}).get('myanimelist', {}).get('id')
+            remapped.append({
+                'id': anime_id,
+                'title': anime.get('title'),
+                'titleOriginal': anime.get('titleOriginal'),
+                'previous_mal_id': before[anime_id],
+                'new_mal_id': after[anime_id],
+                'enriched_mal_id': current,
+            })
+            logger.info(f"[{anime.get('title')}] AOD match changed: {before[anime_id]} -> {after[anime_id]}")
+
+    return {'delta': delta, 'remapped': remapped}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--release', default=AOD_FILE, help='New AOD JSONL release')
+    parser.add_argument('--index', default=AOD_INDEX_FILE, help='Persisted index to update')
+    parser.add_argument('--enriched', default=ENRICHED_FILE, help='Enriched Bahamut data to check')
+    parser.add_argument('--report', default=REPORT_FILE, help='Where to write the remap report')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Processes for the initial full build')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.release):
+        logger.error(f"AOD release not found: {args.release}")
+        return
+
+    report = refresh(args.release, args.index, args.enriched, args.workers)
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    logger.info(f"{len(report['remapped'])} enriched titles map differently. Report: {args.report}")
+
+if __name__ == '__main__':
+    main()
@@ -1,24 +1,263 @@
+import hashlib
 import json
 import logging
 import os
 import sys
-from typing import Dict, List, Optional, Set, Any
+import time
+from typing import Dict, List, Optional, Set, Any, Callable, Tuple
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Add parent directory to path to import lib
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from lib.text_cleaner import normalize_for_match
+from lib.text_cleaner import normalize_for_match, clean_bahamut_title, extract_bahamut_type, BAHAMUT_TYPE_LABELS
 
 logger = logging.getLogger(__name__)
 
+# Every entry we can index links to MAL. Lines without this marker are skipped
+# before they are decoded at all.
+MAL_SOURCE_MARKER = 'myanimelist.net/anime/'
+_MAL_SOURCE_MARKER_BYTES = MAL_SOURCE_MARKER.encode('utf-8')
+
+# Bump when the persisted index layout changes.
+INDEX_FORMAT = 2
+
+# AOD types accepted when a lookup asks for a type. Bahamut's labels are coarser
+# than AOD's: a 特別篇 may be listed as SPECIAL, OVA or ONA; web series as ONA.
+COMPATIBLE_AOD_TYPES = {
+    'TV': ('TV', 'ONA'),
+    'MOVIE': ('MOVIE',),
+    'OVA': ('OVA', 'SPECIAL'),
+    'SPECIAL': ('SPECIAL', 'OVA', 'ONA'),
+}
+
+# Decoders in order of preference when none is requested explicitly.
+JSON_DECODERS = ('msgspec', 'orjson', 'json')
+
+# Projection of an AOD entry: (sources, title, synonyms, year, type, relatedAnime)
+Projection = Tuple[List[str], Optional[str], List[str], Optional[int], Optional[str], List[str]]
+
+if msgspec is not None:
+    class _AODSeason(msgspec.Struct):
+        year: Optional[int] = None
+
+    class _AODProjection(msgspec.Struct):
+        """The only AOD fields the index reads. Everything else is skipped by the decoder."""
+        sources: List[str] = []
+        title: Optional[str] = None
+        synonyms: List[str] = []
+        animeSeason: Optional[_AODSeason] = None
+        type: Optional[str] = None
+        relatedAnime: List[str] = []
+
+def available_decoders() -> List[str]:
+    """Names of the JSON decoders importable in this environment."""
+    available = {'json': True, 'orjson': orjson is not None, 'msgspec': msgspec is not None}
+    return [name for name in JSON_DECODERS if available[name]]
+
+def resolve_decoder(name: Optional[str] = None) -> str:
+    """
+    Pick the decoder to use. None means "fastest available".
+    An unavailable decoder falls back to stdlib json with a warning.
+    """
+    if name is None:
+        return available_decoders()[0]
+    if name not in JSON_DECODERS:
+        raise ValueError(f"Unknown AOD decoder '{name}'. Expected one of {JSON_DECODERS}.")
+    if name not in available_decoders():
+        logger.warning(f"Decoder '{name}' is not installed, falling back to json.")
+        return 'json'
+    return name
+
+def project_entry(entry: Dict) -> Projection:
+    """Reduce a fully decoded AOD entry to the fields the index needs."""
+    return (
+        entry.get('sources', []),
+        entry.get('title'),
+        entry.get('synonyms', []),
+        (entry.get('animeSeason') or {}).get('year'),
+        entry.get('type'),
+        entry.get('relatedAnime', []),
+    )
+
+def make_projection_decoder(name: str) -> Tuple[Callable[[bytes], Projection], Tuple[type, ...]]:
+    """
+    Build a function turning one raw JSONL line into a Projection.
+    Returns the function and the exception types it raises on malformed lines.
+    """
+    if name == 'msgspec':
+        decoder = msgspec.json.Decoder(_AODProjection)
+
+        def decode(line: bytes) -> Projection:
+            p = decoder.decode(line)
+            year = p.animeSeason.year if p.animeSeason else None
+            return (p.sources, p.title, p.synonyms, year, p.type, p.relatedAnime)
+
+        return decode, (msgspec.DecodeError,)
+
+    loads = orjson.loads if name == 'orjson' else json.loads
+    return (lambda line: project_entry(loads(line))), (ValueError, AttributeError)
+
+def accepted_aod_types(anime_type: Optional[str]) -> Tuple[str, ...]:
+    """AOD types matching a requested type, given in AOD vocabulary or as a Bahamut label."""
+    if not anime_type:
+        return ()
+    anime_type = BAHAMUT_TYPE_LABELS.get(anime_type, anime_type)
+    return COMPATIBLE_AOD_TYPES.get(anime_type, (anime_type,))
+
+def rank_candidates(candidates: List[Dict]) -> Dict:
+    """
+    Precomputed answer for a popularity-ordered candidate list: the overall
+    winner plus the first (most popular) candidate of every type.
+    """
+    by_type = {}
+    for rank, cand in enumerate(candidates):
+        by_type.setdefault(cand.get('type'), (rank, cand['mal_id']))
+    return {'best': candidates[0]['mal_id'], 'by_type': by_type}
+
+def choose_candidate(ranked: Dict, accepted_types: Tuple[str, ...]) -> int:
+    """Most popular candidate of an accepted type, or the overall winner if none match."""
+    typed = [ranked['by_type'][t] for t in accepted_types if t in ranked['by_type']]
+    return min(typed)[1] if typed else ranked['best']
+
+def entry_identity(sources: List[str]) -> str:
+    """Stable identity of an AOD entry across releases: its set of sources."""
+    return hashlib.blake2b('\n'.join(sorted(sources)).encode('utf-8'), digest_size=16).hexdigest()
+
+def line_digest(line: bytes) -> str:
+    """Digest of a raw JSONL line. Equal digests mean the entry did not change at all."""
+    return hashlib.blake2b(line.rstrip(b'\r\n'), digest_size=16).hexdigest()
+
+def projection_digest(projection: Projection) -> str:
+    """Digest of the indexed fields only; changes to pictures, tags etc. don't affect it."""
+    _, title, synonyms, year, anime_type, related = projection
+    payload = json.dumps([title, list(synonyms), year, anime_type, list(related)], ensure_ascii=False)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+def mal_id_from_url(url: str) -> Optional[int]:
+    """MAL id of a https://myanimelist.net/anime/{id} source, else None."""
+    if MAL_SOURCE_MARKER not in url:
+        return None
+    try:
+        return int(url.rstrip('/').split('/')[-1])
+    except ValueError:
+        return None
+
+def build_record(projection: Projection, line_hash: Optional[str] = None,
+                 identity: Optional[str] = None) -> Optional[Dict]:
+    """Turn a projected entry into an index record (the only place titles get normalized)."""
+    sources, title, synonyms, year, anime_type, related = projection
+
+    # Extract MAL ID
+    mal_id = None
+    for source in sources:
+        mal_id = mal_id_from_url(source)
+        if mal_id:
+            break
+
+    if not mal_id:
+        return None # Skip if no MAL ID (not useful for our goal)
+
+    # Store minimal data needed for collision resolution
+    compact_entry = {
+        'mal_id': mal_id,
+        'year': year,
+        'type': anime_type, # TV, MOVIE, OVA, etc.
+        'sources_count': len(sources),
+        'title': title # Original title for debug
+    }
+
+    # Index by Main Title, then Synonyms
+    titles = ([title] if title else []) + list(synonyms)
+    keys = [k for k in dict.fromkeys(normalize_for_match(t) for t in titles) if k]
+
+    return {
+        'id': identity or entry_identity(sources),
+        'line': line_hash,
+        'proj': projection_digest(projection),
+        'keys': keys,
+        'entry': compact_entry,
+        # Sequels, prequels, side stories... as MAL ids (franchise clustering)
+        'related': [r for r in dict.fromkeys(mal_id_from_url(url) for url in related) if r and r != mal_id],
+    }
+
+
+def chunk_ranges(path: str, chunks: int) -> List[Tuple[int, int]]:
+    """Split a JSONL file into byte ranges that start and end on line boundaries."""
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, 'rb') as f:
+        for i in range(1, chunks):
+            f.seek(size * i // chunks)
+            f.readline()  # move to the start of the next full line
+            bounds.append(min(f.tell(), size))
+    bounds.append(size)
+    bounds = sorted(set(bounds))
+    return list(zip(bounds, bounds[1:]))
+
+def build_chunk(path: str, start: int, end: int, decoder_name: str) -> List[Dict]:
+    """
+    Parse and normalize one byte range of a release into index records.
+    Runs in worker processes, so it only takes picklable arguments.
+    """
+    decode, decode_errors = make_projection_decoder(decoder_name)
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    records = []
+    for line in data.split(b'\n'):
+        if _MAL_SOURCE_MARKER_BYTES not in line:
+            continue
+        try:
+            projection = decode(line)
+        except decode_errors:
+            continue
+        record = build_record(projection, line_digest(line))
+        if record:
+            records.append(record)
+    return records
+
 class AnimeOfflineDatabase:
-    def __init__(self, jsonl_path: str):
+    def __init__(self, jsonl_path: str, decoder: Optional[str] = None, index_path: Optional[str] = None,
+                 workers: int = 1):
         self.jsonl_path = jsonl_path
+        self.index_path = index_path
+        # > 1 builds the index in a process pool (see _load_parallel)
+        self.workers = workers
+        self.decoder = resolve_decoder(decoder)
         self.title_index: Dict[str, List[Dict]] = defaultdict(list)
+        # identity -> {'id', 'line', 'proj', 'ord', 'keys', 'entry'}, in release order.
+        # Keeps the normalized keys per entry so releases can be applied as deltas.
+        self.records: Dict[str, Dict] = {}
+        self.release_signature: Optional[List[int]] = None
+        # Collision buckets, see _build_composite_index:
+        #   composite_index[title] -> ranked candidates for the whole bucket
+        #   year_index[(title, year)] -> ranked candidates within year +/- 1
+        self.composite_index: Dict[str, Dict] = {}
+        self.year_index: Dict[Tuple[str, int], Dict] = {}
+        self.composite_ready = False
+        # mal_id -> related MAL ids, built on first use (see related)
+        self.related_index: Optional[Dict[int, List[int]]] = None
         self.is_loaded = False
         
     def load(self):
-        """Load and index the database."""
+        """
+        Load and index the database.
+        If index_path is set, the persisted index is reused as-is. A newer
+        release at jsonl_path is only logged: refresh_aod_index.py applies it
+        and reports the titles whose match changed.
+        """
         if self.is_loaded:
             return
 
@@ -26,70 +265,281 @@ class AnimeOfflineDatabase:
             logger.error(f"AOD file not found at: {self.jsonl_path}")
             return
 
-        logger.info(f"Loading AOD from {self.jsonl_path}...")
+        if self.index_path and self.load_index():
+            if self.release_signature != self._current_signature():
+                logger.warning(f"AOD index {self.index_path} predates {self.jsonl_path}; using it as-is. "
+                               f"Run refresh_aod_index.py to apply the new release.")
+            return
+
+        logger.info(f"Loading AOD from {self.jsonl_path} (decoder: {self.decoder}, workers: {self.workers})...")
         
-        count = 0
         try:
-            with open(self.jsonl_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    try:
-                        entry = json.loads(line)
-                        self._index_entry(entry)
-                        count += 1
-                    except json.JSONDecodeError:
-                        continue
+            if self.workers > 1:
+                count = self._load_parallel()
+            else:
+                count = self._load_serial()
         except Exception as e:
             logger.error(f"Failed to load AOD: {e}")
             raise
 
+        self._build_composite_index()
+        self.release_signature = self._current_signature()
         self.is_loaded = True
-        logger.info(f"Loaded {count} entries. Index size: {len(self.title_index)} unique keys.")
+        logger.info(f"Indexed {count} entries. Index size: {len(self.title_index)} unique keys.")
 
-    def _index_entry(self, entry: Dict):
-        """Add an entry to the index under all its titles."""
-        # Extract MAL ID
-        mal_id = None
-        for source in entry.get('sources', []):
-            if 'myanimelist.net/anime/' in source:
+        if self.index_path:
+            self.save_index()
+
+    def _load_serial(self) -> int:
+        decode, decode_errors = make_projection_decoder(self.decoder)
+        count = 0
+        with open(self.jsonl_path, 'rb') as f:
+            for line in f:
+                # Cheap byte scan: entries without a MAL source are never indexed
+                if _MAL_SOURCE_MARKER_BYTES not in line:
+                    continue
                 try:
-                    mal_id = int(source.split('/')[-1])
-                    break
-                except:
-                    pass
-        
-        if not mal_id:
-            return # Skip if no MAL ID (not useful for our goal)
-
-        # Store minimal data needed for collision resolution
-        compact_entry = {
-            'mal_id': mal_id,
-            'year': entry.get('animeSeason', {}).get('year'),
-            'type': entry.get('type'), # TV, MOVIE, OVA, etc.
-            'sources_count': len(entry.get('sources', [])),
-            'title': entry.get('title') # Original title for debug
-        }
+                    projection = decode(line)
+                except decode_errors:
+                    continue
+                record = build_record(projection, line_digest(line))
+                if record:
+                    self._add_record(record)
+                    count += 1
+        return count
+
+    def _load_parallel(self) -> int:
+        """
+        Parse and normalize byte-range chunks in a process pool, then merge the
+        partial results in file order. Merging goes through the same
+        _add_record path as the serial build, so the index is identical.
+        """
+        # A few chunks per worker keeps the pool busy when chunks are uneven
+        ranges = chunk_ranges(self.jsonl_path, self.workers * 4)
+        count = 0
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(build_chunk, self.jsonl_path, start, end, self.decoder)
+                       for start, end in ranges]
+            for future in futures:
+                for record in future.result():
+                    self._add_record(record)
+                    count += 1
+        return count
 
-        # Index by Main Title
-        main_title = entry.get('title')
-        if main_title:
-            self._add_to_index(main_title, compact_entry)
+    def _current_signature(self) -> List[int]:
+        stat = os.stat(self.jsonl_path)
+        return [stat.st_size, stat.st_mtime_ns]
 
-        # Index by Synonyms
-        for synonym in entry.get('synonyms', []):
-            self._add_to_index(synonym, compact_entry)
+    def _index_entry(self, entry: Dict):
+        """Add a fully decoded entry to the index under all its titles."""
+        record = build_record(project_entry(entry))
+        if record:
+            self._add_record(record)
 
-    def _add_to_index(self, title: str, entry: Dict):
-        norm_title = normalize_for_match(title)
-        if norm_title:
+    def _add_record(self, record: Dict):
+        """Append a record in release order and index it under all its keys."""
+        if record['id'] in self.records:
+            logger.debug(f"Duplicate AOD entry skipped: {record['entry']['title']}")
+            return
+        record['ord'] = len(self.records)
+        self.records[record['id']] = record
+        self.composite_ready = False
+        self.related_index = None
+
+        entry = record['entry']
+        mal_id = entry['mal_id']
+        title_index = self.title_index
+        for norm_title in record['keys']:
+            bucket = title_index.get(norm_title)
+            if bucket is None:
+                title_index[norm_title] = [entry]
             # Check if this mal_id is already in the list for this title (dedupe)
-            exists = False
-            for existing in self.title_index[norm_title]:
-                if existing['mal_id'] == entry['mal_id']:
-                    exists = True
-                    break
-            
-            if not exists:
-                self.title_index[norm_title].append(entry)
+            elif not any(existing['mal_id'] == mal_id for existing in bucket):
+                bucket.append(entry)
+
+    def _rebuild_index(self, records: List[Dict]):
+        """Re-index records (already in release order) without re-normalizing anything."""
+        self.records = {}
+        self.title_index = defaultdict(list)
+        for record in records:
+            self._add_record(record)
+
+    def _apply_changes(self, records: List[Dict], removed: List[Dict], changed: List[Dict]):
+        """
+        Move the index to `records` (new release order) touching only the keys
+        of removed/changed entries. Falls back to a full re-index when surviving
+        entries were reordered, since bucket order decides collision ties.
+        """
+        survivors = [self.records[r['id']]['ord'] for r in records if r['id'] in self.records]
+        if any(a > b for a, b in zip(survivors, survivors[1:])):
+            self._rebuild_index(records)
+            self._build_composite_index()
+            return
+
+        affected: Set[str] = set()
+        for record in removed + changed:
+            affected.update(record['keys'])
+            previous = self.records.get(record['id'])
+            if previous is not None:
+                affected.update(previous['keys'])
+
+        self.records = {}
+        self.related_index = None
+        for ord_, record in enumerate(records):
+            record['ord'] = ord_
+            self.records[record['id']] = record
+
+        for key in affected:
+            self.title_index.pop(key, None)
+        for record in records:
+            if affected.isdisjoint(record['keys']):
+                continue
+            mal_id = record['entry']['mal_id']
+            for key in record['keys']:
+                if key not in affected:
+                    continue
+                bucket = self.title_index.setdefault(key, [])
+                if not any(existing['mal_id'] == mal_id for existing in bucket):
+                    bucket.append(record['entry'])
+
+        self._build_composite_index(affected)
+
+    def _build_composite_index(self, keys: Optional[Set[str]] = None):
+        """
+        Precompute collision resolution for every title with several candidates
+        (or only for `keys`). Candidates are ordered by popularity (sources
+        count, stable w.r.t. release order) and bucketed by year, so lookups
+        return the same answer as _resolve_collision with a dict hit.
+        """
+        if keys is None:
+            self.composite_index = {}
+            self.year_index = {}
+            keys = self.title_index.keys()
+        else:
+            for key in keys:
+                stale = self.composite_index.pop(key, None)
+                for year in (stale or {}).get('years', ()):
+                    self.year_index.pop((key, year), None)
+
+        for key in keys:
+            matches = self.title_index.get(key)
+            if not matches or len(matches) < 2:
+                continue
+            ranked = sorted(matches, key=lambda x: x['sources_count'], reverse=True)
+            dated = [c for c in ranked if c.get('year')]
+            # A query year w matches candidates with |year - w| <= 1
+            windows = sorted({c['year'] + d for c in dated for d in (-1, 0, 1)})
+            for window in windows:
+                in_window = [c for c in dated if abs(c['year'] - window) <= 1]
+                self.year_index[(key, window)] = rank_candidates(in_window)
+            bucket = rank_candidates(ranked)
+            bucket['years'] = windows
+            self.composite_index[key] = bucket
+
+        self.composite_ready = True
+
+    def apply_release(self, jsonl_path: str) -> Dict[str, Any]:
+        """
+        Update the index to a newer AOD release by diffing on `sources` identity.
+
+        Unchanged lines are recognized by their raw digest and never decoded;
+        entries whose indexed fields did not change keep their normalized keys.
+        Only added/updated entries are normalized. The result is identical to a
+        full rebuild from `jsonl_path`.
+
+        Returns a summary with the MAL ids of added, removed and updated entries.
+        """
+        if not self.is_loaded:
+            self.load()
+
+        started = time.perf_counter()
+        by_line = {r['line']: r for r in self.records.values() if r.get('line')}
+        decode, decode_errors = make_projection_decoder(self.decoder)
+
+        new_records: Dict[str, Dict] = {}
+        added, updated = [], []
+        unchanged = 0
+        with open(jsonl_path, 'rb') as f:
+            for line in f:
+                if _MAL_SOURCE_MARKER_BYTES not in line:
+                    continue
+                digest = line_digest(line)
+                record = by_line.get(digest)
+                if record is not None:
+                    unchanged += 1
+                else:
+                    try:
+                        projection = decode(line)
+                    except decode_errors:
+                        continue
+                    identity = entry_identity(projection[0])
+                    previous = self.records.get(identity)
+                    if previous is not None and previous['proj'] == projection_digest(projection):
+                        # Only non-indexed fields (pictures, tags...) changed
+                        record = dict(previous, line=digest)
+                        unchanged += 1
+                    else:
+                        record = build_record(projection, digest, identity)
+                        if record is None:
+                            continue
+                        (updated if previous is not None else added).append(record)
+                new_records.setdefault(record['id'], record)
+
+        removed = [r for identity, r in self.records.items() if identity not in new_records]
+        self._apply_changes(list(new_records.values()), removed, updated + added)
+        self.jsonl_path = jsonl_path
+        self.release_signature = self._current_signature()
+
+        summary = {
+            'added': [r['entry']['mal_id'] for r in added],
+            'removed': [r['entry']['mal_id'] for r in removed],
+            'updated': [r['entry']['mal_id'] for r in updated],
+            'unchanged': unchanged,
+            'seconds': round(time.perf_counter() - started, 3),
+        }
+        logger.info(f"Applied AOD release {jsonl_path}: +{len(added)} -{len(removed)} "
+                    f"~{len(updated)} ({unchanged} unchanged) in {summary['seconds']}s.")
+        return summary
+
+    def save_index(self, index_path: Optional[str] = None):
+        """Persist the index records so later runs can skip the full build."""
+        index_path = index_path or self.index_path
+        payload = {
+            'format': INDEX_FORMAT,
+            'release': self.release_signature,
+            'records': [[r['id'], r['line'], r['proj'], r['keys'], r['entry'], r['related']] for r in self.records.values()],
+        }
+        tmp_path = index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, index_path)
+        logger.info(f"Saved AOD index ({len(self.records)} entries) to {index_path}")
+
+    def load_index(self, index_path: Optional[str] = None) -> bool:
+        """Load a persisted index. Returns False if it is missing or unreadable."""
+        index_path = index_path or self.index_path
+        if not index_path or not os.path.exists(index_path):
+            return False
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+            if payload.get('format') != INDEX_FORMAT:
+                logger.warning(f"Ignoring AOD index with unknown format: {index_path}")
+                return False
+            records = [
+                {'id': identity, 'line': line, 'proj': proj, 'keys': keys, 'entry': entry, 'related': related}
+                for identity, line, proj, keys, entry, related in payload['records']
+            ]
+        except Exception as e:
+            logger.warning(f"Could not read AOD index {index_path}: {e}")
+            return False
+
+        self._rebuild_index(records)
+        self._build_composite_index()
+        self.release_signature = payload.get('release')
+        self.is_loaded = True
+        logger.info(f"Loaded persisted AOD index: {len(self.records)} entries, {len(self.title_index)} unique keys.")
+        return True
 
     def lookup(self, title: str, year: int = None, anime_type: str = None) -> Optional[int]:
         """
@@ -108,9 +558,43 @@ class AnimeOfflineDatabase:
         if len(matches) == 1:
             return matches[0]['mal_id']
             
-        # Collision Resolution
+        # Collision Resolution: precomputed buckets, (title, year) first
+        if self.composite_ready:
+            bucket = self.composite_index.get(norm_title)
+            if bucket is not None:
+                if year:
+                    bucket = self.year_index.get((norm_title, year), bucket)
+                return choose_candidate(bucket, accepted_aod_types(anime_type))
+
+        # Index changed since the buckets were built: run the full cascade
         return self._resolve_collision(matches, year, anime_type)
 
+    def related(self, mal_id: int) -> List[int]:
+        """MAL ids listed in the entry's relatedAnime (sequels, prequels, side stories...)."""
+        if not self.is_loaded:
+            self.load()
+        if self.related_index is None:
+            self.related_index = {}
+            for record in self.records.values():
+                self.related_index.setdefault(record['entry']['mal_id'], record.get('related', []))
+        return self.related_index.get(mal_id, [])
+
+    def lookup_bahamut(self, anime: Dict) -> Optional[int]:
+        """
+        AOD step of cross_platform.enrich_anime for a Bahamut record:
+        cleaned Japanese title first, then the English one, both with the
+        year and the release type read from the Bahamut title.
+        """
+        year = anime.get('year')
+        anime_type = extract_bahamut_type(anime.get('title'))
+        for field in ('titleOriginal', 'titleEnglish'):
+            clean = clean_bahamut_title(anime.get(field))
+            if clean:
+                mal_id = self.lookup(clean, year, anime_type)
+                if mal_id:
+                    return mal_id
+        return None
+
     def _resolve_collision(self, matches: List[Dict], year: int = None, anime_type: str = None) -> int:
         """
         Pick the best match among multiple candidates.
@@ -133,11 +617,11 @@ class AnimeOfflineDatabase:
             return candidates[0]['mal_id']
 
         # 2. Filter by Type (if provided)
-        # Bahamut types might not match AOD types perfectly, needs mapping if we use this strictly.
         # AOD types: TV, MOVIE, OVA, ONA, SPECIAL, MUSIC
-        # For now, simplistic check if type is passed
-        if anime_type:
-             type_matches = [c for c in candidates if c.get('type') == anime_type]
+        # Bahamut labels are mapped onto compatible AOD types (COMPATIBLE_AOD_TYPES)
+        accepted = accepted_aod_types(anime_type)
+        if accepted:
+             type_matches = [c for c in candidates if c.get('type') in accepted]
              if type_matches:
                  candidates = type_matches
 
@@ -0,0 +1,185 @@
+"""
+Franchise clustering for Bahamut records.
+
+Bahamut lists one entry per season, uncensored copy ([無修]), 劇場版 and
+特別篇. Records are grouped with a union-find over three kinds of edges:
+    - same franchise key (lib.text_cleaner.franchise_key of the Chinese title)
+    - same ACG database page (acgUrl)
+    - AOD: same MAL id, or MAL ids linked through relatedAnime
+Only some of those edges join one installment: a [無修] copy, a dub or a
+re-listing under another title shares the exact lookup signature, the
+cleaned Chinese title with year and type, the ACG page and year, or the MAL
+id (installment_keys). RatingDonors tracks fully rated records under those
+keys, so cross_platform and pipeline look each installment up once and copy
+the ratings to the others. Title-key and relatedAnime edges join different
+seasons and movies, whose ratings differ; they only set franchiseId.
+"""
+import os
+import sys
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.text_cleaner import clean_bahamut_title, extract_bahamut_type, franchise_key, normalize_for_match
+
+# Ratings shared between exact duplicates (Bahamut's own score is per entry)
+SHARED_PLATFORMS = ('myanimelist', 'imdb', 'douban')
+
+class UnionFind:
+    """Disjoint sets over hashable items, with path halving and union by size."""
+
+    def __init__(self, items: Iterable[Hashable] = ()):
+        self.parent: Dict[Hashable, Hashable] = {}
+        self.size: Dict[Hashable, int] = {}
+        for item in items:
+            self.add(item)
+
+    def add(self, item: Hashable):
+        if item not in self.parent:
+            self.parent[item] = item
+            self.size[item] = 1
+
+    def find(self, item: Hashable) -> Hashable:
+        self.add(item)
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, a: Hashable, b: Hashable) -> bool:
+        """Merge the sets of a and b; False if they were already together."""
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return False
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        return True
+
+    def groups(self) -> Dict[Hashable, List[Hashable]]:
+        """root -> members, in insertion order."""
+        groups: Dict[Hashable, List[Hashable]] = {}
+        for item in self.parent:
+            groups.setdefault(self.find(item), []).append(item)
+        return groups
+
+def _id_order(anime_id: str) -> Tuple[int, object]:
+    # Bahamut ids are numeric strings; compare them as numbers
+    return (0, int(anime_id)) if anime_id.isdigit() else (1, anime_id)
+
+def lookup_signature(anime: Dict) -> Tuple:
+    """
+    What the provider lookups depend on: the cleaned, normalized titles, the
+    year and the release type. Records with equal signatures get equal results.
+    """
+    return (
+        normalize_for_match(clean_bahamut_title(anime.get('title'))),
+        normalize_for_match(clean_bahamut_title(anime.get('titleOriginal'))),
+        normalize_for_match(clean_bahamut_title(anime.get('titleEnglish'))),
+        anime.get('year'),
+        extract_bahamut_type(anime.get('title')),
+    )
+
+def mal_id_of(anime: Dict, aod=None) -> Optional[int]:
+    """The record's MAL id, or the one AOD matches (`aod`, optional) when it has none."""
+    mal_id = anime.get('ratings', {}).get('myanimelist', {}).get('id')
+    if not mal_id and aod is not None:
+        mal_id = aod.lookup_bahamut(anime)
+    return int(mal_id) if mal_id else None
+
+def installment_keys(anime: Dict, aod=None) -> List[Tuple]:
+    """
+    Keys under which two records are one installment and get the same
+    provider results: the lookup signature, the cleaned Chinese title with
+    year and type (other titles missing on one copy), the ACG page with the
+    year, and the MAL id.
+    """
+    title = anime.get('title')
+    keys = [('signature',) + lookup_signature(anime)]
+    cleaned = normalize_for_match(clean_bahamut_title(title))
+    if cleaned:
+        keys.append(('title', cleaned, anime.get('year'), extract_bahamut_type(title)))
+    if anime.get('acgUrl'):
+        keys.append(('acg', anime['acgUrl'], anime.get('year')))
+    mal_id = mal_id_of(anime, aod)
+    if mal_id:
+        keys.append(('mal', mal_id))
+    return keys
+
+class RatingDonors:
+    """
+    Records to copy ratings from, by installment key. Callers decide what
+    to register (fully rated records, successful lookups); manual mappings
+    are per record and should neither give nor take.
+    """
+
+    def __init__(self, aod=None):
+        self.aod = aod
+        self.donors: Dict[Tuple, Dict] = {}
+
+    def keys(self, anime: Dict) -> List[Tuple]:
+        return installment_keys(anime, self.aod)
+
+    def add(self, anime: Dict, keys: Optional[List[Tuple]] = None):
+        # Keys are taken after the lookup too, which may have found the MAL id
+        for key in (keys or []) + self.keys(anime):
+            self.donors.setdefault(key, anime)
+
+    def find(self, keys: List[Tuple]) -> Optional[Dict]:
+        return next((self.donors[key] for key in keys if key in self.donors), None)
+
+def cluster_franchises(animes: List[Dict], aod=None) -> Dict[str, str]:
+    """
+    Group Bahamut records into franchises.
+
+    `aod` (AnimeOfflineDatabase, optional) adds the MAL edges: records whose
+    existing or AOD-matched MAL ids are equal or related. Returns
+    {anime id: franchise id}; the franchise id is the smallest member id.
+    """
+    uf = UnionFind(str(anime['id']) for anime in animes)
+    first_seen: Dict[Tuple[str, Hashable], str] = {}
+
+    def link(kind: str, value: Hashable, anime_id: str):
+        if value:
+            uf.union(first_seen.setdefault((kind, value), anime_id), anime_id)
+
+    mal_ids: Dict[str, int] = {}
+    for anime in animes:
+        anime_id = str(anime['id'])
+        link('title', franchise_key(anime.get('title')), anime_id)
+        link('acg', anime.get('acgUrl'), anime_id)
+
+        mal_id = mal_id_of(anime, aod)
+        if mal_id:
+            mal_ids[anime_id] = mal_id
+            link('mal', mal_id, anime_id)
+
+    if aod is not None:
+        for anime_id, mal_id in mal_ids.items():
+            for related_id in aod.related(mal_id):
+                other = first_seen.get(('mal', related_id))
+                if other:
+                    uf.union(anime_id, other)
+
+    clusters = {}
+    for members in uf.groups().values():
+        franchise_id = min(members, key=_id_order)
+        for anime_id in members:
+            clusters[anime_id] = franchise_id
+    return clusters
+
+def share_ratings(source: Dict, target: Dict, platforms: Tuple[str, ...] = SHARED_PLATFORMS) -> int:
+    """Copy the platform ratings `target` is missing from `source`. Returns how many were copied."""
+    ratings = target.setdefault('ratings', {})
+    copied = 0
+    for platform in platforms:
+        rating = source.get('ratings', {}).get(platform)
+        if rating and platform not in ratings:
+            ratings[platform] = dict(rating)
+            copied += 1
+    return copied
+
+def has_all_ratings(anime: Dict, platforms: Tuple[str, ...] = SHARED_PLATFORMS) -> bool:
+    ratings = anime.get('ratings', {})
+    return all(platform in ratings for platform in platforms)
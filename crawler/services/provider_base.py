@@ -0,0 +1,42 @@
+import asyncio
+import functools
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor
+from typing import Any, Dict, List, Optional
+
+class AnimeProvider(ABC):
+    """
+    Async interface over a rating platform (MAL, IMDb, Douban).
+
+    The HTTP clients underneath are blocking (requests + per-provider rate
+    limiting), so implementations hand them to a thread with `_call`. Each
+    provider keeps its own rate limit; awaiting two providers at once only
+    overlaps their network waits.
+
+    - search(query, ...) -> provider id of the best candidate, or None
+    - details(id)        -> provider payload (same dict as the sync API), or None
+    - rating(id)         -> {'score', 'votes' | 'members', 'id'} for anime['ratings'], or None
+    """
+
+    name: str = ''
+
+    def __init__(self, executor: Optional[Executor] = None):
+        # None: the running loop's default thread pool
+        self.executor = executor
+
+    async def _call(self, fn, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    @abstractmethod
+    async def search(self, query: str, year: Optional[int] = None, anime_type: Optional[str] = None,
+                     alt_titles: Optional[List[str]] = None) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    async def details(self, provider_id: Any) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def rating(self, provider_id: Any) -> Optional[Dict[str, Any]]:
+        ...
@@ -0,0 +1,160 @@
+import copy
+import json
+import pytest
+import refresh_aod_index
+from services.aod_service import AnimeOfflineDatabase, available_decoders
+
+ENTRIES = [
+    {'$schema': 'metadata line without sources'},
+    {
+        'sources': ['https://anidb.net/anime/1', 'https://myanimelist.net/anime/100'],
+        'title': '進撃の巨人', 'synonyms': ['Attack on Titan', 'Shingeki no Kyojin'],
+        'type': 'TV', 'animeSeason': {'season': 'SPRING', 'year': 2013},
+        'picture': 'https://example.com/1.jpg', 'tags': ['action'],
+    },
+    {
+        'sources': ['https://myanimelist.net/anime/200', 'https://anilist.co/anime/2', 'https://kitsu.app/anime/2'],
+        'title': 'Hero', 'synonyms': [], 'type': 'MOVIE', 'animeSeason': {'year': 2020},
+    },
+    {
+        'sources': ['https://myanimelist.net/anime/201'],
+        'title': 'Hero', 'synonyms': ['HERO!'], 'type': 'TV', 'animeSeason': {'year': 2005},
+    },
+    {
+        'sources': ['https://anidb.net/anime/9'],
+        'title': 'Not On MAL', 'synonyms': [], 'type': 'TV', 'animeSeason': {'year': 2001},
+    },
+]
+
+def write_release(path, entries):
+    with open(path, 'w', encoding='utf-8') as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        f.write('{not valid json\n')
+    return str(path)
+
+@pytest.fixture
+def aod_file(tmp_path):
+    return write_release(tmp_path / 'aod.jsonl', ENTRIES)
+
+def next_release():
+    """ENTRIES with one entry retitled, one removed, one added and one cosmetic change."""
+    entries = copy.deepcopy(ENTRIES)
+    entries[1]['picture'] = 'https://example.com/new.jpg'
+    entries[2]['synonyms'] = ['Hero The Movie']
+    del entries[3]
+    entries.insert(1, {
+        'sources': ['https://myanimelist.net/anime/300'],
+        'title': 'Hero', 'synonyms': [], 'type': 'OVA', 'animeSeason': {'year': 2006},
+    })
+    return entries
+
+@pytest.mark.parametrize('decoder', available_decoders())
+def test_projection_decoders_build_identical_index(aod_file, decoder):
+    """Every decoder must produce the same index as indexing fully decoded entries."""
+    reference = AnimeOfflineDatabase(aod_file, decoder='json')
+    for entry in ENTRIES:
+        reference._index_entry(entry)
+
+    aod = AnimeOfflineDatabase(aod_file, decoder=decoder)
+    aod.load()
+    assert dict(aod.title_index) == dict(reference.title_index)
+
+def test_lookup(aod_file):
+    aod = AnimeOfflineDatabase(aod_file)
+    assert aod.lookup('attack on titan') == 100
+    assert aod.lookup('Not On MAL') is None
+    # Collision: year disambiguates, otherwise the entry with more sources wins
+    assert aod.lookup('Hero', 2005) == 201
+    assert aod.lookup('Hero') == 200
+
+def test_unknown_decoder_rejected(aod_file):
+    with pytest.raises(ValueError):
+        AnimeOfflineDatabase(aod_file, decoder='yaml')
+
+def test_apply_release_matches_full_rebuild(tmp_path, aod_file):
+    new_file = write_release(tmp_path / 'aod_next.jsonl', next_release())
+    index_path = str(tmp_path / 'index.json')
+
+    aod = AnimeOfflineDatabase(aod_file, index_path=index_path)
+    aod.load()
+    persisted = AnimeOfflineDatabase(new_file, index_path=index_path)
+    assert persisted.load_index()
+    delta = persisted.apply_release(new_file)
+
+    assert delta['added'] == [300]
+    assert delta['removed'] == [201]
+    assert delta['updated'] == [200]
+
+    full = AnimeOfflineDatabase(new_file)
+    full.load()
+    assert dict(persisted.title_index) == dict(full.title_index)
+    assert [r['id'] for r in persisted.records.values()] == [r['id'] for r in full.records.values()]
+    assert persisted.composite_index == full.composite_index
+    assert persisted.year_index == full.year_index
+    assert persisted.lookup('Hero', 2005) == 300
+
+def test_load_reuses_persisted_index(tmp_path, aod_file):
+    index_path = str(tmp_path / 'index.json')
+    AnimeOfflineDatabase(aod_file, index_path=index_path).load()
+
+    aod = AnimeOfflineDatabase(aod_file, index_path=index_path)
+    aod.load()
+    assert aod.lookup('Shingeki no Kyojin') == 100
+
+def test_load_leaves_new_release_to_refresh(tmp_path, aod_file):
+    index_path = str(tmp_path / 'index.json')
+    AnimeOfflineDatabase(aod_file, index_path=index_path).load()
+    write_release(aod_file, next_release())
+
+    stale = AnimeOfflineDatabase(aod_file, index_path=index_path)
+    stale.load()
+    assert stale.lookup('Hero', 2005) != 300
+
+    report = refresh_aod_index.refresh(aod_file, index_path, str(tmp_path / 'missing.json'))
+    assert report['delta']['added'] == [300]
+    fresh = AnimeOfflineDatabase(aod_file, index_path=index_path)
+    fresh.load()
+    assert fresh.lookup('Hero', 2005) == 300
+
+def test_parallel_build_matches_serial(tmp_path):
+    entries = ENTRIES + [
+        {'sources': [f'https://myanimelist.net/anime/{1000 + i}'], 'title': f'Show {i % 7}',
+         'synonyms': [f'Alias {i}'], 'type': 'TV', 'animeSeason': {'year': 2000 + i % 20}}
+        for i in range(200)
+    ]
+    path = write_release(tmp_path / 'aod_big.jsonl', entries)
+
+    serial = AnimeOfflineDatabase(path)
+    serial.load()
+    parallel = AnimeOfflineDatabase(path, workers=3)
+    parallel.load()
+
+    assert dict(parallel.title_index) == dict(serial.title_index)
+    assert list(parallel.records) == list(serial.records)
+
+def test_composite_index_matches_collision_cascade(tmp_path):
+    """Precomputed buckets must give the same answer as _resolve_collision."""
+    types = ['TV', 'MOVIE', 'OVA', 'ONA', 'SPECIAL', None]
+    entries = [
+        {'sources': ['x'] * (i % 4) + [f'https://myanimelist.net/anime/{500 + i}'],
+         'title': f'Generic {i % 5}', 'synonyms': [], 'type': types[i % 6],
+         'animeSeason': {'year': 2000 + (i * 7) % 11 if i % 9 else None}}
+        for i in range(120)
+    ]
+    aod = AnimeOfflineDatabase(write_release(tmp_path / 'aod_generic.jsonl', entries))
+    aod.load()
+    assert aod.composite_ready
+
+    for key, matches in aod.title_index.items():
+        for year in [None, 1998, 1999, 2000, 2004, 2010, 2011, 2012]:
+            for anime_type in [None, 'TV', 'MOVIE', '特別篇', '電影', 'OVA']:
+                expected = aod._resolve_collision(matches, year, anime_type)
+                assert aod.lookup(key, year, anime_type) == expected
+
+def test_bahamut_type_labels_filter_candidates(aod_file):
+    aod = AnimeOfflineDatabase(aod_file)
+    # 'Hero' exists as a MOVIE (3 sources) and a TV series (1 source)
+    assert aod.lookup('Hero', anime_type='TV') == 201
+    assert aod.lookup('Hero', anime_type='電影') == 200
+    assert aod.lookup_bahamut({'title': 'Hero (TV版) [1]', 'titleOriginal': 'Hero'}) == 201
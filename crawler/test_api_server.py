@@ -0,0 +1,134 @@
+import gzip
+import http.client
+import json
+import threading
+
+import pytest
+
+import api_server
+from lib import catalog_store
+from api_server import CatalogApi, make_server
+from lib.catalog_store import CatalogStore, parse_weights, parse_year_option
+
+def anime(i, year, genres, bahamut, votes, **ratings):
+    record = {'id': str(i), 'title': f'作品 {i} [1]', 'year': year, 'genres': genres,
+              'ratings': {'bahamut': {'score': bahamut, 'votes': votes}}}
+    for platform, score in ratings.items():
+        record['ratings'][platform] = {'score': score}
+    return record
+
+ANIMES = [
+    anime(0, 2024, ['奇幻'], 4.5, 100, imdb=7.0),
+    anime(1, 2015, ['喜劇', '奇幻'], 4.9, 10),
+    anime(2, 2012, ['喜劇'], 3.0, 500, imdb=9.5, myanimelist=8.0),
+    anime(3, 2019, ['戀愛'], 4.0, 50, douban=9.0),
+]
+
+@pytest.fixture
+def api():
+    return CatalogApi(CatalogStore(ANIMES), modified=1_700_000_000)
+
+def get(api, path, headers=None, **query):
+    status, response_headers, body = api.handle('GET', path, {k: str(v) for k, v in query.items()}, headers)
+    if response_headers.get('Content-Encoding') == 'gzip':
+        body = gzip.decompress(body)
+    return status, response_headers, json.loads(body) if body else None
+
+def ids(result):
+    return [item['id'] for item in result['items']]
+
+def test_filters_sorting_and_paging(api):
+    assert ids(get(api, '/api/animes')[2]) == ['1', '0', '3', '2']
+    assert ids(get(api, '/api/animes', genre='喜劇,戀愛')[2]) == ['1', '3', '2']  # any of the genres
+    assert ids(get(api, '/api/animes', year='2010-2019', minVotes=50, sort='imdb')[2]) == ['2', '3']
+    assert ids(get(api, '/api/animes', year='2024', genre='喜劇')[2]) == []
+    assert ids(get(api, '/api/animes', q='作品 2', genre='奇幻')[2]) == ['2']  # search replaces the filters
+
+    _, _, page = get(api, '/api/animes', sort='douban', page=2, pageSize=3)
+    assert (page['total'], page['pages'], ids(page)) == (4, 2, ['2'])  # rated first, then by Bahamut score
+
+def test_composite_ranking(api):
+    # Equal weights: 1 -> 9.8, 3 -> (8+9)/2, 0 -> (9+7)/2, 2 -> (6+9.5+8)/3
+    assert ids(get(api, '/api/ranking')[2]) == ['1', '3', '0', '2']
+    assert ids(get(api, '/api/animes', sort='composite', weights='imdb:100')[2]) == ['2', '0', '1', '3']
+    assert get(api, '/api/ranking', weights='imdb:100')[2] == get(api, '/api/animes', sort='composite', weights='imdb:100')[2]
+
+def test_composite_cache_is_thread_safe(monkeypatch):
+    # A tiny cache makes threads evict each other's entries constantly
+    monkeypatch.setattr(catalog_store, 'COMPOSITE_CACHE_SIZE', 2)
+    store = CatalogStore(ANIMES)
+    expected = {w: store.composite_order({'bahamut': 1.0, 'imdb': float(w)}) for w in range(6)}
+    errors = []
+    def worker():
+        try:
+            for n in range(300):
+                w = n % 6
+                assert store.composite_order({'bahamut': 1.0, 'imdb': float(w)}) == expected[w]
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == [] and len(store._composite) <= 2
+
+def test_errors_and_records(api):
+    assert get(api, '/api/animes/3')[2]['ratings']['douban']['score'] == 9.0
+    assert get(api, '/api/animes/99')[0] == 404
+    assert get(api, '/api/nope')[0] == 404
+    for query in ({'year': '20'}, {'sort': 'kitsu'}, {'weights': 'kitsu:1'}, {'pageSize': 1000}, {'page': 'x'}):
+        status, headers, body = get(api, '/api/animes', **query)
+        assert status == 400 and 'error' in body and 'ETag' not in headers
+    _, _, facets = get(api, '/api/facets')
+    assert facets['count'] == 4 and facets['yearRange'] == [2012, 2024]
+
+def test_etag_last_modified_and_gzip(api, monkeypatch):
+    monkeypatch.setattr(api_server, 'GZIP_MIN_BYTES', 300)
+    status, headers, _ = get(api, '/api/animes', genre='奇幻', sort='imdb')
+    assert status == 200 and headers['Last-Modified'] == 'Tue, 14 Nov 2023 22:13:20 GMT'
+    # Same query in another parameter order -> same ETag
+    _, same, _ = get(api, '/api/animes', sort='imdb', genre='奇幻')
+    assert same['ETag'] == headers['ETag'] != get(api, '/api/animes')[1]['ETag']
+    assert get(api, '/api/animes', {'If-None-Match': headers['ETag']}, genre='奇幻', sort='imdb')[0] == 304
+    assert get(api, '/api/animes', {'If-None-Match': '"other"'}, genre='奇幻', sort='imdb')[0] == 200
+    assert get(api, '/api/animes', {'If-Modified-Since': headers['Last-Modified']})[0] == 304
+
+    gzipped = get(api, '/api/animes', {'Accept-Encoding': 'gzip, br'})[1]
+    assert gzipped.get('Content-Encoding') == 'gzip'
+    # Each encoding has its own strong ETag; one never revalidates the other
+    plain = get(api, '/api/animes')[1]
+    assert gzipped['ETag'] == plain['ETag'][:-1] + '-gz"'
+    assert get(api, '/api/animes', {'If-None-Match': gzipped['ETag']})[0] == 200
+    assert get(api, '/api/animes', {'If-None-Match': plain['ETag'], 'Accept-Encoding': 'gzip'})[0] == 200
+    assert get(api, '/api/animes', {'If-None-Match': gzipped['ETag'], 'Accept-Encoding': 'gzip'})[0] == 304
+    # Errors have no validators to revalidate
+    assert get(api, '/api/animes/missing', {'If-Modified-Since': headers['Last-Modified']})[0] == 404
+    assert 'Content-Encoding' not in get(api, '/api/animes')[1]
+    assert 'Content-Encoding' not in get(api, '/api/animes/0', {'Accept-Encoding': 'gzip'})[1]  # under GZIP_MIN_BYTES
+    # A new data version changes every ETag
+    other = CatalogApi(CatalogStore(ANIMES[:3]), modified=1_700_000_000)
+    assert get(other, '/api/animes')[1]['ETag'] != get(api, '/api/animes')[1]['ETag']
+
+def test_http_round_trip(api):
+    server = make_server(api)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+        conn.request('GET', '/api/animes?genre=%E5%96%9C%E5%8A%87&pageSize=1', headers={'Accept-Encoding': 'gzip'})
+        response = conn.getresponse()
+        body = response.read()
+        assert response.status == 200 and json.loads(body)['total'] == 2
+        conn.request('GET', '/api/animes?genre=%E5%96%9C%E5%8A%87&pageSize=1',
+                     headers={'If-None-Match': response.getheader('ETag')})
+        response = conn.getresponse()
+        assert response.status == 304 and response.read() == b''
+        conn.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_option_parsing():
+    assert parse_year_option('2010-2019') == (2010, 2019)
+    assert parse_year_option('all') is None
+    assert parse_weights('bahamut:40,imdb:20') == {'bahamut': 40.0, 'imdb': 20.0, 'douban': 0.0, 'myanimelist': 0.0}
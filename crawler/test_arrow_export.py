@@ -0,0 +1,51 @@
+import pytest
+
+from lib import arrow_export
+from lib.arrow_export import catalog_columns, column_types, write_catalog
+
+ANIMES = [
+    {'id': '1', 'title': '葬送的芙莉蓮 [1]', 'titleOriginal': '葬送のフリーレン', 'year': 2023, 'episodes': 28,
+     'popularity': 500000, 'genres': ['奇幻', '冒險'], 'franchiseId': '1',
+     'ratings': {'bahamut': {'score': 4.9, 'votes': 12345},
+                 'imdb': {'id': 'tt22248376', 'score': 9, 'votes': 40000},
+                 'myanimelist': {'id': 52991, 'score': 9.3, 'members': 1000000}}},
+    {'id': '2', 'title': 'Unknown', 'year': 0, 'episodes': 0, 'genres': [],
+     'ratings': {'bahamut': {'score': 4.0, 'votes': 0}, 'myanimelist': {'id': 1, 'score': None, 'members': 5},
+                 'douban': {'id': 35, 'score': 0, 'votes': 'many'}}},
+]
+
+def test_catalog_columns_flatten_ratings():
+    columns = catalog_columns(ANIMES)
+    assert list(columns) == list(column_types())
+    assert columns['genres'] == [['奇幻', '冒險'], None]
+    assert columns['year'] == [2023, None] and columns['episodes'] == [28, None]  # 0 is "unknown"
+    assert columns['bahamutVotes'] == [12345, 0]
+    assert 'bahamutId' not in columns
+    assert columns['imdbId'] == ['tt22248376', None]
+    assert columns['imdbScore'] == [9.0, None]
+    assert columns['myanimelistId'] == [52991, 1]
+    assert columns['myanimelistScore'] == [9.3, None]
+    assert columns['myanimelistVotes'] == [1000000, 5]  # MAL members
+    assert columns['doubanId'] == [None, '35']
+    assert columns['doubanScore'] == [None, None] and columns['doubanVotes'] == [None, None]
+
+def test_write_catalog_requires_pyarrow(tmp_path, monkeypatch):
+    with pytest.raises(ValueError):
+        write_catalog(ANIMES, str(tmp_path / 'animes.csv'))
+    monkeypatch.setattr(arrow_export, 'pa', None)
+    with pytest.raises(RuntimeError):
+        write_catalog(ANIMES, str(tmp_path / 'animes.parquet'))
+
+@pytest.mark.parametrize('name', ['animes.parquet', 'animes.arrow'])
+def test_write_catalog_round_trip(tmp_path, name):
+    pa = pytest.importorskip('pyarrow')
+    path = tmp_path / name
+    assert write_catalog(ANIMES, str(path)) == path.stat().st_size
+    if name.endswith('.parquet'):
+        table = pytest.importorskip('pyarrow.parquet').read_table(str(path))
+    else:
+        table = pytest.importorskip('pyarrow.feather').read_table(str(path))
+    assert table.schema.field('genres').type == pa.list_(pa.string())
+    assert table.schema.field('year').type == pa.int32()
+    assert table.column('imdbScore').to_pylist() == [9.0, None]
+    assert table.num_rows == 2
@@ -0,0 +1,79 @@
+import pytest
+import douban_api
+import imdb_api
+import mal_api
+from lib import candidate_scoring
+from lib.candidate_scoring import score_candidates, best_candidate, similarity_matrix
+
+CANDIDATES = [
+    {'titles': ['Shingeki no Kyojin: The Final Season'], 'year': 2020, 'type': 'TV'},
+    {'titles': ['Shingeki no Kyojin', 'Attack on Titan'], 'year': 2013, 'type': 'TV'},
+    {'titles': ['Shingeki no Kyojin Movie 1: Guren no Yumiya'], 'year': 2014, 'type': 'MOVIE'},
+]
+
+def test_year_and_type_break_title_ties():
+    ranked = score_candidates(['Shingeki no Kyojin'], CANDIDATES, year=2013, accepted_types=('TV', 'ONA'))
+    assert ranked[0]['candidate'] is CANDIDATES[1]
+    assert ranked[0]['title'] == 1.0 and ranked[0]['year'] == 1.0 and ranked[0]['type'] == 1.0
+    assert ranked[0]['confidence'] == 1.0
+    assert [r['confidence'] for r in ranked] == sorted((r['confidence'] for r in ranked), reverse=True)
+
+def test_every_query_variant_is_scored():
+    # The English variant matches the alternative title of the second candidate
+    ranked = score_candidates(['進撃の巨人', 'Attack on Titan'], CANDIDATES)
+    assert ranked[0]['candidate'] is CANDIDATES[1]
+    assert ranked[0]['year'] is None and ranked[0]['type'] is None
+    assert ranked[0]['confidence'] == ranked[0]['title'] == 1.0
+
+def test_threshold_and_empty_inputs():
+    ranked = score_candidates(['Completely Different'], CANDIDATES, year=1990)
+    assert best_candidate(ranked, 0.65) is None
+    assert score_candidates(['x'], []) == []
+    assert best_candidate([], 0.0) is None
+
+@pytest.mark.parametrize('mode', ['cdist', 'ratio', 'difflib'])
+def test_similarity_backends_agree_on_ranking(monkeypatch, mode):
+    monkeypatch.setattr(candidate_scoring, 'HAS_CDIST', mode == 'cdist' and candidate_scoring.HAS_CDIST)
+    monkeypatch.setattr(candidate_scoring, 'HAS_RAPIDFUZZ', mode != 'difflib' and candidate_scoring.HAS_RAPIDFUZZ)
+    matrix = similarity_matrix(['Kimetsu no Yaiba', 'ＫＩＭＥＴＳＵ'], ['kimetsu no yaiba', 'Kimetsu Gakuen', 'Bleach'])
+    assert matrix[0][0] == 100
+    assert matrix[0][0] > matrix[0][1] > matrix[0][2]
+    assert matrix[1][1] > matrix[1][2]
+
+def test_providers_rank_their_own_result_shapes():
+    jikan = [
+        {'mal_id': 2, 'title': 'Kimetsu no Yaiba Movie: Mugen Ressha-hen', 'title_japanese': '劇場版「鬼滅の刃」無限列車編',
+         'year': None, 'type': 'Movie', 'aired': {'prop': {'from': {'year': 2020}}}},
+        {'mal_id': 1, 'title': 'Kimetsu no Yaiba', 'title_japanese': '鬼滅の刃', 'year': 2019, 'type': 'TV'},
+    ]
+    ranked = mal_api.rank_mal_candidates(jikan, ['鬼滅の刃 無限列車編'], 2020, 'MOVIE')
+    assert ranked[0]['candidate']['anime']['mal_id'] == 2
+    assert ranked[0]['year'] == 1.0
+
+    suggestions = [
+        {'id': 'nm0000001', 'l': 'Kimetsu no Yaiba'},  # a person: never a candidate
+        {'id': 'tt9335498', 'l': 'Demon Slayer: Kimetsu no Yaiba', 'y': 2019, 'qid': 'tvSeries'},
+        {'id': 'tt11032374', 'l': 'Demon Slayer: Mugen Train', 'y': 2020, 'qid': 'movie'},
+    ]
+    ranked = imdb_api.rank_imdb_candidates(suggestions, ['Demon Slayer: Kimetsu no Yaiba'], 2019, 'TV')
+    assert [r['candidate']['item']['id'] for r in ranked] == ['tt9335498', 'tt11032374']
+
+def test_year_mismatch_vetoes_a_sequel_match():
+    # Season 1 (2019) must not be taken for a 2025 season
+    jikan = [{'mal_id': 38691, 'title': 'Dr. Stone', 'title_japanese': 'ドクターストーン', 'year': 2019, 'type': 'TV'}]
+    ranked = mal_api.rank_mal_candidates(jikan, ['Dr.STONE 第4期'], 2025, 'TV')
+    assert ranked[0]['title'] > 0.5
+    assert ranked[0]['confidence'] == 0.0
+    assert best_candidate(ranked, mal_api.MIN_CONFIDENCE) is None
+    # Off by one is still a match
+    assert mal_api.rank_mal_candidates(jikan, ['Dr.STONE'], 2020, 'TV')[0]['confidence'] > mal_api.MIN_CONFIDENCE
+
+def test_douban_needs_some_title_similarity():
+    suggestions = [{'id': '1', 'title': '海贼王', 'sub_title': 'ONE PIECE', 'year': 2022},
+                   {'id': '2', 'title': '间谍过家家', 'sub_title': 'SPY×FAMILY', 'year': 2022}]
+    ranked = douban_api.DoubanClient.rank(suggestions, ['間諜家家酒'], 2022)
+    assert ranked[0]['candidate']['item']['id'] == '2'
+    assert best_candidate(ranked, douban_api.MIN_CONFIDENCE) is not None
+    # The exact year alone scores 0.5 without the title check
+    ranked = douban_api.DoubanClient.rank(suggestions[:1], ['間諜家家酒'], 2022)
+    assert best_candidate(ranked, douban_api.MIN_CONFIDENCE) is None
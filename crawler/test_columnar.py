@@ -0,0 +1,49 @@
+import gzip
+import json
+import generate_json
+from lib.columnar import decode_columnar, encode_columnar, write_columnar
+
+ANIMES = [
+    {'id': '113923', 'bahamutUrl': 'https://ani.gamer.com.tw/animeRef.php?sn=113923',
+     'ratings': {'bahamut': {'score': 4.8, 'votes': 485}, 'myanimelist': {'score': None, 'members': 510, 'id': 61254}},
+     'title': '從前從前有隻貓！ [1]', 'thumbnail': 'https://p2.bahamut.com.tw/B/2KU/42/4bf806e7.JPG',
+     'year': 2025, 'genres': ['喜劇', '溫馨'], 'titleOriginal': 'うごく！ねこむかしばなし'},
+    {'id': '2', 'bahamutUrl': 'https://ani.gamer.com.tw/animeRef.php?sn=2', 'ratings': {'bahamut': {}},
+     'title': 'Two', 'thumbnail': 'https://p2.bahamut.com.tw/B/2KU/42/abc.JPG', 'year': 0, 'genres': ['溫馨'],
+     'tags': []},
+]
+
+def test_round_trip_drops_only_nulls():
+    payload = json.loads(json.dumps(encode_columnar(ANIMES)))
+    expected = json.loads(json.dumps(ANIMES))
+    del expected[0]['ratings']['myanimelist']['score']
+    assert decode_columnar(payload) == expected
+
+def test_dictionary_and_prefix_encoding():
+    payload = encode_columnar(ANIMES)
+    assert payload['dicts']['genres'] == ['溫馨', '喜劇']
+    assert payload['columns']['genres'] == [[1, 0], [0]]
+    assert payload['dicts']['thumbnail'] == ['https://p2.bahamut.com.tw/B/2KU/42/']
+    assert payload['columns']['bahamutUrl'] == [[0, '113923'], [0, '2']]
+    assert payload['columns']['ratings.bahamut'] == [None, {}]
+
+def test_write_precompressed_siblings(tmp_path):
+    path = str(tmp_path / 'animes.columnar.json')
+    sizes = write_columnar(ANIMES, path)
+    assert path + '.gz' in sizes
+    with open(path, 'rb') as f, gzip.open(path + '.gz', 'rb') as gz:
+        assert f.read() == gz.read()
+
+def test_generate_json_columnar_option(tmp_path, monkeypatch):
+    input_file = tmp_path / 'enriched.json'
+    generate_json.save_json(ANIMES, str(input_file))
+    monkeypatch.setattr(generate_json, 'INPUT_FILE', str(input_file))
+    monkeypatch.setattr(generate_json, 'OUTPUT_FILE', str(tmp_path / 'animes.json'))
+    monkeypatch.setattr(generate_json, 'BUNDLE_DIR', str(tmp_path / 'bundle'))
+    monkeypatch.setattr(generate_json, 'VALIDATION_REPORT_FILE', str(tmp_path / 'report.json'))
+    monkeypatch.setattr(generate_json, 'COLUMNAR_FILE', str(tmp_path / 'animes.columnar.json'))
+    monkeypatch.setattr(generate_json, 'MANUAL_MAPPING_FILE', str(tmp_path / 'manual.json'))
+    generate_json.main(columnar=True)
+
+    with open(tmp_path / 'animes.columnar.json', 'r', encoding='utf-8') as f:
+        assert [a['id'] for a in decode_columnar(json.load(f))] == ['113923', '2']
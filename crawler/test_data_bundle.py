@@ -0,0 +1,78 @@
+import generate_json
+from lib.data_bundle import PAGE_SIZE, SUMMARY_FIELDS, load_bundle, sort_orders, write_bundle
+from lib.facets import SCORE_FIELDS
+
+def anime(i, bahamut=None, votes=0, **ratings):
+    record = {'id': str(i), 'title': f'Title {i}', 'year': 2020, 'genres': ['奇幻'],
+              'ratings': {'bahamut': {'score': bahamut, 'votes': votes} if bahamut is not None else {}}}
+    for platform, score in ratings.items():
+        record['ratings'][platform] = {'score': score}
+    return record
+
+def test_orders_match_dashboard_sorting():
+    animes = [
+        anime(0, 4.5, 10, imdb=7.0),
+        anime(1, 4.8, 5),
+        anime(2, 4.8, 50, imdb=7.0, myanimelist=None),
+        anime(3, 4.1, 1, imdb=8.2, douban=9.0),
+        anime(4),
+    ]
+    orders = sort_orders(animes)
+    assert orders['bahamut'] == [2, 1, 0, 3, 4]
+    # Rated titles by score (Bahamut breaks ties), then unrated ones by Bahamut score
+    assert orders['imdb'] == [3, 2, 0, 1, 4]
+    assert orders['douban'] == [3, 1, 2, 0, 4]
+    assert orders['myanimelist'] == [1, 2, 0, 3, 4]  # a null MAL score counts as missing
+
+def test_bundle_round_trip_and_stale_pages(tmp_path):
+    animes = [anime(i, 4.0 + i % 10 / 10) for i in range(PAGE_SIZE * 2 + 3)]
+    report = write_bundle(animes, str(tmp_path))
+    assert sorted(report['shards']) == ['details/page-0000.json', 'details/page-0001.json', 'details/page-0002.json',
+                                        'facets.json', 'orders.json', 'search.json', 'summary.json']
+    assert report['changedBytes'] == report['totalBytes']
+
+    bundle = load_bundle(str(tmp_path), page=2)
+    assert bundle['index']['count'] == len(animes)
+    assert bundle['index']['summary'] == f"summary.{report['shards']['summary.json']['sha256'][:12]}.json"
+    assert bundle['summary']['fields'] == list(SUMMARY_FIELDS + SCORE_FIELDS)
+    row = dict(zip(bundle['summary']['fields'], bundle['summary']['rows'][PAGE_SIZE * 2 + 1]))
+    assert row['id'] == bundle['page'][1]['id'] == str(PAGE_SIZE * 2 + 1)
+    assert row['imdbScore'] is None and row['imdbNorm'] is None
+    assert row['bahamutNorm'] == 8.2
+    assert bundle['facets']['yearRange'] == [2020, 2020]
+    assert sorted(bundle['orders']['bahamut']) == list(range(len(animes)))
+
+    # The previous run's files stay for one more run, for clients holding the old index
+    write_bundle(animes[:10], str(tmp_path))
+    assert len(list((tmp_path / 'details').iterdir())) == 4
+    write_bundle(animes[:10], str(tmp_path))
+    assert [p.name for p in (tmp_path / 'details').iterdir()] == [load_bundle(str(tmp_path))['index']['details'][0].split('/')[1]]
+
+def test_bundle_rewrites_only_changed_shards(tmp_path):
+    animes = [anime(i, 4.0 + i % 10 / 10, votes=i) for i in range(PAGE_SIZE * 3)]
+    write_bundle(animes, str(tmp_path))
+    index_mtime = (tmp_path / 'index.json').stat().st_mtime_ns
+    assert write_bundle(animes, str(tmp_path))['changed'] == []
+    assert (tmp_path / 'index.json').stat().st_mtime_ns == index_mtime
+
+    animes[PAGE_SIZE + 5]['ratings']['imdb'] = {'score': 8.0, 'votes': 10}
+    report = write_bundle(animes, str(tmp_path))
+    assert sorted(report['changed']) == ['details/page-0001.json', 'orders.json', 'summary.json']
+    assert report['changedBytes'] == sum(report['shards'][name]['bytes'] for name in report['changed'])
+    assert report['changedBytes'] < report['totalBytes']
+    assert load_bundle(str(tmp_path), page=1)['page'][5]['ratings']['imdb']['score'] == 8.0
+
+def test_generate_json_writes_bundle(tmp_path, monkeypatch):
+    input_file = tmp_path / 'enriched.json'
+    generate_json.save_json([anime(1, 4.5), {'id': '2', 'title': ''}], str(input_file))
+    monkeypatch.setattr(generate_json, 'INPUT_FILE', str(input_file))
+    monkeypatch.setattr(generate_json, 'OUTPUT_FILE', str(tmp_path / 'animes.json'))
+    monkeypatch.setattr(generate_json, 'BUNDLE_DIR', str(tmp_path / 'bundle'))
+    monkeypatch.setattr(generate_json, 'VALIDATION_REPORT_FILE', str(tmp_path / 'report.json'))
+    monkeypatch.setattr(generate_json, 'MANUAL_MAPPING_FILE', str(tmp_path / 'manual.json'))
+    generate_json.main()
+
+    assert load_bundle(str(tmp_path / 'bundle'))['index']['count'] == 1
+    mtime = (tmp_path / 'animes.json').stat().st_mtime_ns
+    generate_json.main()
+    assert (tmp_path / 'animes.json').stat().st_mtime_ns == mtime
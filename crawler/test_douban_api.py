@@ -0,0 +1,47 @@
+import time
+import pytest
+from douban_api import DoubanClient
+from mock_servers.base import serve
+from mock_servers.douban import DoubanStandIn, load_catalog
+
+@pytest.fixture
+def douban():
+    app = DoubanStandIn(load_catalog(), latency=0.05)
+    server, base_url = serve(app)
+    yield app, base_url
+    server.shutdown()
+
+def test_search_reads_rating_from_subject_page(douban):
+    app, base_url = douban
+    client = DoubanClient(base_url, rate_limit_delay=0)
+
+    result = client.search('GNOSIA [1]', 2025)
+    assert result == {'douban_id': '37125391', 'douban_score': 7.4, 'douban_votes': 326}
+    assert client.search('No Such Title', 2025) is None
+
+def test_suggestions_are_cached_per_normalized_title(douban):
+    app, base_url = douban
+    client = DoubanClient(base_url, rate_limit_delay=0)
+
+    client.search('GNOSIA', 2025)
+    client.search('gnosia', 2025)
+    client.search('ＧＮＯＳＩＡ', 2025)  # full-width, NFKC-equal
+    assert app.requests.count('/j/subject_suggest') == 1
+    assert app.requests.count('/subject/37125391/') == 1
+
+def test_search_many_bounds_in_flight_and_spaces_starts(douban):
+    app, base_url = douban
+    catalog = load_catalog()
+    client = DoubanClient(base_url, rate_limit_delay=0.01, max_in_flight=3)
+
+    queries = [(item['title'], int(item['year'])) for item in catalog]
+    start = time.monotonic()
+    results = client.search_many(queries + queries[:2])
+    elapsed = time.monotonic() - start
+
+    assert len(results) == len(catalog)
+    assert all(results[q]['douban_score'] == item['score'] for q, item in zip(queries, catalog))
+    assert app.max_in_flight <= 3
+    assert len(app.requests) == 2 * len(catalog)
+    # Sequential would be 24 x 50 ms latency; overlapping keeps it well under that
+    assert elapsed < 24 * 0.05
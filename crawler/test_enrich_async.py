@@ -0,0 +1,112 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import pytest
+import cross_platform
+from services.provider_base import AnimeProvider
+from mal_api import MalProvider
+from imdb_api import ImdbProvider
+from douban_api import DoubanProvider
+
+DELAY = 0.2
+
+class FakeProvider(AnimeProvider):
+    """Answers from a dict after DELAY seconds; records call order."""
+
+    def __init__(self, name, found, payloads, log):
+        super().__init__()
+        self.name, self.found, self.payloads, self.log = name, found, payloads, log
+
+    async def search(self, query, year=None, anime_type=None, alt_titles=None):
+        self.log.append((self.name, 'search', query))
+        await asyncio.sleep(DELAY)
+        return self.found.get(query)
+
+    async def details(self, provider_id):
+        self.log.append((self.name, 'details', provider_id))
+        await asyncio.sleep(DELAY)
+        return self.payloads.get(provider_id)
+
+    async def rating(self, provider_id):
+        return self.as_rating(await self.details(provider_id))
+
+class FakeAod:
+    def lookup(self, title, year=None, anime_type=None):
+        return None
+
+@pytest.fixture
+def providers(monkeypatch):
+    log = []
+    mal = FakeProvider('mal', {'進撃の巨人': 16498},
+                       {16498: {'mal_id': 16498, 'mal_score': 8.5, 'mal_members': 4000000, 'imdb_id': 'tt2560140'}}, log)
+    mal.as_rating = MalProvider.as_rating
+    imdb = FakeProvider('imdb', {}, {'tt2560140': {'imdb_score': 9.1, 'imdb_votes': 480000}}, log)
+    imdb.as_rating = ImdbProvider.as_rating
+    douban = FakeProvider('douban', {'進擊的巨人': '10485647'},
+                          {'10485647': {'douban_id': '10485647', 'douban_score': 9.2, 'douban_votes': 300000}}, log)
+    douban.as_rating = DoubanProvider.as_rating
+
+    monkeypatch.setattr(cross_platform, 'mal_provider', mal)
+    monkeypatch.setattr(cross_platform, 'imdb_provider', imdb)
+    monkeypatch.setattr(cross_platform, 'douban_provider', douban)
+    monkeypatch.setattr(cross_platform, 'aod_service', FakeAod())
+    monkeypatch.setattr(cross_platform, 'manual_mapping', {})
+    monkeypatch.setattr(cross_platform, 'mal_imdb_links', {})
+    monkeypatch.setattr(cross_platform, 'imdb_store', None)
+    return log
+
+def test_imdb_waits_for_mal_link_while_douban_runs_alongside(providers):
+    anime = {'id': '1', 'title': '進擊的巨人 [1]', 'titleOriginal': '進撃の巨人', 'year': 2013}
+
+    start = time.monotonic()
+    cross_platform.enrich_anime(anime)
+    elapsed = time.monotonic() - start
+
+    assert anime['ratings'] == {
+        'myanimelist': {'score': 8.5, 'members': 4000000, 'id': 16498},
+        'imdb': {'score': 9.1, 'votes': 480000, 'id': 'tt2560140'},
+        'douban': {'score': 9.2, 'votes': 300000, 'id': '10485647'},
+    }
+    # IMDb used MAL's external link: no IMDb search
+    assert ('imdb', 'search', '進撃の巨人') not in providers
+    assert providers.index(('mal', 'details', 16498)) < providers.index(('imdb', 'details', 'tt2560140'))
+    # Longest chain is MAL search -> details -> IMDb rating (3 steps), not all 5 steps
+    assert elapsed < 4 * DELAY
+
+def test_known_ids_do_not_wait_for_mal(providers, monkeypatch):
+    monkeypatch.setattr(cross_platform, 'manual_mapping', {'1': {'mal_id': 16498, 'imdb_id': 'tt2560140'}})
+    anime = {'id': '1', 'title': '進擊的巨人', 'titleOriginal': '進撃の巨人', 'year': 2013}
+
+    start = time.monotonic()
+    cross_platform.enrich_anime(anime)
+    elapsed = time.monotonic() - start
+
+    assert set(anime['ratings']) == {'myanimelist', 'imdb', 'douban'}
+    assert elapsed < 3 * DELAY
+
+def test_titles_reuse_one_event_loop(providers):
+    loops = []
+    for i in range(2):
+        cross_platform.enrich_anime({'id': str(i), 'title': '進擊的巨人', 'titleOriginal': '進撃の巨人', 'year': 2013})
+        loops.append(cross_platform._loops.loop)
+    assert loops[0] is loops[1] and not loops[0].is_closed()
+
+def test_providers_are_created_by_the_run(tmp_path, monkeypatch):
+    # Importing cross_platform (generate_json, pipeline --stages generate...) starts nothing
+    check = 'import cross_platform, threading; assert cross_platform.provider_executor is None; ' \
+            'assert threading.active_count() == 1'
+    subprocess.run([sys.executable, '-c', check], cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+
+    for name in ('aod_service', 'manual_mapping', 'provider_executor', 'mal_provider', 'imdb_provider',
+                 'douban_provider'):
+        monkeypatch.setattr(cross_platform, name, getattr(cross_platform, name))
+    monkeypatch.setattr(cross_platform, 'MANUAL_MAPPING_FILE', str(tmp_path / 'manual.json'))
+    cross_platform.load_services()
+    executor = cross_platform.provider_executor
+    assert cross_platform.douban_provider.executor is cross_platform.mal_provider.executor is executor
+    cross_platform.load_services()
+    assert cross_platform.provider_executor is executor
+    cross_platform.close_providers()
+    assert cross_platform.douban_provider is None and executor._shutdown
@@ -0,0 +1,39 @@
+import pytest
+
+from lib import facets
+from lib.facets import facet_counts, score_columns
+
+ANIMES = [
+    {'id': '1', 'year': 2023, 'genres': ['奇幻', '冒險'],
+     'ratings': {'bahamut': {'score': 4.5, 'votes': 900}, 'imdb': {'score': 8.0, 'votes': 100}}},
+    {'id': '2', 'year': 2023, 'genres': ['奇幻', '奇幻'],
+     'ratings': {'bahamut': {'score': 3.5, 'votes': 100}, 'myanimelist': {'score': None, 'members': 50}}},
+    {'id': '3', 'year': 0, 'genres': [],
+     'ratings': {'bahamut': {'score': 5.0, 'votes': 0}, 'imdb': {'score': 6.0, 'votes': 300}}},
+    {'id': '4', 'year': 2019, 'ratings': {'bahamut': {}}},
+]
+
+def test_facet_counts():
+    assert facet_counts(ANIMES) == {
+        'genres': [['冒險', 1], ['奇幻', 2]],  # a genre listed twice counts once per title
+        'years': [[2019, 1], [2023, 2]],
+        'yearRange': [2019, 2023],
+    }
+    assert facet_counts([])['yearRange'] is None
+
+@pytest.mark.parametrize('backend', ['numpy', 'python'])
+def test_score_columns(backend, monkeypatch):
+    if backend == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(facets, 'np', None)
+    columns = score_columns(ANIMES)
+
+    assert columns['bahamutNorm'] == [9.0, 7.0, 10.0, None]
+    assert columns['myanimelistNorm'] == [None, None, None, None]
+    assert columns['myanimelistBayes'] == [None, None, None, None]
+    # Bahamut: mean 26/3, median votes 100
+    assert columns['bahamutBayes'] == [round((900 * 9 + 100 * 26 / 3) / 1000, 3), round((100 * 7 + 100 * 26 / 3) / 200, 3),
+                                       round(26 / 3, 3), None]
+    # IMDb: mean 7.0, median votes 200; more votes keep a title closer to its own score
+    assert columns['imdbBayes'] == [7.333, None, 6.4, None]
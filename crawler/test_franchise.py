@@ -0,0 +1,127 @@
+import json
+import cross_platform
+from services.aod_service import AnimeOfflineDatabase
+from services.franchise import RatingDonors, UnionFind, cluster_franchises, lookup_signature, share_ratings
+
+AOD_ENTRIES = [
+    {'sources': ['https://myanimelist.net/anime/40748'], 'title': '呪術廻戦', 'synonyms': ['Jujutsu Kaisen'],
+     'type': 'TV', 'animeSeason': {'year': 2020}, 'relatedAnime': ['https://myanimelist.net/anime/48561']},
+    {'sources': ['https://myanimelist.net/anime/48561'], 'title': '劇場版 呪術廻戦 0', 'synonyms': [],
+     'type': 'MOVIE', 'animeSeason': {'year': 2021}, 'relatedAnime': ['https://myanimelist.net/anime/40748', 'https://anidb.net/anime/1']},
+    {'sources': ['https://myanimelist.net/anime/1'], 'title': 'Other', 'synonyms': [], 'type': 'TV', 'animeSeason': {'year': 1998}},
+]
+
+def write_aod(path):
+    with open(path, 'w', encoding='utf-8') as f:
+        for entry in AOD_ENTRIES:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    return str(path)
+
+def test_union_find_groups():
+    uf = UnionFind(['a', 'b', 'c', 'd'])
+    assert uf.union('a', 'b') and uf.union('c', 'b')
+    assert not uf.union('a', 'c')
+    assert sorted(sorted(g) for g in uf.groups().values()) == [['a', 'b', 'c'], ['d']]
+
+def test_cluster_by_title_key_and_acg_link():
+    animes = [
+        {'id': '20', 'title': '咒術迴戰 第二季 [1]'},
+        {'id': '3', 'title': '咒術迴戰 [1]'},
+        {'id': '7', 'title': '咒術迴戰 [無修]'},
+        {'id': '9', 'title': '懷玉・玉折 [1]', 'acgUrl': 'https://acg.gamer.com.tw/acgDetail.php?s=1'},
+        {'id': '11', 'title': '咒術迴戰 第二季 [無修]', 'acgUrl': 'https://acg.gamer.com.tw/acgDetail.php?s=1'},
+        {'id': '5', 'title': '間諜家家酒 [1]'},
+    ]
+    clusters = cluster_franchises(animes)
+    assert {clusters[i] for i in ('20', '3', '7', '9', '11')} == {'3'}
+    assert clusters['5'] == '5'
+
+def test_cluster_by_aod_related_edges(tmp_path):
+    aod = AnimeOfflineDatabase(write_aod(tmp_path / 'aod.jsonl'))
+    animes = [
+        {'id': '1', 'title': '咒術迴戰 [1]', 'titleOriginal': '呪術廻戦', 'year': 2020},
+        {'id': '2', 'title': '咒術迴戰 0 [電影]', 'year': 2021, 'ratings': {'myanimelist': {'id': 48561}}},
+        {'id': '3', 'title': 'Other [1]', 'titleOriginal': 'Other', 'year': 1998},
+    ]
+    assert cluster_franchises(animes, aod) == {'1': '1', '2': '1', '3': '3'}
+
+def test_related_survives_persisted_index(tmp_path):
+    aod_file = write_aod(tmp_path / 'aod.jsonl')
+    index_path = str(tmp_path / 'index.json')
+    AnimeOfflineDatabase(aod_file, index_path=index_path).load()
+
+    persisted = AnimeOfflineDatabase(aod_file, index_path=index_path)
+    assert persisted.load_index()
+    assert persisted.related(48561) == [40748]
+    assert persisted.related(1) == []
+
+def test_uncensored_copy_is_an_exact_duplicate():
+    a = {'id': '1', 'title': '咒術迴戰 [1]', 'titleOriginal': '呪術廻戦', 'year': 2020}
+    b = {'id': '2', 'title': '咒術迴戰 [無修]', 'titleOriginal': '呪術廻戦', 'year': 2020}
+    movie = {'id': '3', 'title': '咒術迴戰 [電影]', 'titleOriginal': '呪術廻戦', 'year': 2020}
+    assert lookup_signature(a) == lookup_signature(b) != lookup_signature(movie)
+
+    a['ratings'] = {'myanimelist': {'id': 40748, 'score': 8.6}, 'bahamut': {'score': 9.5}}
+    b['ratings'] = {'bahamut': {'score': 9.1}}
+    assert share_ratings(a, b) == 1
+    assert b['ratings'] == {'myanimelist': {'id': 40748, 'score': 8.6}, 'bahamut': {'score': 9.1}}
+    assert b['ratings']['myanimelist'] is not a['ratings']['myanimelist']
+
+def test_main_looks_up_duplicates_once(tmp_path, monkeypatch):
+    animes = [
+        {'id': '1', 'title': '咒術迴戰 [1]', 'titleOriginal': '呪術廻戦', 'year': 2020},
+        {'id': '2', 'title': '咒術迴戰 [無修]', 'titleOriginal': '呪術廻戦', 'year': 2020},
+        {'id': '3', 'title': '咒術迴戰 第二季 [1]', 'titleOriginal': '呪術廻戦 第2期', 'year': 2023},
+        {'id': '4', 'title': '咒術迴戰 [年齡限制版]', 'titleOriginal': '呪術廻戦', 'year': 2020},
+        {'id': '5', 'title': '咒術回戰 (中配) [1]', 'titleOriginal': '呪術廻戦', 'year': 2020},
+    ]
+    input_file = tmp_path / 'raw.json'
+    input_file.write_text(json.dumps(animes, ensure_ascii=False), encoding='utf-8')
+    manual = tmp_path / 'manual.json'
+    manual.write_text(json.dumps({'4': {'mal_id': 40748}}), encoding='utf-8')
+    monkeypatch.setattr(cross_platform, 'INPUT_FILE', str(input_file))
+    monkeypatch.setattr(cross_platform, 'OUTPUT_FILE', str(tmp_path / 'enriched.json'))
+    monkeypatch.setattr(cross_platform, 'AOD_FILE', write_aod(tmp_path / 'aod.jsonl'))
+    monkeypatch.setattr(cross_platform, 'AOD_INDEX_FILE', str(tmp_path / 'aod_index.json'))
+    monkeypatch.setattr(cross_platform, 'MANUAL_MAPPING_FILE', str(manual))
+    monkeypatch.setattr(cross_platform, 'prefetch_douban_ratings', lambda records, should_stop=None: 0)
+
+    looked_up = []
+    def fake_enrich(anime):
+        looked_up.append(anime['id'])
+        anime.setdefault('ratings', {})['myanimelist'] = {'id': 40748, 'score': 8.6}
+        return anime
+    monkeypatch.setattr(cross_platform, 'enrich_anime', fake_enrich)
+    cross_platform.main()
+
+    # '2' copies '1', and so does the retitled '5' (same MAL id through AOD);
+    # the manually mapped '4' is looked up on its own
+    assert looked_up == ['1', '3', '4']
+    enriched = {a['id']: a for a in json.loads((tmp_path / 'enriched.json').read_text(encoding='utf-8'))}
+    assert enriched['2']['ratings']['myanimelist'] == {'id': 40748, 'score': 8.6}
+    assert enriched['5']['ratings']['myanimelist'] == {'id': 40748, 'score': 8.6}
+    assert {a['franchiseId'] for a in enriched.values()} == {'1'}
+
+def test_installment_keys_share_across_titles(tmp_path):
+    aod = AnimeOfflineDatabase(write_aod(tmp_path / 'aod.jsonl'))
+    donors = RatingDonors(aod)
+    tv = {'id': '1', 'title': '咒術迴戰 [1]', 'titleOriginal': '呪術廻戦', 'year': 2020,
+          'acgUrl': 'https://acg.gamer.com.tw/acgDetail.php?s=1',
+          'ratings': {'myanimelist': {'id': 40748, 'score': 8.6}, 'imdb': {'score': 8.1}, 'douban': {'score': 8.5}}}
+    donors.add(tv)
+    # Another Chinese title, matched to the same MAL entry through AOD
+    retitled = {'id': '2', 'title': '咒術回戰 (中配) [1]', 'titleOriginal': '呪術廻戦', 'year': 2020}
+    # Same ACG page and year, no other title
+    relisted = {'id': '3', 'title': 'JUJUTSU KAISEN [1]', 'year': 2020,
+                'acgUrl': 'https://acg.gamer.com.tw/acgDetail.php?s=1'}
+    # Same title without the Japanese one (a [無修] copy listed bare)
+    bare = {'id': '4', 'title': '咒術迴戰 [無修]', 'year': 2020}
+    assert all(donors.find(donors.keys(anime)) is tv for anime in (retitled, relisted, bare))
+
+    # Seasons and movies of the franchise are other installments
+    season_2 = {'id': '5', 'title': '咒術迴戰 第二季 [1]', 'titleOriginal': '呪術廻戦 第2期', 'year': 2023,
+                'acgUrl': 'https://acg.gamer.com.tw/acgDetail.php?s=2'}
+    movie = {'id': '6', 'title': '咒術迴戰 0 [電影]', 'year': 2021, 'ratings': {'myanimelist': {'id': 48561}}}
+    assert donors.find(donors.keys(season_2)) is None
+    assert donors.find(donors.keys(movie)) is None
+    assert cluster_franchises([tv, season_2, movie], aod) == {'1': '1', '5': '1', '6': '1'}
@@ -0,0 +1,56 @@
+import json
+import time
+from lib.html_extract import extract_json_ld, select_rated_entity, read_until_json_ld
+
+def page(ld=None, body='<div>body</div>'):
+    script = f'<script type="application/ld+json">{json.dumps(ld)}</script>' if ld is not None else ''
+    return f'<html><head><title>t</title>{script}</head><body>{body}</body></html>'
+
+def test_graph_prefers_item_with_rating():
+    ld = {'@graph': [
+        {'@type': 'Person', 'name': 'Someone'},
+        {'@type': 'TVSeries', 'name': 'No rating'},
+        {'@type': 'TVSeries', 'name': 'Rated', 'aggregateRating': {'ratingValue': 8.5}},
+    ]}
+    entity = select_rated_entity(extract_json_ld(page(ld)))
+    assert entity['name'] == 'Rated'
+
+    ld['@graph'].pop()
+    assert select_rated_entity(extract_json_ld(page(ld)))['name'] == 'No rating'
+
+def test_missing_or_broken_block():
+    assert extract_json_ld(page()) is None
+    assert extract_json_ld('<head><script type="application/ld+json">{oops</script></head>') is None
+
+def test_read_stops_after_block_even_across_chunk_boundaries():
+    raw = page({'@type': 'Movie', 'aggregateRating': {'ratingValue': 7.0}}, body='x' * 100000).encode()
+    chunks = [raw[i:i + 7] for i in range(0, len(raw), 7)]
+    stream = iter(chunks)
+    head, complete = read_until_json_ld(stream)
+    assert complete
+    assert len(head) < 1000
+    assert extract_json_ld(head.decode())['aggregateRating']['ratingValue'] == 7.0
+    # The rest of the stream is left for the caller
+    assert head + b''.join(stream) == raw
+
+def test_read_stops_at_head_without_block():
+    raw = page(body='y' * 100000).encode()
+    head, complete = read_until_json_ld(raw[i:i + 4096] for i in range(0, len(raw), 4096))
+    assert not complete
+    assert len(head) <= 4096
+
+def test_long_opening_tag_split_into_bytes():
+    nonce = 'n' * 200
+    raw = (f'<html><head><script nonce="{nonce}" type="application/ld+json" id="ld">'
+           '{"@type": "Movie"}</script></head><body></body></html>').encode()
+    head, complete = read_until_json_ld(raw[i:i + 1] for i in range(len(raw)))
+    assert complete and extract_json_ld(head.decode()) == {'@type': 'Movie'}
+
+def test_read_scans_each_chunk_once():
+    # A large head of other tags: each chunk is searched once, not the whole buffer again
+    meta = b''.join(b'<meta name="m%d" content="%s">' % (i, b'c' * 40) for i in range(20000))
+    raw = b'<html><head>' + meta + b'<script type="application/ld+json">{}</script></head></html>'
+    start = time.perf_counter()
+    head, complete = read_until_json_ld(raw[i:i + 512] for i in range(0, len(raw), 512))
+    assert complete and extract_json_ld(head.decode()) == {}
+    assert time.perf_counter() - start < 0.5
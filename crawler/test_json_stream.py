@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+import generate_json
+from lib.json_stream import JsonArrayWriter, iter_records
+
+RECORDS = [
+    {'id': '1', 'title': '葬送的芙莉蓮 [1]', 'year': 2023, 'ratings': {'bahamut': {'score': 4.9, 'votes': 12345}}},
+    {'id': '2', 'title': 'tricky ], "[{" title', 'genres': [], 'year': '2021'},
+    {'id': '3', 'title': '', 'year': 1999},
+    123456789,
+]
+
+@pytest.mark.parametrize('chunk_chars', [1, 7, 4096])
+def test_iter_records_reads_arrays_across_chunks(tmp_path, chunk_chars):
+    path = tmp_path / 'records.json'
+    path.write_text(json.dumps(RECORDS, ensure_ascii=False, indent=2), encoding='utf-8')
+    assert list(iter_records(str(path), chunk_chars=chunk_chars)) == RECORDS
+
+    path.write_text('[]', encoding='utf-8')
+    assert list(iter_records(str(path), chunk_chars=chunk_chars)) == []
+
+    path.write_text(json.dumps(RECORDS)[:-20], encoding='utf-8')
+    with pytest.raises(ValueError):
+        list(iter_records(str(path), chunk_chars=chunk_chars))
+
+def test_iter_records_reads_ndjson(tmp_path):
+    path = tmp_path / 'records.ndjson'
+    path.write_text('\n'.join(json.dumps(r, ensure_ascii=False) for r in RECORDS) + '\n\n', encoding='utf-8')
+    assert list(iter_records(str(path))) == RECORDS
+
+def test_writer_matches_json_dump_and_skips_unchanged(tmp_path):
+    path = tmp_path / 'out.json'
+    for records in (RECORDS, []):
+        with JsonArrayWriter(str(path)) as out:
+            for record in records:
+                out.write(record)
+        assert out.changed
+        assert path.read_text(encoding='utf-8') == json.dumps(records, ensure_ascii=False, indent=2)
+
+    with JsonArrayWriter(str(path)) as out:
+        pass
+    assert not out.changed
+    assert not (tmp_path / 'out.json.tmp').exists()
+
+def test_streaming_generation_matches_full_generation(tmp_path, monkeypatch):
+    input_file = tmp_path / 'enriched.json'
+    generate_json.save_json(RECORDS[:3], str(input_file))
+    (tmp_path / 'manual.json').write_text(json.dumps({'2': {'imdb_id': 'tt1', 'imdb_score': 7.5}}), encoding='utf-8')
+    monkeypatch.setattr(generate_json, 'INPUT_FILE', str(input_file))
+    monkeypatch.setattr(generate_json, 'MANUAL_MAPPING_FILE', str(tmp_path / 'manual.json'))
+    monkeypatch.setattr(generate_json, 'BUNDLE_DIR', str(tmp_path / 'bundle'))
+    monkeypatch.setattr(generate_json, 'VALIDATION_REPORT_FILE', str(tmp_path / 'report.json'))
+
+    monkeypatch.setattr(generate_json, 'OUTPUT_FILE', str(tmp_path / 'full.json'))
+    generate_json.main()
+    full_report = json.loads((tmp_path / 'report.json').read_text(encoding='utf-8'))
+    (tmp_path / 'report.json').unlink()
+    monkeypatch.setattr(generate_json, 'OUTPUT_FILE', str(tmp_path / 'streamed.json'))
+    generate_json.main(stream=True)
+    assert json.loads((tmp_path / 'report.json').read_text(encoding='utf-8')) == full_report
+
+    streamed = (tmp_path / 'streamed.json').read_text(encoding='utf-8')
+    assert streamed == (tmp_path / 'full.json').read_text(encoding='utf-8')
+    assert [r['year'] for r in json.loads(streamed)] == [2023, 2021]
+    assert json.loads(streamed)[1]['ratings']['imdb']['score'] == 7.5
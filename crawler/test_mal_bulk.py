@@ -0,0 +1,54 @@
+import pytest
+import mal_api
+import cross_platform
+from mock_servers.base import serve
+from mock_servers.jikan import JikanStandIn
+
+def make_catalog():
+    seasons = ['winter', 'spring', 'summer', 'fall']
+    # An entry without a season (e.g. a special) only /full can return
+    unseasoned = {'mal_id': 5000, 'title': 'Special', 'score': 7.7, 'members': 3000,
+                  'year': None, 'season': None, 'type': 'Special', 'external': []}
+    return [unseasoned] + [
+        {'mal_id': 1000 + i, 'title': f'Show {i}', 'score': round(6 + (i % 30) / 10, 2),
+         'members': 1000 * i, 'year': 2023 + i % 2, 'season': seasons[i % 4], 'type': 'TV',
+         'external': [{'name': 'IMDb', 'url': f'https://www.imdb.com/title/tt{9000000 + i}/'}]}
+        for i in range(120)
+    ]
+
+@pytest.fixture
+def jikan(monkeypatch):
+    app = JikanStandIn(make_catalog())
+    server, base_url = serve(app)
+    monkeypatch.setattr(mal_api, 'JIKAN_BASE_URL', f'{base_url}/v4')
+    monkeypatch.setattr(mal_api, 'RATE_LIMIT_DELAY', 0)
+    yield app
+    server.shutdown()
+
+def test_harvest_season_scores_pages_until_all_found(jikan):
+    wanted = {1000, 1005, 1077, 1118}
+    found = mal_api.harvest_season_scores(wanted, [2023, 2024])
+
+    assert set(found) == wanted
+    assert found[1005]['mal_score'] == 6.5
+    assert found[1005]['imdb_id'] is None  # season pages carry no external links
+    assert not any('/full' in path for path in jikan.requests)
+    assert len(jikan.requests) <= 8 * 2  # 8 seasons, at most 2 pages each
+
+def test_refresh_mal_scores_falls_back_to_full(jikan, monkeypatch):
+    monkeypatch.setattr(cross_platform, 'mal_imdb_links', {})
+    animes = [
+        # Found on a season page, IMDb already known -> no /full call
+        {'id': '1', 'year': 2023, 'ratings': {'myanimelist': {'id': 1002}, 'imdb': {'id': 'tt1'}}},
+        # Not on any season page -> /full fallback
+        {'id': '2', 'year': 2019, 'ratings': {'myanimelist': {'id': 5000}, 'imdb': {'id': 'tt2'}}},
+        # Needs its IMDb link -> /full even though the season page had the score
+        {'id': '3', 'year': 2024, 'ratings': {'myanimelist': {'id': 1001}}},
+    ]
+    assert cross_platform.refresh_mal_scores(animes) == 3
+
+    full_calls = sorted(p for p in jikan.requests if p.endswith('/full'))
+    assert full_calls == ['/v4/anime/1001/full', '/v4/anime/5000/full']
+    assert animes[0]['ratings']['myanimelist']['score'] == 6.2
+    assert animes[1]['ratings']['myanimelist']['score'] == 7.7
+    assert cross_platform.mal_imdb_links[1001] == 'tt9000001'
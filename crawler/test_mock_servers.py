@@ -0,0 +1,69 @@
+import argparse
+import random
+import pytest
+import requests
+from mock_servers.base import Conditions, json_response, parse_latency, serve
+from mock_servers import loadtest
+
+class Echo:
+    def handle(self, method, path, query):
+        return json_response({'path': path})
+
+def test_parse_latency_specs():
+    rng = random.Random(0)
+    assert parse_latency(None)(rng) == 0.0
+    assert parse_latency('0.25')(rng) == 0.25
+    assert all(0.01 <= parse_latency('uniform:0.01,0.02')(rng) <= 0.02 for _ in range(100))
+    assert all(parse_latency('lognormal:0.05,0.5')(rng) > 0 for _ in range(100))
+    with pytest.raises(ValueError):
+        parse_latency('gamma:1,2')
+
+def test_conditions_rate_limit_and_errors():
+    limited = Conditions(Echo(), rate_limit=5)
+    statuses = [limited.handle('GET', '/', {})[0] for _ in range(20)]
+    assert statuses[:5] == [200] * 5
+    assert statuses.count(429) >= 14
+    assert limited.stats[429] == statuses.count(429)
+
+    flaky = Conditions(Echo(), error_rate=0.5, seed=1)
+    statuses = [flaky.handle('GET', '/', {})[0] for _ in range(200)]
+    assert 60 < statuses.count(503) < 140
+
+def test_conditions_over_http():
+    server, base_url = serve(Conditions(Echo(), latency='0.01'))
+    try:
+        response = requests.get(f"{base_url}/x", timeout=5)
+        assert response.json() == {'path': '/x'}
+    finally:
+        server.shutdown()
+
+def test_per_server_settings():
+    assert loadtest.per_server(['0.1', 'douban=0.5'], float, 0.0) == {'bahamut': 0.1, 'jikan': 0.1, 'imdb': 0.1, 'douban': 0.5}
+    assert loadtest.per_server(None, str, None)['jikan'] is None
+
+def test_loadtest_runs_full_pipeline(tmp_path, monkeypatch):
+    import bahamut_scraper, douban_api, imdb_api, mal_api
+    monkeypatch.chdir(tmp_path)
+    # run() repoints the provider modules at its stand-ins; restore them afterwards
+    for name in ('BAHAMUT_BASE_URL', 'JIKAN_BASE_URL', 'IMDB_SUGGEST_URL', 'IMDB_TITLE_URL', 'DOUBAN_BASE_URL'):
+        monkeypatch.setenv(name, '')  # records the original state for undo
+        monkeypatch.delenv(name)
+    for module, attrs in ((bahamut_scraper, ('BASE_URL', 'ANIME_LIST_URL', 'MIN_DELAY', 'MAX_DELAY')),
+                          (mal_api, ('JIKAN_BASE_URL', 'RATE_LIMIT_DELAY')),
+                          (imdb_api, ('IMDB_SUGGEST_URL', 'IMDB_TITLE_URL')),
+                          (douban_api, ('DOUBAN_BASE_URL', 'RATE_LIMIT_DELAY', '_default_client'))):
+        for attr in attrs:
+            monkeypatch.setattr(module, attr, getattr(module, attr))
+    args = argparse.Namespace(titles=30, seed=3, stages='scrape,enrich,generate', latency=None, rate_limit=None,
+                              error_rate=None, client_delays=False, workdir=str(tmp_path / 'run'), keep=False, verbose=False)
+    import cross_platform, generate_json
+    before = loadtest.save_globals()
+    report = loadtest.run(args)
+    # Paths and loaded services point back where they were
+    assert loadtest.save_globals() == before
+    assert cross_platform.OUTPUT_FILE == '../data/animes_enriched.json'
+    assert generate_json.BUNDLE_DIR == '../data/bundle'
+
+    assert [row['records'] for row in report['stages'].values()] == [30, 30, 30]
+    assert report['ids']['myanimelist'] == '30/30 found, 30 correct'
+    assert report['servers']['bahamut'][200] > 30
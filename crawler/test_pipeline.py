@@ -0,0 +1,181 @@
+import json
+import os
+import random
+import threading
+import time
+import pytest
+import cross_platform
+import pipeline
+from lib.stage_runner import Stage, run_stages
+from test_franchise import write_aod
+
+def test_results_keep_source_order_with_several_workers():
+    def jitter(x):
+        time.sleep(random.random() / 1000)
+        return x * 2
+    results, stats = run_stages(range(200), [Stage('double', jitter, workers=4), Stage('inc', lambda x: x + 1, 3)],
+                                queue_size=4)
+    assert results == [x * 2 + 1 for x in range(200)]
+    assert stats['double']['received'] == stats['inc']['emitted'] == 200
+
+def test_bounded_queues_hold_back_the_source():
+    done = []
+    lead = []
+    def source():
+        for i in range(100):
+            lead.append(i - len(done))
+            yield i
+    def slow(x):
+        time.sleep(0.001)
+        done.append(x)
+        return x
+    results, _ = run_stages(source(), [Stage('slow', slow, workers=2)], queue_size=3)
+    assert len(results) == 100
+    # queue + records in the workers' hands + the one the feeder is putting
+    assert max(lead) <= 3 + 2 + 1
+
+def test_none_and_errors_drop_records():
+    def pick(x):
+        if x == 3:
+            raise ValueError('bad record')
+        return x if x % 2 == 0 else None
+    results, stats = run_stages(range(8), [Stage('pick', pick, workers=2)])
+    assert results == [0, 2, 4, 6]
+    assert stats['pick'] == dict(stats['pick'], received=8, emitted=4, dropped=4, errors=1)
+
+def test_parse_stages():
+    assert pipeline.parse_stages('enrich, generate') == ['enrich', 'generate']
+    assert pipeline.parse_stages('scrape') == ['scrape']
+    for bad in ('scrape,generate', 'generate,enrich', 'render', ''):
+        with pytest.raises(ValueError):
+            pipeline.parse_stages(bad)
+
+def write_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+
+def read_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def test_generate_stage_writes_outputs_once(tmp_path, monkeypatch):
+    mapping = tmp_path / 'manual_mapping.json'
+    write_json(mapping, {'2': {'imdb_id': 'tt1', 'imdb_score': 8.5}})
+    monkeypatch.setattr(pipeline, 'MANUAL_MAPPING_FILE', str(mapping))
+    write_json(tmp_path / 'animes_enriched.json', [
+        {'id': '1', 'title': 'A', 'year': '2020', 'ratings': {'bahamut': {'score': 4.5, 'votes': 10}}},
+        {'id': '2', 'title': 'B', 'year': 2021, 'ratings': {'bahamut': {'score': 4.0, 'votes': 5}}},
+        {'id': '3', 'title': '', 'year': 2021, 'ratings': {}},
+    ])
+    # Paths come from the data dir, not the working directory
+    monkeypatch.chdir(tmp_path)
+
+    stats = pipeline.run(['generate'], str(tmp_path), queue_size=1)
+    assert stats['generate'] == dict(stats['generate'], received=3, emitted=2, dropped=1)
+    animes = read_json(tmp_path / 'animes.json')
+    assert [a['id'] for a in animes] == ['1', '2']
+    assert animes[0]['year'] == 2020
+    assert animes[1]['ratings']['imdb']['score'] == 8.5
+    assert read_json(tmp_path / 'validation_report.json')['count'] == 2
+    assert os.path.exists(tmp_path / 'bundle' / 'index.json')
+
+def test_enrich_and_generate_stream_through(tmp_path, monkeypatch):
+    for name in ('AOD_FILE', 'AOD_INDEX_FILE', 'MANUAL_MAPPING_FILE', 'aod_service', 'manual_mapping'):
+        monkeypatch.setattr(cross_platform, name, getattr(cross_platform, name))
+    mapping = tmp_path / 'manual_mapping.json'
+    write_json(mapping, {})
+    monkeypatch.setattr(pipeline, 'MANUAL_MAPPING_FILE', str(mapping))
+    write_aod(tmp_path / 'anime-offline-database.jsonl')
+
+    full = {'myanimelist': {'id': 1, 'score': 8.0}, 'imdb': {'id': 'tt1', 'score': 8.1},
+            'douban': {'id': '1', 'score': 8.2}}
+    write_json(tmp_path / 'bahamut_raw.json', [
+        {'id': '1', 'title': '咒術迴戰 [1]', 'year': 2020, 'ratings': {'bahamut': {'score': 4.9, 'votes': 20}}},
+        {'id': '2', 'title': '咒術迴戰 [無修]', 'year': 2020, 'ratings': {'bahamut': {'score': 4.7, 'votes': 2}}},
+        {'id': '3', 'title': '間諜家家酒 [1]', 'year': 2022, 'ratings': {'bahamut': {'score': 4.8, 'votes': 9}}},
+    ])
+    write_json(tmp_path / 'animes_enriched.json', [
+        {'id': '1', 'title': '咒術迴戰 [1]', 'year': 2020, 'ratings': dict(full, bahamut={'score': 4.5, 'votes': 10})},
+    ])
+    looked_up = []
+    lock = threading.Lock()
+    def fake_enrich(anime):
+        with lock:
+            looked_up.append(anime['id'])
+        anime['ratings']['imdb'] = {'id': 'tt9', 'score': 7.0}
+        return anime
+    monkeypatch.setattr(cross_platform, 'enrich_anime', fake_enrich)
+
+    pipeline.run(['enrich', 'generate'], str(tmp_path), enrich_workers=2)
+    enriched = read_json(tmp_path / 'animes_enriched.json')
+    assert [a['id'] for a in enriched] == ['1', '2', '3']
+    # Fresh Bahamut numbers over the kept external ratings
+    assert enriched[0]['ratings']['bahamut'] == {'score': 4.9, 'votes': 20}
+    assert enriched[0]['ratings']['imdb'] == full['imdb']
+    # '2' is the [無修] copy of '1' and shares its ratings instead of a lookup
+    assert looked_up == ['3']
+    assert enriched[1]['ratings']['douban'] == full['douban']
+    assert enriched[0]['franchiseId'] == enriched[1]['franchiseId'] != enriched[2]['franchiseId']
+
+    animes = read_json(tmp_path / 'animes.json')
+    assert [a['franchiseId'] for a in animes] == [a['franchiseId'] for a in enriched]
+    assert animes[2]['ratings']['imdb']['id'] == 'tt9'
+
+def test_limited_run_keeps_the_rest_of_the_catalog(tmp_path, monkeypatch):
+    for name in ('AOD_FILE', 'AOD_INDEX_FILE', 'MANUAL_MAPPING_FILE', 'aod_service', 'manual_mapping'):
+        monkeypatch.setattr(cross_platform, name, getattr(cross_platform, name))
+    mapping = tmp_path / 'manual_mapping.json'
+    write_json(mapping, {})
+    monkeypatch.setattr(pipeline, 'MANUAL_MAPPING_FILE', str(mapping))
+    write_aod(tmp_path / 'anime-offline-database.jsonl')
+
+    write_json(tmp_path / 'bahamut_raw.json', [
+        {'id': '1', 'title': '咒術迴戰 [1]', 'year': 2020, 'ratings': {'bahamut': {'score': 4.9, 'votes': 20}}},
+        {'id': '2', 'title': '間諜家家酒 [1]', 'year': 2022, 'ratings': {'bahamut': {'score': 4.8, 'votes': 9}}},
+        {'id': '3', 'title': '葬送的芙莉蓮', 'year': 2023, 'ratings': {'bahamut': {'score': 4.9, 'votes': 30}}},
+    ])
+    write_json(tmp_path / 'animes_enriched.json', [
+        {'id': '2', 'title': '間諜家家酒 [1]', 'year': 2022,
+         'ratings': {'bahamut': {'score': 4.7, 'votes': 8}, 'imdb': {'id': 'tt2', 'score': 7.8}}},
+    ])
+    looked_up = []
+    def fake_enrich(anime):
+        looked_up.append(anime['id'])
+        anime['ratings']['imdb'] = {'id': 'tt9', 'score': 7.0}
+        return anime
+    monkeypatch.setattr(cross_platform, 'enrich_anime', fake_enrich)
+
+    pipeline.run(['enrich', 'generate'], str(tmp_path), limit=1)
+    assert looked_up == ['1']
+    enriched = read_json(tmp_path / 'animes_enriched.json')
+    assert [a['id'] for a in enriched] == ['1', '2', '3']
+    assert enriched[1]['ratings']['imdb']['id'] == 'tt2'
+    assert [a['id'] for a in read_json(tmp_path / 'animes.json')] == ['1', '2', '3']
+
+    # generate alone with --limit regenerates the rest from the enriched file
+    write_json(tmp_path / 'animes.json', [])
+    pipeline.run(['generate'], str(tmp_path), limit=1)
+    animes = read_json(tmp_path / 'animes.json')
+    assert [a['id'] for a in animes] == ['1', '2', '3']
+    assert animes[1]['ratings']['imdb']['id'] == 'tt2'
+
+def test_failed_or_partial_lookups_are_not_copied(tmp_path, monkeypatch):
+    monkeypatch.setattr(cross_platform, 'manual_mapping', {})
+    calls = []
+    def flaky_enrich(anime):
+        calls.append(anime['id'])
+        if len(calls) == 1:
+            raise RuntimeError('timeout')
+        anime['ratings']['myanimelist'] = {'id': 1, 'score': 8.0}
+        if len(calls) == 3:
+            anime['ratings'].update(imdb={'id': 'tt1', 'score': 8.1}, douban={'id': '1', 'score': 8.2})
+        return anime
+    monkeypatch.setattr(cross_platform, 'enrich_anime', flaky_enrich)
+
+    runner = pipeline.Pipeline(['enrich'], pipeline.data_paths(str(tmp_path)))
+    copies = [{'id': str(i), 'title': '咒術迴戰 [1]', 'year': 2020, 'ratings': {}} for i in range(1, 5)]
+    records = [runner.enrich(anime) for anime in copies]
+    # 1 raised and 2 found MAL only: neither is copied; 3 is complete and 4 takes its ratings
+    assert calls == ['1', '2', '3']
+    assert records[0]['ratings'] == {} and runner.shared == 1
+    assert records[3]['ratings']['douban'] == {'id': '1', 'score': 8.2}
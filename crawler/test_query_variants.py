@@ -0,0 +1,65 @@
+import mal_api
+from lib.query_variants import QueryMemo, query_variants, season_numbers
+
+def test_variants_are_ordered_and_deduplicated():
+    assert query_variants('呪術廻戦 第2期') == ['呪術廻戦 第2期', '呪術廻戦']
+    assert query_variants('SPY×FAMILY 間諜家家酒 [1]') == ['SPY×FAMILY 間諜家家酒', 'SPY FAMILY']
+    assert query_variants('Sword Art Online: Alicization Part 2') == [
+        'Sword Art Online: Alicization Part 2', 'Sword Art Online: Alicization', 'Sword Art Online']
+    assert query_variants('Overlord IV') == ['Overlord IV', 'Overlord']
+    # "Re" and "The Final Season" alone are too generic
+    assert query_variants('Re：ゼロから始める異世界生活 3rd season') == [
+        'Re：ゼロから始める異世界生活 3rd season', 'Re:ゼロから始める異世界生活']
+    assert query_variants('葬送的芙莉蓮 [1]') == ['葬送的芙莉蓮']
+    assert query_variants(None) == []
+
+def test_memo_counts_hits_and_retries_failures():
+    memo = QueryMemo()
+    calls = []
+    def fetch(query):
+        calls.append(query)
+        return None if query == 'down' else [query]
+
+    assert memo.fetch('mal', 'Dr.STONE', fetch) == ['Dr.STONE']
+    assert memo.fetch('mal', 'dr stone', fetch) == ['Dr.STONE']
+    assert memo.fetch('imdb', 'Dr.STONE', fetch) == ['Dr.STONE']
+    assert memo.fetch('mal', 'down', fetch) is None
+    assert memo.fetch('mal', 'down', fetch) is None
+    assert calls == ['Dr.STONE', 'Dr.STONE', 'down', 'down']
+    assert memo.stats() == {'imdb': {'hits': 0, 'misses': 1}, 'mal': {'hits': 1, 'misses': 3}}
+
+def test_mal_search_falls_back_to_season_stripped_variant(monkeypatch):
+    season_one = {'mal_id': 48926, 'title': 'Dr. Stone', 'title_japanese': 'Dr.STONE', 'type': 'TV', 'year': 2019}
+    season_four = dict(season_one, mal_id=57592, title='Dr. Stone: Science Future', title_japanese='Dr.STONE 第4期', year=2025)
+    catalog = {'dr stone': [season_one, season_four]}
+    requested = []
+    def fetch(query):
+        requested.append(query)
+        return catalog.get(query.lower().replace('.', ' '), [])
+    monkeypatch.setattr(mal_api, '_fetch_mal_candidates', fetch)
+    monkeypatch.setattr(mal_api, 'query_memo', QueryMemo())
+
+    assert mal_api.search_mal_by_japanese_title('Dr.STONE 第4期', 2025, 'TV')['mal_id'] == 57592
+    assert mal_api.search_mal_by_japanese_title('Dr.STONE', 2019, 'TV')['mal_id'] == 48926
+    # The franchise prefix is requested once for both seasons
+    assert requested == ['Dr.STONE 第4期', 'Dr.STONE']
+
+def test_season_numbers():
+    assert season_numbers('Dr.STONE 第4期') == season_numbers('Dr. Stone 4th Season') == {4}
+    assert season_numbers('Overlord IV') == {4}
+    assert season_numbers('Dr. Stone: Science Future') == set()
+
+def test_broader_variant_does_not_take_an_earlier_season(monkeypatch):
+    # The sequel is not on MAL yet; the season-stripped query only finds season 1
+    season_one = {'mal_id': 48926, 'title': 'Dr. Stone', 'title_japanese': 'Dr.STONE', 'type': 'TV', 'year': 2019}
+    monkeypatch.setattr(mal_api, '_fetch_mal_candidates', lambda query: [season_one] if query == 'Dr.STONE' else [])
+    monkeypatch.setattr(mal_api, 'query_memo', QueryMemo())
+    # One year apart is within the year tolerance, so only the broad-match rule rejects it
+    assert mal_api.rank_mal_candidates([season_one], ['Dr.STONE 第2期'], 2020, 'TV')[0]['confidence'] >= mal_api.MIN_CONFIDENCE
+    assert mal_api.search_mal_by_japanese_title('Dr.STONE 第2期', 2020, 'TV') is None
+
+def test_broader_variant_accepts_a_title_with_the_same_season(monkeypatch):
+    sequel = {'mal_id': 2, 'title': 'Dr. Stone 2nd Season', 'title_japanese': 'Dr.STONE 第2期', 'type': 'TV', 'year': 2021}
+    monkeypatch.setattr(mal_api, '_fetch_mal_candidates', lambda query: [sequel] if query == 'Dr.STONE' else [])
+    monkeypatch.setattr(mal_api, 'query_memo', QueryMemo())
+    assert mal_api.search_mal_by_japanese_title('Dr.STONE 第2期', 2020, 'TV')['mal_id'] == 2
@@ -0,0 +1,139 @@
+import functools
+import json
+import pytest
+import cross_platform
+from lib.run_budget import Checkpoint, RunBudget, parse_duration, prioritize
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_parse_duration():
+    assert parse_duration('30m') == 1800
+    assert parse_duration('1h30m') == 5400
+    assert parse_duration('90s') == parse_duration('90') == 90
+    with pytest.raises(ValueError):
+        parse_duration('soon')
+
+def test_priority_is_views_then_votes_then_year():
+    animes = [
+        {'id': 'old', 'popularity': 500, 'ratings': {'bahamut': {'votes': 10}}, 'year': 2010},
+        {'id': 'new', 'popularity': 500, 'ratings': {'bahamut': {'votes': 10}}, 'year': 2024},
+        {'id': 'voted', 'popularity': 500, 'ratings': {'bahamut': {'votes': 900}}, 'year': 2000},
+        {'id': 'hit', 'popularity': 90000},
+        {'id': 'unknown'},
+    ]
+    assert [a['id'] for a in prioritize(animes)] == ['hit', 'voted', 'new', 'old', 'unknown']
+
+def test_budget_stops_before_an_item_would_overrun():
+    clock = FakeClock()
+    budget = RunBudget(30, clock=clock)
+    assert not budget.exhausted()
+    budget.start_item()
+    clock.now = 12
+    budget.finish_item()
+    assert not budget.exhausted()  # 18 s left, items take 12 s
+    clock.now = 19
+    assert budget.exhausted()
+    assert not RunBudget(None, clock=clock).exhausted()
+
+def test_checkpoint_starts_a_new_pass_once_complete(tmp_path):
+    path = str(tmp_path / 'checkpoint.json')
+    first = Checkpoint(path, 'enrich')
+    first.mark('1')
+    first.save(['2', '3'])
+    assert Checkpoint(path, 'enrich').load() == {'1'}
+    assert Checkpoint(path, 'scrape').load() == set()
+
+    first.save([])
+    assert Checkpoint(path, 'enrich').load() == set()
+
+def budgeted_enrichment(tmp_path, monkeypatch):
+    """Four raw records in temp files; returns (clock, output file, checkpoint file)."""
+    animes = [{'id': str(i), 'title': f'Title {chr(65 + i)} [1]', 'popularity': p} for i, p in enumerate([10, 40, 30, 20])]
+    input_file = tmp_path / 'raw.json'
+    input_file.write_text(json.dumps(animes), encoding='utf-8')
+    output_file = tmp_path / 'enriched.json'
+    checkpoint_file = tmp_path / 'checkpoint.json'
+    monkeypatch.setattr(cross_platform, 'INPUT_FILE', str(input_file))
+    monkeypatch.setattr(cross_platform, 'OUTPUT_FILE', str(output_file))
+    monkeypatch.setattr(cross_platform, 'CHECKPOINT_FILE', str(checkpoint_file))
+    monkeypatch.setattr(cross_platform, 'AOD_FILE', str(tmp_path / 'missing.jsonl'))
+    monkeypatch.setattr(cross_platform, 'AOD_INDEX_FILE', str(tmp_path / 'aod_index.json'))
+    monkeypatch.setattr(cross_platform, 'MANUAL_MAPPING_FILE', str(tmp_path / 'manual.json'))
+    monkeypatch.setattr(cross_platform, 'prefetch_douban_ratings', lambda records, should_stop=None: 0)
+
+    clock = FakeClock()
+    monkeypatch.setattr(cross_platform, 'RunBudget', functools.partial(RunBudget, clock=clock))
+    return clock, output_file, checkpoint_file
+
+def test_budgeted_enrichment_resumes_where_it_stopped(tmp_path, monkeypatch):
+    clock, output_file, checkpoint_file = budgeted_enrichment(tmp_path, monkeypatch)
+    looked_up = []
+    def fake_enrich(anime):
+        looked_up.append(anime['id'])
+        clock.now += 10
+        anime.setdefault('ratings', {})['myanimelist'] = {'id': int(anime['id']), 'score': 7.0}
+        return anime  # still missing IMDb / Douban
+    monkeypatch.setattr(cross_platform, 'enrich_anime', fake_enrich)
+
+    cross_platform.main(budget=25)
+    assert looked_up == ['1', '2']
+    state = json.loads(checkpoint_file.read_text(encoding='utf-8'))
+    assert state['pending'] == ['3', '0'] and not state['complete']
+    # Every record is kept, in input order
+    assert [a['id'] for a in json.loads(output_file.read_text(encoding='utf-8'))] == ['0', '1', '2', '3']
+
+    cross_platform.main(budget=25)
+    assert looked_up == ['1', '2', '3', '0']
+    assert json.loads(checkpoint_file.read_text(encoding='utf-8'))['complete']
+
+    # A finished pass starts over with the most popular titles
+    cross_platform.main(budget=15)
+    assert looked_up[4:] == ['1']
+
+def test_failed_enrichment_stays_pending(tmp_path, monkeypatch):
+    clock, _, checkpoint_file = budgeted_enrichment(tmp_path, monkeypatch)
+    looked_up = []
+    def flaky_enrich(anime):
+        looked_up.append(anime['id'])
+        clock.now += 10
+        if looked_up.count('1') == 1 and anime['id'] == '1':
+            raise ConnectionError('provider down')
+        anime.setdefault('ratings', {})['myanimelist'] = {'id': int(anime['id']), 'score': 7.0}
+        return anime
+    monkeypatch.setattr(cross_platform, 'enrich_anime', flaky_enrich)
+
+    cross_platform.main(budget=25)
+    state = json.loads(checkpoint_file.read_text(encoding='utf-8'))
+    assert looked_up == ['1', '2'] and state['processed'] == ['2']
+    assert state['pending'] == ['1', '3', '0']
+
+    cross_platform.main(budget=25)
+    assert looked_up[2:] == ['1', '3']
+
+def test_failure_in_a_finished_pass_is_retried_once(tmp_path, monkeypatch):
+    clock, _, checkpoint_file = budgeted_enrichment(tmp_path, monkeypatch)
+    looked_up = []
+    def broken_enrich(anime):
+        looked_up.append(anime['id'])
+        clock.now += 1
+        if anime['id'] == '2':
+            raise ConnectionError('provider down')
+        anime.setdefault('ratings', {})['myanimelist'] = {'id': int(anime['id']), 'score': 7.0}
+        return anime
+    monkeypatch.setattr(cross_platform, 'enrich_anime', broken_enrich)
+
+    # The whole queue fits the budget, but '2' failed: the pass stays open for it
+    cross_platform.main(budget=600)
+    state = json.loads(checkpoint_file.read_text(encoding='utf-8'))
+    assert looked_up == ['1', '2', '3', '0']
+    assert state['pending'] == ['2'] and not state['complete']
+
+    # Retried once; failing again without progress closes the pass
+    cross_platform.main(budget=600)
+    assert looked_up[4:] == ['2']
+    assert json.loads(checkpoint_file.read_text(encoding='utf-8'))['complete']
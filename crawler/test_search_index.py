@@ -0,0 +1,49 @@
+import json
+import re
+from lib.search_index import build_search_index, js_replacement, search
+
+ANIMES = [
+    {'id': '1', 'title': '咒術迴戰 第二季 [1]', 'titleOriginal': '呪術廻戦 第2期', 'titleEnglish': 'Jujutsu Kaisen Season 2'},
+    {'id': '2', 'title': 'Re：從零開始的異世界生活 [1]', 'titleOriginal': 'Re:ゼロから始める異世界生活'},
+    {'id': '3', 'title': 'SPY×FAMILY 間諜家家酒 [1]', 'titleEnglish': 'SPY x FAMILY'},
+    {'id': '4', 'title': '從前從前有隻貓！ [1]'},
+    {'id': '5', 'title': ''},
+]
+
+def test_search_matches_every_title_variant():
+    index = json.loads(json.dumps(build_search_index(ANIMES), ensure_ascii=False))
+    assert search(index, '咒術') == [0]
+    assert search(index, 'jujutsu kaisen') == [0]  # titleEnglish, which the dashboard ignores today
+    assert search(index, '呪術廻戦 第2期') == search(index, '呪術廻戦2') == [0]
+    assert search(index, 'ＳＰＹ') == [2]           # full-width
+    assert search(index, 're ゼロ') == search(index, 'Re:ゼロ') == [1]
+    assert search(index, '異世界') == [1]
+    assert search(index, '從') == [1, 3]           # shorter than n: scan
+    assert search(index, '家家酒的') == []
+    assert search(index, '[1]') == []              # Bahamut episode labels are not indexed
+    assert search(index, '  ') == []
+
+def test_postings_are_sorted_and_delta_encoded():
+    index = build_search_index(ANIMES)
+    assert index['postings']['從前'] == [3]
+    assert index['postings']['異世'] == [1]
+    # "從零" (row 1) and "從前" (row 3): the shared first character has no bigram of its own
+    assert '從' not in index['postings']
+    assert all(all(delta > 0 for delta in deltas[1:]) for deltas in index['postings'].values())
+    assert index['keys'][4] == ''
+
+def js_replace(text, pattern, replacement):
+    """String.prototype.replace with a global RegExp: $1 is a group, $$ a dollar."""
+    def expand(m):
+        return re.sub(r'\$(\$|\d)', lambda g: '$' if g.group(1) == '$' else m.group(int(g.group(1))), replacement)
+    return re.sub(pattern, expand, text)
+
+def test_season_rules_use_javascript_replacements():
+    rules = build_search_index(ANIMES)['normalization']['seasonRules']
+    assert [r'第\s*(\d+)\s*期', ' $1 '] in rules
+    assert all('\\' not in replacement for _, replacement in rules)
+    text = '呪術廻戦 第2期'
+    for pattern, replacement in rules:
+        text = js_replace(text, pattern, replacement)
+    assert text.split() == ['呪術廻戦', '2']
+    assert js_replacement('$') == '$$'
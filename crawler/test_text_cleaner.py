@@ -0,0 +1,41 @@
+from lib.text_cleaner import normalize_for_match, normalize_many, clean_bahamut_title, extract_bahamut_type, franchise_key
+
+def test_normalize_season_markers():
+    assert normalize_for_match('異世界かるてっと 第3期') == '異世界かるてっと 3'
+    assert normalize_for_match('炎炎ノ消防隊 參之章') == '炎炎ノ消防隊 3'
+    assert normalize_for_match('鬼人幻燈抄 弐ノ章') == '鬼人幻燈抄 2'
+
+def test_normalize_width_case_and_separators():
+    assert normalize_for_match('Ｒｅ：ゼロから始める異世界生活') == 're ゼロから始める異世界生活'
+    assert normalize_for_match('K-On!!') == 'k on'
+    assert normalize_for_match('「ぼっち・ざ・ろっく！」') == 'ぼっち・ざ・ろっく'
+    assert normalize_for_match('') == ''
+    assert normalize_for_match(None) == ''
+
+def test_normalize_many_matches_single_calls():
+    titles = ['Sword Art Online – Progressive', '', 'K-On!', 'Sword Art Online – Progressive', None]
+    assert normalize_many(titles) == [normalize_for_match(t) for t in titles]
+
+def test_clean_bahamut_title():
+    assert clean_bahamut_title('鬼滅之刃 柱訓練篇 [1]') == '鬼滅之刃 柱訓練篇'
+    assert clean_bahamut_title('SPY×FAMILY 間諜家家酒 (電影版)') == 'SPY×FAMILY 間諜家家酒'
+    assert clean_bahamut_title('進擊的巨人 The Final Season [無修]') == '進擊的巨人 The Final Season'
+    assert clean_bahamut_title('Title (2011)') == 'Title (2011)'
+
+def test_extract_bahamut_type():
+    assert extract_bahamut_type('熊貓大冒險 [電影]') == 'MOVIE'
+    assert extract_bahamut_type('劇場版 GIVEN 被贈與的未來：去海邊 [電影]') == 'MOVIE'
+    assert extract_bahamut_type('SPY×FAMILY 間諜家家酒 (電影版)') == 'MOVIE'
+    assert extract_bahamut_type('SK8 the infinity EXTRA PART [特別篇]') == 'SPECIAL'
+    assert extract_bahamut_type('叫我對大哥 (TV版) [1]') == 'TV'
+    assert extract_bahamut_type('鬼滅之刃 柱訓練篇 [1]') is None
+    assert extract_bahamut_type(None) is None
+
+def test_franchise_key_drops_installment_markers():
+    assert franchise_key('咒術迴戰 第二季 [1]') == franchise_key('咒術迴戰 [1]') == '咒術迴戰'
+    assert franchise_key('進擊的巨人 The Final Season [無修]') == '進擊的巨人'
+    assert franchise_key('間諜家家酒 劇場版 [電影]') == '間諜家家酒'
+    assert franchise_key('炎炎消防隊 參之章 [1]') == '炎炎消防隊'
+    assert franchise_key('SPY×FAMILY Season 2') == 'spy×family'
+    assert franchise_key('劇場版 [電影]') == '劇場版'
+    assert franchise_key(None) == ''
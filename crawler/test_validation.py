@@ -0,0 +1,87 @@
+import json
+
+import validate_data
+from lib.validation import STRICT_SCHEMA, StreamValidator, failed_ids, validate_records
+
+def anime(i, **fields):
+    record = {'id': str(i), 'title': f'Title {i}', 'bahamutUrl': 'u', 'thumbnail': 't', 'year': 2020, 'episodes': 12,
+              'genres': ['奇幻'], 'popularity': 100, 'titleOriginal': 'タイトル',
+              'ratings': {'bahamut': {'score': 4.5, 'votes': 10}}}
+    record.update(fields)
+    return record
+
+def checks(report):
+    return {check['rule']: check['ids'] for check in report['checks'] if check['failed']}
+
+def test_rules_report_offending_ids():
+    records = [
+        anime(1),
+        anime(2, title='', episodes=0),
+        anime(3, year='2020', ratings={'bahamut': {'score': 7.5, 'votes': 3},
+                                       'imdb': {'score': '8.1', 'votes': -1},
+                                       'myanimelist': {'score': None, 'members': 10}}),
+        anime(4, ratings={'bahamut': {}, 'douban': {'score': 8.0, 'votes': True}}),
+        {'title': 'No id', 'year': 1890},
+    ]
+    report = validate_records(records, STRICT_SCHEMA)
+    assert checks(report) == {
+        'required:id': ['#4'],
+        'required:title': ['2'],
+        **{f'required:{field}': ['#4'] for field in ('bahamutUrl', 'thumbnail', 'genres', 'popularity', 'ratings')},
+        'required:episodes': ['2', '#4'],
+        'rating:bahamut.score': ['3'],
+        'rating:bahamut.present': ['4', '#4'],  # 7.5 is out of range, but present
+        'rating:imdb.score': ['3'],
+        'rating:imdb.votes': ['3'],
+        'rating:douban.votes': ['4'],
+        'year:range': ['3', '#4'],
+    }
+    assert not report['passed']
+    assert failed_ids(report) == ['#4', '2']
+    assert report['coverage']['titleOriginal'] == {'present': 4, 'ratio': 0.8, 'min': 0.7, 'severity': 'error',
+                                                   'passed': True}
+    assert report['coverage']['ratings.myanimelist']['present'] == 0
+    assert report['coverage']['ratings.bahamut']['present'] == 3
+
+def test_stream_validator_matches_validate_records():
+    records = [anime(1), anime(2, title='', genres=[]), anime(3, ratings={}), {'title': 'No id', 'year': 1890},
+               anime(5, ratings={'bahamut': {'score': 7.5, 'votes': 3}, 'myanimelist': {'score': 8.0, 'members': -1}})]
+    for schema in ({'minCount': 6}, STRICT_SCHEMA):
+        validator = StreamValidator(schema)
+        for record in records:
+            validator.add(record)
+        assert validator.report() == validate_records(records, schema)
+    # Only counts and failing ids are kept per record
+    assert validator.count == 5 and validator.present['titleOriginal'] == 4
+    assert validator.failing['rating:myanimelist.votes'] == ['5']
+    assert StreamValidator().report() == validate_records([])
+
+def test_thresholds_and_warnings():
+    records = [anime(i) for i in range(10)]
+    assert validate_records(records)['passed']
+    assert not validate_records(records, {'minCount': 11})['passed']
+    records[0]['episodes'] = 0  # warnings alone do not fail
+    assert validate_records(records)['passed']
+    records[1]['title'] = ''
+    for record in records[:4]:
+        del record['titleOriginal']
+    # Missing titles and low coverage only warn unless the strict schema is asked for
+    report = validate_records(records)
+    assert report['passed'] and not report['coverage']['titleOriginal']['passed']
+    assert failed_ids(report) == [] and failed_ids(report, 'warning') == ['1', '0']
+    assert not validate_records(records, STRICT_SCHEMA)['passed']
+    del records[1]
+    assert not validate_records(records, STRICT_SCHEMA)['passed']
+    assert validate_records([])['passed']
+
+def test_validate_data_cli_writes_report(tmp_path):
+    path = tmp_path / 'animes.json'
+    path.write_text(json.dumps([anime(1), anime(2, title='')]), encoding='utf-8')
+    assert validate_data.validate_data(str(path), min_count=1)
+    assert not validate_data.validate_data(str(path), min_count=3)
+    assert not validate_data.validate_data(str(path), min_count=1, report_path=str(tmp_path / 'report.json'),
+                                           strict=True)
+    report = json.loads((tmp_path / 'report.json').read_text(encoding='utf-8'))
+    assert report['file'] == str(path)
+    assert failed_ids(report) == ['2']
+    assert not validate_data.validate_data(str(tmp_path / 'missing.json'))
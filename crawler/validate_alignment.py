@@ -7,7 +7,7 @@ import logging
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from services.aod_service import AnimeOfflineDatabase
-from lib.text_cleaner import clean_bahamut_title
+from lib.text_cleaner import clean_bahamut_title, extract_bahamut_type
 
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger(__name__)
@@ -48,19 +48,20 @@ def main():
         
         clean_jp = clean_bahamut_title(title_jp)
         clean_en = clean_bahamut_title(title_en)
+        anime_type = extract_bahamut_type(title_cn)
         
         found = False
         
         # JP Lookup
         if clean_jp:
-            mal_id = aod.lookup(clean_jp, year)
+            mal_id = aod.lookup(clean_jp, year, anime_type)
             if mal_id:
                 matches_jp += 1
                 found = True
         
         # EN Lookup (Secondary)
         if not found and clean_en:
-            mal_id = aod.lookup(clean_en, year)
+            mal_id = aod.lookup(clean_en, year, anime_type)
             if mal_id:
                 matches_en += 1
                 found = True